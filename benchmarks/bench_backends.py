@@ -0,0 +1,40 @@
+"""
+Compare the XML backends: the per-document cost of building `Core` and `App`, of writing a changed `Core` with `to_element` and `pack`,
+and the import time of each XML library in a new interpreter.
+
+Run from the repository root: ``PYTHONPATH=src python benchmarks/bench_backends.py``
+"""
+
+import subprocess
+import sys
+from timeit import repeat
+from zipfile import ZipFile
+from nometa.sheet import App, Core
+
+NUMBER=2000
+
+with ZipFile("tests/resource/test.docx") as zf:
+    CORE=zf.read("docProps/core.xml")
+    APP=zf.read("docProps/app.xml")
+
+
+def sheets(backend: str) -> tuple[type, type]:
+    core=type("Core_"+backend, (Core,), {"BACKEND": backend})
+    app=type("App_"+backend, (App,), {"BACKEND": backend})
+    return core, app
+
+def import_time(module: str) -> float:
+    code="import time; t=time.perf_counter(); import %s; print(time.perf_counter()-t)"%module
+    return min(float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout) for _ in range(5))
+
+
+if __name__ == "__main__":
+    for backend, library in [("lxml", "lxml.etree"), ("expat", "pyexpat")]:
+        cls_core, cls_app=sheets(backend)
+        build=min(repeat(lambda: (cls_core(CORE), cls_app(APP)), number=NUMBER, repeat=5))
+        sheet=cls_core(CORE)
+        sheet.creator="Benchmark"
+        sheet.identifier="Benchmark"
+        write=min(repeat(lambda: (sheet.to_element(), sheet.pack()), number=NUMBER, repeat=5))
+        print("%-6s build %6.1f us/document, write %6.1f us/document, import %6.1f ms"%(
+            backend, build/NUMBER*1e6, write/NUMBER*1e6, import_time(library)*1e3))
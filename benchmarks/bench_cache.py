@@ -0,0 +1,29 @@
+"""
+Compare reopening the same documents with `Document` and looking them up in a `nometa.cache.DocumentCache`.
+
+Run from the repository root: ``PYTHONPATH=src python benchmarks/bench_cache.py``
+"""
+
+from timeit import repeat
+from nometa import Document, App, Core
+from nometa.cache import DocumentCache
+
+NUMBER=200
+FILES=["tests/resource/test.docx", "tests/resource/test.xlsx", "tests/resource/test.pptx", "tests/resource/test.vsdx"]
+
+
+def reopen() -> None:
+    for path in FILES:
+        Document(path, Core, App).core.creator
+
+def lookup(cache: DocumentCache) -> None:
+    for path in FILES:
+        cache.get(path).core.creator
+
+
+if __name__ == "__main__":
+    cache=DocumentCache()
+    opened=min(repeat(reopen, number=NUMBER, repeat=5))/(NUMBER*len(FILES))
+    cached=min(repeat(lambda: lookup(cache), number=NUMBER, repeat=5))/(NUMBER*len(FILES))
+    print("reopen %7.1f us/document, cache %6.1f us/document (x%.0f), %r, hit rate %.3f"%(
+        opened*1e6, cached*1e6, opened/cached, cache.stats, cache.stats.hit_rate))
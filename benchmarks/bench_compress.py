@@ -0,0 +1,51 @@
+"""
+Measure `Document.save` compressing all members again (`compresslevel`) with 1 to N worker threads,
+on a synthetic presentation with several hundred MiB of media members.
+
+Run from the repository root: ``PYTHONPATH=src python benchmarks/bench_compress.py [size in MiB]``
+"""
+
+import os
+import sys
+import random
+import tempfile
+from time import perf_counter
+from zipfile import ZipFile, ZIP_STORED
+from nometa import Document, App, Core
+
+SIZE_MB=int(sys.argv[1]) if len(sys.argv) > 1 else 320
+MEMBER_MB=8
+LEVEL=6
+
+
+def make_document(path: str) -> None:
+    """
+    Add members of text-like data, stored, to test.pptx. A block of 1 MiB is repeated, farther apart than the deflate window,
+    so they cost as much to compress as different data.
+    """
+    words=[bytes(random.choices(b"abcdefghijklmnopqrstuvwxyz", k=random.randint(2, 9))) for _ in range(5000)]
+    block=b' '.join(random.choices(words, k=1 << 18))[:1 << 20]
+    with ZipFile("tests/resource/test.pptx") as zin, ZipFile(path, 'w') as zout:
+        for info in zin.infolist():
+            zout.writestr(info, zin.read(info))
+        for i in range(SIZE_MB//MEMBER_MB):
+            zout.writestr("ppt/media/media%d.bin"%i, b"%d"%i+block*MEMBER_MB, compress_type=ZIP_STORED)
+
+def save(path: str, outfile: str, workers: int) -> float:
+    with Document(path, Core, App, lazy=True) as doc:
+        doc.core.creator="Benchmark"
+        start=perf_counter()
+        doc.save(outfile, compresslevel=LEVEL, workers=workers)
+        return perf_counter()-start
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        path, outfile=os.path.join(tmp, "big.pptx"), os.path.join(tmp, "out.pptx")
+        make_document(path)
+        print("%d MiB, level %d, %d CPUs"%(os.path.getsize(path) >> 20, LEVEL, os.cpu_count() or 1))
+        base=None
+        for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+            elapsed=save(path, outfile, workers)
+            base=base or elapsed
+            print("workers=%-3d %6.2f s, %6.1f MiB/s, speedup %.2fx"%(workers, elapsed, SIZE_MB/elapsed, base/elapsed))
@@ -0,0 +1,54 @@
+"""
+Compare reading and saving a large local document through `zipfile` and through a memory mapping (`mapped=True`).
+The saved document is discarded, so only the cost of reading the input is measured.
+
+Run from the repository root: ``PYTHONPATH=src python benchmarks/bench_mapped.py``
+"""
+
+import os
+import tempfile
+from timeit import repeat
+from zipfile import ZipFile, ZIP_STORED
+from nometa import Document, App, Core
+
+NUMBER=20
+MEMBERS=64
+MEMBER_SIZE=1 << 20
+
+
+def make_document(path: str) -> None:
+    with ZipFile("tests/resource/test.docx") as zin, ZipFile(path, 'w') as zout:
+        for info in zin.infolist():
+            zout.writestr(info, zin.read(info))
+        for i in range(MEMBERS):
+            zout.writestr("word/media/image%d.bin"%i, os.urandom(MEMBER_SIZE), compress_type=ZIP_STORED)
+
+class Discard:
+    """A non-seekable output that drops what is written"""
+    def __init__(self) -> None:
+        self._pos=0
+
+    def write(self, data: bytes) -> int:
+        self._pos+=len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+def save(path: str, mapped: bool) -> None:
+    with Document(path, Core, App, lazy=True, mapped=mapped) as doc:
+        doc.core.creator="Benchmark"
+        doc.save(Discard()) # type: ignore
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        path=os.path.join(tmp, "big.docx")
+        make_document(path)
+        for mapped in (False, True):
+            read=min(repeat(lambda: Document(path, Core, App, mapped=mapped), number=NUMBER*10, repeat=5))/(NUMBER*10)
+            write=min(repeat(lambda: save(path, mapped), number=NUMBER, repeat=5))/NUMBER
+            print("mapped=%-5s read %7.1f us/document, save %6.1f ms/document (%d MiB)"%(mapped, read*1e6, write*1e3, os.path.getsize(path) >> 20))
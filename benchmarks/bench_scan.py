@@ -0,0 +1,32 @@
+"""
+Compare the read-only scanner with `Document` when only reading metadata.
+
+Run from the repository root: ``PYTHONPATH=src python benchmarks/bench_scan.py``
+"""
+
+from timeit import repeat
+from nometa import Document, App, Core, scan
+
+FILES=["tests/resource/test.docx", "tests/resource/test.xlsx", "tests/resource/test.pptx", "tests/resource/test.vsdx"]
+NUMBER=200
+
+
+def read_document() -> None:
+    for it in FILES:
+        doc=Document(it, Core, App)
+        doc.core.modified, doc.app.company
+
+def read_lazy_document() -> None:
+    for it in FILES:
+        with Document(it, Core, App, lazy=True) as doc:
+            doc.core.modified
+
+def read_scan() -> None:
+    for it in FILES:
+        scan(it)["core.modified"]
+
+
+if __name__ == "__main__":
+    for func in [read_document, read_lazy_document, read_scan]:
+        best=min(repeat(func, number=NUMBER, repeat=5))
+        print("%-20s %8.1f us/document"%(func.__name__, best/(NUMBER*len(FILES))*1e6))
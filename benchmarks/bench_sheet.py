@@ -0,0 +1,49 @@
+"""
+Measure the per-document cost of parsing the sheets with a new parser per sheet (as before) and with the shared parser of thread,
+the whole cost of building `Core` and `App`, and the cost of writing a changed `Core` by serializing the tree or by splicing its bytes.
+
+Run from the repository root: ``PYTHONPATH=src python benchmarks/bench_sheet.py``
+"""
+
+from timeit import repeat
+from zipfile import ZipFile
+from lxml import etree
+from nometa.sheet import App, Core
+from nometa.backends.lxml_backend import _get_parser
+
+NUMBER=2000
+
+with ZipFile("tests/resource/test.docx") as zf:
+    CORE=zf.read("docProps/core.xml")
+    APP=zf.read("docProps/app.xml")
+
+
+def parse_new_parsers() -> None:
+    for raw in (CORE, APP):
+        parser=etree.XMLParser(remove_blank_text=True, resolve_entities=False)
+        parser.set_element_class_lookup(etree.ElementNamespaceClassLookup())
+        etree.fromstring(raw, parser)
+
+def build_sheets() -> None:
+    Core(CORE)
+    App(APP)
+
+def parse_shared_parser() -> None:
+    for raw in (CORE, APP):
+        etree.fromstring(raw, _get_parser())
+
+CHANGED=Core(CORE)
+CHANGED.creator="Benchmark"
+
+def serialize_tree() -> None:
+    CHANGED.to_element()
+    CHANGED.pack()
+
+def splice_bytes() -> None:
+    CHANGED.splice()
+
+
+if __name__ == "__main__":
+    for func in [parse_new_parsers, parse_shared_parser, build_sheets, serialize_tree, splice_bytes]:
+        best=min(repeat(func, number=NUMBER, repeat=5))
+        print("%-26s %8.1f us/document"%(func.__name__, best/NUMBER*1e6))
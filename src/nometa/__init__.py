@@ -3,23 +3,31 @@ NoMETA is a library for editing MS Office documents metadata,
 it works with documents of Office >= 2007 and has been tested with docx, pptx, xlsx, vsdx and accdt files.    
 """
 
-from typing import Type, IO
-from nometa.sheet import App, Core
-from zipfile import is_zipfile, ZipFile, ZIP_DEFLATED
+import os
+from typing import Any, Type, IO, Iterator, cast
+from contextlib import nullcontext
+from nometa.sheet import Sheet, App, Core
+from nometa.archive import write_archive, iter_archive, update_inplace, replace_atomic
+from nometa.reader import RangeReader, ReadStats, MappedZipFile
+from nometa.compression import CompressionPolicy
+from nometa.compact import compact_policy, drop_thumbnail as _drop_thumbnail
+from zipfile import ZipFile, BadZipFile, ZIP_DEFLATED
 
 __version__="0.1.1"
 
-def _copy_archive(zin: ZipFile, zout: ZipFile) -> None:
-    zout.comment=zin.comment
-    for it in zin.infolist():
-        if it.filename in ["docProps/app.xml", "docProps/core.xml"]: continue
-        zout.writestr(it, zin.read(it))
+def _optimize_policy(compresslevel: int|None, policy: CompressionPolicy|None, optimize: bool) -> CompressionPolicy|None:
+    if not optimize:
+        return policy
+
+    if compresslevel is not None or policy is not None:
+        raise ValueError("``optimize`` can't be used along with ``compresslevel`` or ``policy``")
+    return compact_policy()
 
 class Document:
     """
     The Document class aggregates two sheets. One sheet represents the *docProps/app.xml* and the other one represents the *docProps/core.xml*
     """
-    def __init__(self, file: str | IO[bytes], cls_core: Type[Core], cls_app: Type[App]) -> None:
+    def __init__(self, file: str | IO[bytes], cls_core: Type[Core], cls_app: Type[App], lazy: bool=False, ranged: bool=False, mapped: bool=False) -> None:
         """
         Open the specified document to handle its metadata.
 
@@ -27,30 +35,89 @@ class Document:
             file (str | IO[bytes]): file path of document as string OR an in-memory buffer (`io.BytesIO`)
             cls_core (Type[Core]): type of `nometa.sheet.App` class or its subclasses
             cls_app (Type[App]): type of `nometa.sheet.Core` class or its subclasses
+            lazy (bool, optional): parse each sheet only when it's accessed for the first time. The archive is kept open
+                until `close` is called (or the `with` block ends). Defaults to False.
+            ranged (bool, optional): read the sheets with `nometa.reader.RangeReader`, which fetches only the end of central directory,
+                the central directory and the local entries of the sheets, eg. for documents on slow storage. The I/O issued is
+                counted in `read_stats`. Defaults to False.
+            mapped (bool, optional): memory-map a document opened by file path with `nometa.reader.MappedZipFile`, so reading
+                the sheets and copying the other members on save don't issue syscalls nor copy the compressed data. It's ignored
+                for in-memory buffers. Defaults to False.
 
         Raises:
             TypeError
             ValueError
             ValueError
+            ValueError: throws when both `ranged` and `mapped` are set
         """
         if not (issubclass(cls_core, Core) and issubclass(cls_app, App)):
             raise TypeError("``cls_app`` must be a subclass of ``sheet.App`` and ``cls_core`` must be a subclass of ``sheet.Core``")
-        
-        if not is_zipfile(file):
+
+        if ranged and mapped:
+            raise ValueError("``ranged`` and ``mapped`` can't be used together")
+
+        self._file: str | IO[bytes]=file
+        self._read_stats=ReadStats() if ranged else None
+        self._mapped=mapped and isinstance(file, str)
+        try:
+            zf=self._open()
+        except (BadZipFile, OSError):
             raise ValueError("'%s' is not a MS Office document"%file)
-        
-        with ZipFile(file, 'r') as zf:
-            try:
-                self._core=cls_core(zf.read("docProps/core.xml"))
-            except KeyError:
-                raise ValueError("'%s' is not a MS Office document"%file)
-            
+
+        names=set(zf.namelist())
+        if "docProps/core.xml" not in names:
+            zf.close()
+            raise ValueError("'%s' is not a MS Office document"%file)
+
+        self._cls_core=cls_core
+        self._cls_app=cls_app
+        self._has_app="docProps/app.xml" in names
+        self._core: Core | None=None
+        self._app: App | None=None
+        self._zip: ZipFile | RangeReader | None=zf
+        if not lazy:
             try:
-                self._app=cls_app(zf.read("docProps/app.xml"))
-            except KeyError:
-                self._app=None
-            
-            self._file: str | IO[bytes]=file
+                self.core
+                if self._has_app: self.app
+            finally:
+                self.close()
+
+    def __enter__(self) -> "Document":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the archive kept open by a lazy document. A sheet that wasn't accessed yet will reopen the document when accessed.
+        """
+        if self._zip is not None:
+            self._zip.close()
+            self._zip=None
+
+    @property
+    def read_stats(self) -> ReadStats | None:
+        """
+        The I/O issued to read the document when it was opened with `ranged`, otherwise `None`.
+        """
+        return self._read_stats
+
+    def _open(self, ranged: bool=True) -> ZipFile | RangeReader:
+        if ranged and self._read_stats is not None:
+            return RangeReader(self._file, self._read_stats)
+
+        if self._mapped:
+            return MappedZipFile(cast(str, self._file))
+
+        return ZipFile(self._file, 'r')
+
+    def _read_sheet(self, name: str, cls: Type[Sheet]) -> Sheet:
+        if self._zip is not None:
+            return cls(self._zip.read(name))
+
+        with self._open() as zf:
+            return cls(zf.read(name))
 
     @property
     def app(self) -> App:
@@ -63,9 +130,12 @@ class Document:
         Returns:
             App: an instance of `nometa.sheet.App`
         """
-        if self._app is None:
+        if not self._has_app:
             raise NotImplementedError("This document doesn't have app.xml sheet")
         
+        if self._app is None:
+            self._app=cast(App, self._read_sheet("docProps/app.xml", self._cls_app))
+
         return self._app
 
     @property
@@ -76,30 +146,217 @@ class Document:
         Returns:
             Core: an instance of `nometa.sheet.Core`
         """
+        if self._core is None:
+            self._core=cast(Core, self._read_sheet("docProps/core.xml", self._cls_core))
+
         return self._core
             
-    def save(self, outfile: str|IO[bytes]) -> None:
+    def _sheets(self) -> list[tuple[str, Sheet]]:
+        """
+        The sheets already read, with their member names. A sheet that wasn't read can't have changed.
+        """
+        return [(name, sheet) for name, sheet in (("docProps/core.xml", self._core), ("docProps/app.xml", self._app)) if sheet is not None]
+
+    @property
+    def dirty(self) -> bool:
+        """
+        Tell whether a property has changed since the document was read, see `nometa.sheet.Sheet.dirty`.
+        """
+        return any(sheet.dirty for _, sheet in self._sheets())
+
+    def _pack_sheets(self) -> dict[str, bytes]:
+        members={}
+        for name, sheet in self._sheets():
+            if sheet.dirty:
+                data=sheet.splice()
+                if data is None:
+                    sheet.to_element()
+                    data=sheet.pack()
+                members[name]=data
+
+        return members
+
+    def _reader(self) -> ZipFile | nullcontext[ZipFile]:
+        if self._zip is not None and self._read_stats is None:
+            return nullcontext(cast(ZipFile, self._zip))
+
+        return cast(ZipFile, self._open(False))
+
+    def _write(
+        self,
+        outfile: str|IO[bytes],
+        compresslevel: int|None=None,
+        workers: int|None=1,
+        policy: CompressionPolicy|None=None,
+        thumbnail: bool=True,
+        deterministic: bool=False
+    ) -> None:
+        members=self._pack_sheets()
+        with self._reader() as zr:
+            skip: set[str]=set()
+            if not thumbnail:
+                skip, rewritten=_drop_thumbnail(zr)
+                members={**rewritten, **members}
+            with ZipFile(outfile, 'w', compression=ZIP_DEFLATED) as zw:
+                for _ in write_archive(zr, zw, members, compresslevel, workers, policy, skip, deterministic): pass
+
+    def _is_same_file(self, outfile: str|IO[bytes]) -> bool:
+        if self._file == outfile:
+            return True
+
+        if not (isinstance(self._file, str) and isinstance(outfile, str) and os.path.exists(outfile)):
+            return False
+
+        return os.path.samefile(self._file, outfile)
+
+    def save(
+        self,
+        outfile: str|IO[bytes],
+        compresslevel: int|None=None,
+        workers: int|None=1,
+        policy: CompressionPolicy|None=None,
+        optimize: bool=False,
+        drop_thumbnail: bool=False,
+        deterministic: bool=False,
+        overwrite: bool=False,
+        keep_times: bool=False
+    ) -> None:
         """
         Save the changes to the specified document in `outfile` parameter.
 
+        Only the changed sheets (`docProps/core.xml` and `docProps/app.xml`) are encoded again, the other members, including
+        unchanged sheets, are copied as raw compressed data.
+        They are streamed in chunks of `nometa.archive.CHUNK_SIZE` bytes, so the memory used by `save` is bounded by this size
+        plus the size of sheets and of the central directory, no matter how big the members are.
+
+        When `compresslevel` or `policy` is given, some members may be compressed again, by `workers` threads,
+        see `nometa.archive.write_archive` and `nometa.compression.CompressionPolicy`.
+        Then the memory used is bounded by the size of two members per worker, the members bigger than `nometa.archive.STREAM_SIZE`
+        are compressed as a stream, through a temporary file.
+
+        `optimize` and `drop_thumbnail` shrink the document for archival, see `nometa.compact`.
+
+        With `overwrite`, a file path is replaced atomically: the document is written into a temporary file of the same directory,
+        which is flushed to disk and renamed over `outfile`, see `nometa.archive.replace_atomic`. So the opened document can be saved
+        over itself in one pass, eg. to compress it again, then the changes are considered saved, like with `update`.
+
         Args:
-            outfile (str | IO[bytes]): file path (as string) to document or in memory buffer (`io.BytesIO`)
+            outfile (str | IO[bytes]): file path (as string) to document or a writable binary stream,
+                it doesn't need to be seekable (eg. a pipe or a socket)
+            compresslevel (int | None, optional): the deflate level, from 0 to 9, to compress all members again. Defaults to None.
+            workers (int | None, optional): number of threads compressing the members, `None` means the number of CPUs. Defaults to 1.
+            policy (CompressionPolicy | None, optional): how each member is compressed. Defaults to None, the members keep their method.
+            optimize (bool, optional): compress the XML parts again at the maximum level, keeping the ones that don't get smaller,
+                see `nometa.compact.compact_policy`. Defaults to False.
+            drop_thumbnail (bool, optional): remove `docProps/thumbnail.*` along with its relationship and content type. Defaults to False.
+            deterministic (bool, optional): write a reproducible document, the same document saved with the same changes gives
+                the same bytes, see `nometa.archive.write_archive`. Defaults to False.
+            overwrite (bool, optional): replace the file at `outfile` atomically, it may be the opened document. Defaults to False.
+            keep_times (bool, optional): with `overwrite`, keep the access and modification times of the replaced file. Defaults to False.
 
         Raises:
-            IOError: throws when input and output file path/buffer are the same
+            IOError: throws when input and output file path/buffer are the same, unless `overwrite` is set for a file path
+            ValueError: throws when more than one of `compresslevel`, `policy` and `optimize` are given
         """
-        if self._file == outfile:
+        overwrite=overwrite and isinstance(outfile, str)
+        same=self._is_same_file(outfile)
+        if same and not overwrite:
             raise IOError("Input and output documents cannot be the same")
-        
-        with ZipFile(self._file, 'r') as zr:
-            with ZipFile(outfile, 'w', compression=ZIP_DEFLATED) as zw:
-                _copy_archive(zr,zw)
-                self._core.to_element()
-                zw.writestr("docProps/core.xml",self._core.pack())
-                if self._app is not None:
-                    self._app.to_element()
-                    zw.writestr("docProps/app.xml", self._app.pack())
+
+        policy=_optimize_policy(compresslevel, policy, optimize)
+        write=lambda fw: self._write(fw, compresslevel, workers, policy, not drop_thumbnail, deterministic)
+        if not overwrite:
+            write(outfile)
+            return
+
+        if not same:
+            replace_atomic(cast(str, outfile), write, keep_times)
+            return
+
+        members=self._pack_sheets()
+        self.close()
+        replace_atomic(cast(str, outfile), write, keep_times)
+        for name, sheet in self._sheets():
+            sheet._clean(members.get(name))
+
+    def iter_bytes(
+        self,
+        compresslevel: int|None=None,
+        workers: int|None=1,
+        policy: CompressionPolicy|None=None,
+        optimize: bool=False,
+        drop_thumbnail: bool=False,
+        deterministic: bool=False
+    ) -> Iterator[bytes]:
+        """
+        Save the changes as a generator of chunks of about `nometa.archive.CHUNK_SIZE` bytes, eg. to send the document through HTTP.
+        The first chunk is available before the whole document is written and the memory used doesn't depend on the document size.
+
+        Args:
+            compresslevel (int | None, optional): see `save`. Defaults to None.
+            workers (int | None, optional): see `save`. Defaults to 1.
+            policy (CompressionPolicy | None, optional): see `save`. Defaults to None.
+            optimize (bool, optional): see `save`. Defaults to False.
+            drop_thumbnail (bool, optional): see `save`. Defaults to False.
+            deterministic (bool, optional): write a reproducible document, see `save`. Defaults to False.
+
+        Raises:
+            ValueError: throws when more than one of `compresslevel`, `policy` and `optimize` are given
+
+        Yields:
+            Iterator[bytes]: the document in chunks
+        """
+        policy=_optimize_policy(compresslevel, policy, optimize)
+        members=self._pack_sheets()
+        with self._reader() as zr:
+            skip: set[str]=set()
+            if drop_thumbnail:
+                skip, rewritten=_drop_thumbnail(zr)
+                members={**rewritten, **members}
+            yield from iter_archive(zr, members, compresslevel, workers, policy, skip, deterministic)
+
+    def update(self, fallback: bool=True, keep_times: bool=False) -> None:
+        """
+        Save the changes into the opened document itself, it's only available for documents opened by file path.
+
+        Only the changed `docProps` sheets and the central directory of archive are written, the other members stay untouched.
+        Nothing is written when no property has changed.
+        It's crash-safe, an interrupted update is rolled back by the next one or by `nometa.archive.recover`.
+
+        Args:
+            fallback (bool, optional): when the document can't be updated in place, rewrite it into a temporary file
+                and rename it over the document. Defaults to True.
+            keep_times (bool, optional): keep the access and modification times of the document. Defaults to False.
+
+        Raises:
+            IOError: throws when the document wasn't opened by file path, or it can't be updated in place and `fallback` is False
+        """
+        if type(self._file) != str:
+            raise IOError("Only documents opened by file path can be updated in place")
+
+        members=self._pack_sheets()
+        self.close()
+        st=os.stat(self._file) if keep_times and members else None
+        if not update_inplace(self._file, members):
+            if not fallback:
+                raise IOError("'%s' cannot be updated in place"%self._file)
+
+            replace_atomic(self._file, self._write, keep_times)
+        elif st is not None:
+            os.utime(self._file, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        for name, sheet in self._sheets():
+            sheet._clean(members.get(name))
+
+
+def __getattr__(name: str) -> Any:
+    # the scanner is imported on first use, it pulls in the process pool
+    if name in ("scan", "scan_many"):
+        from nometa import scanner
+        return getattr(scanner, name)
+
+    raise AttributeError("module 'nometa' has no attribute '%s'"%name)
 
 
 
-__all__ = ["Document", "App", "Core", "__version__"]
\ No newline at end of file
+__all__ = ["Document", "App", "Core", "scan", "scan_many", "__version__"]
\ No newline at end of file
@@ -1,8 +1,9 @@
-from nometa import *
-from pathlib import Path
+from nometa import __version__
 from datetime import datetime
 from argparse import ArgumentParser, SUPPRESS, RawDescriptionHelpFormatter
+from typing import Any, Callable, Iterator
 import sys
+import os
 
 _MESSAGE=f"""
 ***********************************************************************************************************************************
@@ -18,9 +19,118 @@ _MESSAGE=f"""
 Eg.
     nometa --creator '' sample.docx --> clean property creator
     nometa --created 2024-12-09T13:09:23 --manager 'Josh Kool' sample.xlsx --> set properties `created` and `manager` at same time.
+    nometa --creator '' -r -j 8 -o clean/ share/ '*.pptx' --> clean property creator of documents in `share` (and subdirectories) and of pptx files,
+        using 8 processes, and write the copies into `clean`.
+    nometa --company '' -i -r share/ --> clean property company of documents in `share` (and subdirectories), rewriting them in place.
+    nometa --compact --drop-thumbnail -o small/ share/ --> shrink the documents of `share` for archival and write them into `small`.
+    nometa index --db share.db share/ --> catalog the metadata of documents in `share` (see `nometa index -h`).
 """
 
-def main() -> None:
+def _glob_root(pattern: str) -> str:
+    """
+    Get the directory part of a glob pattern before its first wildcard, eg. `share` for `share/**/*.docx`.
+    """
+    parts=pattern.split(os.sep)
+    fixed=[]
+    for part in parts[:-1]:
+        if any(c in part for c in "*?["): break
+        fixed.append(part)
+    return os.sep.join(fixed) if fixed else (os.sep if pattern.startswith(os.sep) else '.')
+
+def _expand(patterns: list[str], recursive: bool, roots: list[str], missing: list[str]) -> Iterator[str]:
+    """
+    Expand files, directories and glob patterns into file paths. Directories are expanded into their Office documents.
+    The directories given and the fixed part of glob patterns are added to `roots`, the outputs keep their path relative to them.
+    """
+    from glob import glob
+    from nometa.scanner import SUFFIXES
+
+    for pattern in patterns:
+        pattern=os.path.expanduser(pattern)
+        is_glob=any(c in pattern for c in "*?[")
+        matches=sorted(glob(pattern, recursive=True)) if is_glob else [pattern]
+        if not any(os.path.exists(it) for it in matches):
+            missing.append(pattern)
+            continue
+
+        if is_glob:
+            roots.append(os.path.abspath(_glob_root(pattern)))
+        for path in matches:
+            if not os.path.isdir(path):
+                yield path
+                continue
+
+            if not is_glob: roots.append(os.path.abspath(path))
+            for dirpath, dirnames, filenames in os.walk(path):
+                if not recursive: dirnames.clear()
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if os.path.splitext(name)[1].lower() in SUFFIXES:
+                        yield os.path.join(dirpath, name)
+
+def _target(outdir: str | None, roots: list[str], path: str) -> str:
+    """
+    Map a document path to the output path. Documents found in directories or by glob patterns keep their relative path inside `outdir`.
+    """
+    if outdir is None:
+        name, suffix=os.path.splitext(os.path.basename(path))
+        return name+"_copy"+suffix
+
+    abspath=os.path.abspath(path)
+    root=max((it for it in roots if abspath.startswith(it.rstrip(os.sep)+os.sep)), key=len, default=None)
+    return os.path.join(outdir, os.path.relpath(abspath, root) if root else os.path.basename(path))
+
+def _collisions(paths: list[str], outputs: list[str]) -> list[str]:
+    """
+    Get an error message for each output path that more than one document would be written to.
+    """
+    found: dict[str, list[str]]={}
+    for path, outfile in zip(paths, outputs):
+        found.setdefault(os.path.normcase(os.path.abspath(outfile)), []).append(path)
+
+    return ["'%s' would be written by %s"%(outfile, ", ".join("'%s'"%it for it in sources)) for outfile, sources in found.items() if len(sources) > 1]
+
+def _output(outputs: dict[str, str]) -> Callable[[str], str]:
+    """
+    Get the output path of a document, creating its directory.
+    """
+    def resolve(path: str) -> str:
+        outfile=outputs[path]
+        os.makedirs(os.path.dirname(outfile) or '.', exist_ok=True)
+        return outfile
+
+    return resolve
+
+def index(argv: list[str]) -> int:
+    parser=ArgumentParser(
+        prog="nometa index",
+        description="Store the metadata of documents of directory trees in a SQLite catalog. "
+            "Only new and changed documents (by size and modification time) are read again.",
+        allow_abbrev=False
+    )
+    parser.add_argument("root", nargs='+', help="the directories to walk")
+    parser.add_argument("--db", default="nometa.db", help="the SQLite catalog (default: nometa.db)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of documents read in parallel (default: number of CPUs)")
+    args=parser.parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("argument -j/--jobs: must be greater than zero")
+
+    from nometa.catalog import Catalog
+
+    with Catalog(args.db) as catalog:
+        try:
+            stats=catalog.update(args.root, workers=args.jobs)
+        except FileNotFoundError as e:
+            print("Err: directory not found at '%s', the catalog is left untouched"%e.filename, file=sys.stderr)
+            return 1
+
+    print("scanned: %d, unchanged: %d, removed: %d, errors: %d, unlisted: %d"%stats)
+    return 0
+
+def main() -> int:
+    if sys.argv[1:2] == ["index"]:
+        return index(sys.argv[2:])
+
     parser=ArgumentParser(
         prog="nometa",
         description=_MESSAGE,
@@ -30,7 +140,17 @@ def main() -> None:
 
     dt_conv=lambda dts: datetime.strptime(dts,"%Y-%m-%dT%H:%M:%SZ")
 
-    parser.add_argument("docpath", type=str, help="The document path")
+    parser.add_argument("-V", "--version", action="version", version="%(prog)s "+__version__)
+    parser.add_argument("docpath", type=str, nargs='+', help="The document paths, directories or glob patterns")
+    parser.add_argument("-r", "--recursive", action="store_true", help="look for documents in subdirectories too")
+    parser.add_argument("-o", "--output-dir", dest="output_dir", default=None, help="where the modified copies are written")
+    parser.add_argument("-i", "--in-place", dest="in_place", action="store_true", help="save the changes into the documents themselves")
+    parser.add_argument("--keep-times", dest="keep_times", action="store_true",
+                        help="keep the access and modification times of documents saved in place")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of documents processed in parallel")
+    parser.add_argument("--compact", action="store_true", help="compress the XML parts again at the maximum level and report the bytes saved")
+    parser.add_argument("--drop-thumbnail", dest="drop_thumbnail", action="store_true", help="remove the thumbnail of documents")
+    parser.add_argument("--deterministic", action="store_true", help="write reproducible documents: same input and edits, same bytes")
     # properties of core.xml
     parser.add_argument("--creator", default=SUPPRESS, help="who has created the document")
     parser.add_argument("--last_modified_by", default=SUPPRESS, help="who has modified the document")
@@ -43,34 +163,66 @@ def main() -> None:
     parser.add_argument("--company", default=SUPPRESS, help="company's name")
     args=parser.parse_args()
     dargs=vars(args)
+    docpaths, recursive, outdir, in_place, keep_times, jobs, compact, drop_thumbnail, deterministic=(
+        dargs.pop(opt) for opt in
+        ["docpath", "recursive", "output_dir", "in_place", "keep_times", "jobs", "compact", "drop_thumbnail", "deterministic"]
+    )
+    if jobs < 1:
+        parser.error("argument -j/--jobs: must be greater than zero")
+    if in_place and outdir is not None:
+        parser.error("argument -i/--in-place: not allowed with argument -o/--output-dir")
 
-    docfile=Path(dargs["docpath"]).expanduser()
-    del dargs["docpath"]
-
-    if not docfile.is_file():
-        raise FileNotFoundError("file not found at '%s'"%docfile)
-
-    doc=Document(str(docfile),Core,App)
-
+    edits: dict[str, Any]={}
     for prop,value in dargs.items():
         if prop in ["creator","last_modified_by"]:
-            setattr(doc.core,prop,None if len(value)<=0 else value)
+            edits["core."+prop]=None if len(value)<=0 else value
         elif prop in ["manager","company"]:
-            setattr(doc.app,prop,None if len(value)<=0 else value)
+            edits["app."+prop]=None if len(value)<=0 else value
         elif prop == "last_printed":
-            setattr(doc.core,prop,datetime.fromisoformat(value) if len(value)>0 else None)
+            edits["core."+prop]=datetime.fromisoformat(value) if len(value)>0 else None
         else:
-            setattr(doc.core,prop,value)
+            edits["core."+prop]=value
+
+    # the workers and the XML backend are imported only now, so `--help`, `--version` and argument errors stay fast
+    from nometa.batch import run, SAVED, UNCHANGED, ERROR
+
+    roots: list[str]=[]
+    missing: list[str]=[]
+    paths=list(dict.fromkeys(_expand(docpaths, recursive, roots, missing)))
+    outputs={} if in_place else {path: _target(outdir, roots, path) for path in paths}
+    collisions=_collisions(list(outputs), list(outputs.values()))
+    if collisions:
+        for message in collisions:
+            print("Err: %s"%message, file=sys.stderr)
+        print("Err: nothing has been written, documents with the same name need an output directory (-o) and a common directory or glob pattern", file=sys.stderr)
+        return 1
+
+    counts={SAVED: 0, UNCHANGED: 0, ERROR: 0}
+    saved=0
+    results=run(
+        paths, edits, None if in_place else _output(outputs), workers=jobs, executor="process" if jobs > 1 else "thread",
+        compact=compact, drop_thumbnail=drop_thumbnail, deterministic=deterministic, keep_times=keep_times
+    )
+    for result in results:
+        counts[result.status]+=1
+        if result.status == ERROR:
+            print("Err: %s: %s"%(result.path, result.error), file=sys.stderr)
+        elif compact or drop_thumbnail:
+            saved+=result.bytes_saved
+            print("%s: %d bytes saved"%(result.path, result.bytes_saved))
+
+    for pattern in missing:
+        counts[ERROR]+=1
+        print("Err: file not found at '%s'"%pattern, file=sys.stderr)
 
-    outfile=docfile.name.replace(docfile.suffix,'')+"_copy"+docfile.suffix
-    doc.save(outfile)
+    print("saved: %d, unchanged: %d, errors: %d"%(counts[SAVED], counts[UNCHANGED], counts[ERROR])
+        +(", bytes saved: %d"%saved if compact or drop_thumbnail else ''))
+    return 1 if counts[ERROR] else 0
 
 if __name__ == "__main__":
     rc: int = 1
     try:
-        main()
-        rc = 0
+        rc = main()
     except Exception as e:
         print("Err: %s"%e, file=sys.stderr)
-    finally:
-        sys.exit(rc)
\ No newline at end of file
+    sys.exit(rc)
\ No newline at end of file
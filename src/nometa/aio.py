@@ -0,0 +1,205 @@
+"""
+This module provides an asyncio interface to `nometa.Document`.
+
+The blocking stages (zip I/O and XML parsing) run in an executor, so they don't stall the event loop.
+Documents can also be read from and written to asynchronous byte streams, eg. the body of an HTTP request and response.
+"""
+
+import asyncio
+import inspect
+from concurrent.futures import Executor
+from contextlib import AsyncExitStack
+from functools import partial
+from tempfile import SpooledTemporaryFile
+from typing import IO, Any, AsyncIterable, Callable, Protocol, Type, TypeVar
+from nometa import Document
+from nometa.sheet import App, Core
+from nometa.compression import CompressionPolicy
+
+SPOOL_SIZE=8 << 20
+"""Streams smaller than this size (8 MiB) are buffered in memory, the bigger ones are buffered in a temporary file."""
+
+_T=TypeVar("_T")
+
+
+class AsyncWriter(Protocol):
+    """
+    An asynchronous byte stream, like `aiohttp.web.StreamResponse` or `asyncio.StreamWriter`.
+    `write` may be a coroutine; otherwise the stream is drained after each write when it has a `drain` coroutine.
+    """
+    def write(self, data: bytes) -> Any: ...
+
+
+async def _run(executor: Executor | None, semaphore: asyncio.Semaphore | None, func: Callable[..., _T], *args: Any) -> _T:
+    loop=asyncio.get_running_loop()
+    async with AsyncExitStack() as stack:
+        if semaphore is not None:
+            await stack.enter_async_context(semaphore)
+        return await loop.run_in_executor(executor, partial(func, *args))
+
+async def _read_stream(stream: AsyncIterable[bytes], executor: Executor | None, semaphore: asyncio.Semaphore | None) -> IO[bytes]:
+    spool: IO[bytes]=SpooledTemporaryFile(max_size=SPOOL_SIZE) # type: ignore
+    try:
+        async for chunk in stream:
+            await _run(executor, semaphore, spool.write, chunk)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+
+    return spool
+
+def _is_async_writer(outfile: Any) -> bool:
+    return hasattr(outfile, "drain") or inspect.iscoroutinefunction(getattr(outfile, "write", None))
+
+
+class AsyncDocument:
+    """
+    Asynchronous counterpart of `nometa.Document`. Use `AsyncDocument.open` to create an instance.
+
+    The sheets are parsed on opening, so reading and changing properties through `core` and `app` doesn't block.
+    """
+    def __init__(self, doc: Document, executor: Executor | None=None, semaphore: asyncio.Semaphore | None=None) -> None:
+        """
+        Wrap an opened document. Prefer `AsyncDocument.open`.
+
+        Args:
+            doc (Document): the opened document
+            executor (Executor | None, optional): where the blocking stages run. Defaults to the event loop's default executor.
+            semaphore (asyncio.Semaphore | None, optional): bounds how many blocking stages run at same time. Defaults to None.
+        """
+        self._doc=doc
+        self._executor=executor
+        self._semaphore=semaphore
+        self._spool: IO[bytes] | None=None
+
+    @classmethod
+    async def open(
+        cls,
+        file: str | IO[bytes] | AsyncIterable[bytes],
+        cls_core: Type[Core],
+        cls_app: Type[App],
+        executor: Executor | None=None,
+        semaphore: asyncio.Semaphore | None=None
+    ) -> "AsyncDocument":
+        """
+        Open the specified document to handle its metadata.
+
+        Args:
+            file (str | IO[bytes] | AsyncIterable[bytes]): file path, in-memory buffer or asynchronous byte stream of document.
+                A stream is buffered into memory or into a temporary file when it's larger than `SPOOL_SIZE`.
+            cls_core (Type[Core]): type of `nometa.sheet.Core` class or its subclasses
+            cls_app (Type[App]): type of `nometa.sheet.App` class or its subclasses
+            executor (Executor | None, optional): where the blocking stages run. Defaults to the event loop's default executor.
+            semaphore (asyncio.Semaphore | None, optional): bounds how many blocking stages run at same time. Defaults to None.
+
+        Returns:
+            AsyncDocument: the opened document
+        """
+        spool=None
+        if isinstance(file, AsyncIterable):
+            spool=file=await _read_stream(file, executor, semaphore)
+
+        try:
+            doc=await _run(executor, semaphore, Document, file, cls_core, cls_app)
+        except BaseException:
+            if spool is not None: spool.close()
+            raise
+
+        self=cls(doc, executor, semaphore)
+        self._spool=spool
+        return self
+
+    async def __aenter__(self) -> "AsyncDocument":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _run(self, func: Callable[..., _T], *args: Any) -> _T:
+        return await _run(self._executor, self._semaphore, func, *args)
+
+    @property
+    def document(self) -> Document:
+        """The wrapped `nometa.Document`"""
+        return self._doc
+
+    @property
+    def app(self) -> App:
+        """
+        Get `App` sheet instance correponding to `docProps/app.xml` file.
+
+        Raises:
+            NotImplementedError: throws when there is no `App` instance.
+        """
+        return self._doc.app
+
+    @property
+    def core(self) -> Core:
+        """Get `Core` sheet instance corresponding to `docProps/core.xml` file."""
+        return self._doc.core
+
+    async def save(
+        self,
+        outfile: str | IO[bytes] | AsyncWriter,
+        compresslevel: int | None=None,
+        workers: int | None=1,
+        policy: CompressionPolicy | None=None,
+        optimize: bool=False,
+        drop_thumbnail: bool=False,
+        deterministic: bool=False,
+        overwrite: bool=False,
+        keep_times: bool=False
+    ) -> None:
+        """
+        Save the changes to the specified document in `outfile` parameter. The options are the ones of `nometa.Document.save`.
+
+        Args:
+            outfile (str | IO[bytes] | AsyncWriter): file path, in-memory buffer or asynchronous byte stream.
+                When it's a stream, the document is written progressively in chunks, see `nometa.Document.iter_bytes`.
+            compresslevel (int | None, optional): the deflate level, from 0 to 9, to compress all members again. Defaults to None.
+            workers (int | None, optional): number of threads compressing the members, `None` means the number of CPUs. Defaults to 1.
+            policy (CompressionPolicy | None, optional): how each member is compressed. Defaults to None, the members keep their method.
+            optimize (bool, optional): compress the XML parts again at the maximum level. Defaults to False.
+            drop_thumbnail (bool, optional): remove `docProps/thumbnail.*`. Defaults to False.
+            deterministic (bool, optional): write a reproducible document. Defaults to False.
+            overwrite (bool, optional): replace the file at `outfile` atomically, it's ignored for streams. Defaults to False.
+            keep_times (bool, optional): with `overwrite`, keep the times of the replaced file. Defaults to False.
+
+        Raises:
+            IOError: throws when input and output file path/buffer are the same, unless `overwrite` is set for a file path
+            ValueError: throws when more than one of `compresslevel`, `policy` and `optimize` are given
+        """
+        if not _is_async_writer(outfile):
+            await self._run(self._doc.save, outfile, compresslevel, workers, policy, optimize, drop_thumbnail, deterministic, overwrite, keep_times)
+            return
+
+        chunks=self._doc.iter_bytes(compresslevel, workers, policy, optimize, drop_thumbnail, deterministic)
+        try:
+            while (chunk := await self._run(next, chunks, None)) is not None:
+                res=outfile.write(chunk)
+                if inspect.isawaitable(res):
+                    await res
+                elif hasattr(outfile, "drain"):
+                    await outfile.drain() # type: ignore
+        finally:
+            # releases the reader of document (and the compression workers) when the stream fails
+            await self._run(chunks.close)
+
+    async def update(self, fallback: bool=True, keep_times: bool=False) -> None:
+        """
+        Save the changes into the opened document itself. See `nometa.Document.update`.
+        """
+        await self._run(self._doc.update, fallback, keep_times)
+
+    async def close(self) -> None:
+        """
+        Release the document and the buffer of an input stream.
+        """
+        self._doc.close()
+        if self._spool is not None:
+            self._spool.close()
+            self._spool=None
+
+
+__all__ = ["SPOOL_SIZE", "AsyncWriter", "AsyncDocument"]
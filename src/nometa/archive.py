@@ -0,0 +1,720 @@
+"""
+This module contains the low-level routines used to write the members of an OOXML package (zip archive).
+The members that aren't touched by NoMETA are moved between archives as raw compressed data, without inflating and deflating them again.
+"""
+
+import os
+import mmap
+import time
+import zlib
+import secrets
+import stat
+from copy import copy
+from struct import Struct
+from typing import IO, Callable, Iterable, Iterator
+from zipfile import is_zipfile, ZipFile, ZipInfo, BadZipFile, ZIP64_LIMIT, ZIP_STORED, ZIP_DEFLATED
+from nometa.compression import CompressionPolicy, SNIFF_SIZE
+
+SHEET_NAMES=("docProps/core.xml", "docProps/app.xml")
+CHUNK_SIZE=1 << 20
+"""Size of buffer used to copy the members (1 MiB). It bounds the memory used by a copy, whatever the member size."""
+STREAM_SIZE=8*CHUNK_SIZE
+"""Members bigger than this (8 MiB), compressed or not, are compressed again as a stream instead of being loaded whole"""
+FIXED_DATE_TIME=(1980, 1, 1, 0, 0, 0)
+"""Timestamp of all members of deterministic archives, the earliest one a zip archive can hold"""
+
+_LOCAL_HEADER=Struct("<4s2B4HL2L2H")
+_LOCAL_SIGNATURE=b"PK\003\004"
+_DATA_DESCRIPTOR_FLAG=0x08
+_ENCRYPTED_FLAG=0x01
+_DEFLATE_OPTION_FLAGS=0x06
+_ZIP64_EXTRA_ID=0x0001
+# NTFS times, PKWARE Unix, extended timestamp, Info-ZIP Unix (old and new), Info-ZIP Unix uid/gid
+_VOLATILE_EXTRA_IDS=(0x000a, 0x000d, 0x5455, 0x5855, 0x7855, 0x7875)
+_DEFAULT_VERSION=20
+_JOURNAL_SUFFIX=".nometa-journal"
+_JOURNAL_MAGIC=b"NMJ1"
+_JOURNAL_HEADER=Struct("<4sQ")
+_JOURNAL_REGION=Struct("<QQ")
+
+
+def _strip_extra(extra: bytes, ids: tuple[int, ...]=(_ZIP64_EXTRA_ID,)) -> bytes:
+    """
+    Remove the extra fields whose id is in `ids`, by default the zip64 one: `ZipInfo.FileHeader` and `ZipFile` write a fresh one
+    when it's needed.
+    """
+    out=bytearray()
+    i=0
+    while i+4 <= len(extra):
+        xid=int.from_bytes(extra[i:i+2], "little")
+        xlen=int.from_bytes(extra[i+2:i+4], "little")
+        if xid not in ids:
+            out+=extra[i:i+4+xlen]
+        i+=4+xlen
+
+    return bytes(out)
+
+def _data_offset(zin: ZipFile, zinfo: ZipInfo) -> int:
+    """
+    Get the offset of the first byte of compressed data of a member, skipping its local file header.
+
+    Raises:
+        BadZipFile: throws when the local file header is corrupted
+    """
+    zin.fp.seek(zinfo.header_offset) # type: ignore
+    header=zin.fp.read(_LOCAL_HEADER.size) # type: ignore
+    if len(header) != _LOCAL_HEADER.size:
+        raise BadZipFile("Truncated local header of '%s'"%zinfo.filename)
+
+    fields=_LOCAL_HEADER.unpack(header)
+    if fields[0] != _LOCAL_SIGNATURE:
+        raise BadZipFile("Bad local header signature of '%s'"%zinfo.filename)
+
+    return zinfo.header_offset+_LOCAL_HEADER.size+fields[10]+fields[11]
+
+def _read_chunks(fp: IO[bytes], offset: int, size: int, name: str) -> Iterator[bytes]:
+    """
+    Read `size` bytes of `fp`, starting at `offset`, in chunks of at most `CHUNK_SIZE` bytes.
+    It seeks before each read, so `fp` can be used by someone else while the iteration is suspended.
+    When `fp` is memory-mapped, the chunks are memoryviews of the mapping, so they are neither read nor copied.
+    """
+    if isinstance(fp, mmap.mmap):
+        if offset+size > len(fp):
+            raise BadZipFile("Truncated data of '%s'"%name)
+        for start in range(offset, offset+size, CHUNK_SIZE):
+            yield memoryview(fp)[start:min(start+CHUNK_SIZE, offset+size)] # type: ignore
+        return
+
+    while size > 0:
+        fp.seek(offset)
+        chunk=fp.read(min(CHUNK_SIZE, size))
+        if not chunk:
+            raise BadZipFile("Truncated data of '%s'"%name)
+        size-=len(chunk)
+        offset+=len(chunk)
+        yield chunk
+
+def _copy_info(zinfo: ZipInfo) -> ZipInfo:
+    info=copy(zinfo)
+    info.flag_bits&=~_DATA_DESCRIPTOR_FLAG
+    info.extra=_strip_extra(zinfo.extra)
+    return info
+
+def _raw_member(zin: ZipFile, zinfo: ZipInfo) -> tuple[ZipInfo, Iterator[bytes]]:
+    """
+    Get the member information to write in another archive and an iterator over its compressed data.
+    """
+    offset=_data_offset(zin, zinfo)
+    return _copy_info(zinfo), _read_chunks(zin.fp, offset, zinfo.compress_size, zinfo.filename) # type: ignore
+
+def copy_raw(zin: ZipFile, zout: ZipFile, zinfo: ZipInfo) -> ZipInfo:
+    """
+    Copy a member from `zin` to `zout` as raw compressed data. CRC, sizes and compression method are kept.
+
+    The data is streamed in chunks of `CHUNK_SIZE` bytes, so the memory used by a copy doesn't depend on the member size.
+
+    Args:
+        zin (ZipFile): the source archive opened for reading
+        zout (ZipFile): the target archive opened for writing
+        zinfo (ZipInfo): the member of `zin` to copy
+
+    Returns:
+        ZipInfo: the member information as written in `zout`
+    """
+    info, chunks=_raw_member(zin, zinfo)
+    _append_raw(zout, info, chunks)
+    return info
+
+def _iter_append(zout: ZipFile, info: ZipInfo, chunks: Iterable[bytes]) -> Iterator[None]:
+    """
+    Write the local header and the compressed `chunks` of a member at the end of `zout` and register it in the central directory.
+    It suspends after each write. Sizes and CRC are known in advance, so no data descriptor is needed, even if `zout` isn't seekable.
+    """
+    zip64=info.file_size > ZIP64_LIMIT or info.compress_size > ZIP64_LIMIT
+    zout._writecheck(info) # type: ignore
+    if zout._seekable: # type: ignore
+        zout.fp.seek(zout.start_dir) # type: ignore
+    info.header_offset=zout.fp.tell() # type: ignore
+    zout.fp.write(info.FileHeader(zip64)) # type: ignore
+    yield
+    for chunk in chunks:
+        zout.fp.write(chunk) # type: ignore
+        yield
+    zout.start_dir=zout.fp.tell() # type: ignore
+    zout._didModify=True # type: ignore
+    zout.filelist.append(info)
+    zout.NameToInfo[info.filename]=info
+
+def _append_raw(zout: ZipFile, info: ZipInfo, chunks: Iterable[bytes]) -> None:
+    for _ in _iter_append(zout, info, chunks): pass
+
+def _new_info(name: str) -> ZipInfo:
+    info=ZipInfo(name, date_time=time.localtime(time.time())[:6])
+    info.external_attr=0o600 << 16
+    return info
+
+def _normalize(info: ZipInfo) -> ZipInfo:
+    """
+    Clear what a member inherits from the machine and the time it was written by: timestamps (header and extra fields),
+    system and attributes of file. The name, the content and how it's compressed are left as they are.
+    """
+    info.date_time=FIXED_DATE_TIME
+    info.extra=_strip_extra(info.extra, _VOLATILE_EXTRA_IDS)
+    info.flag_bits&=_ENCRYPTED_FLAG|_DEFLATE_OPTION_FLAGS
+    info.create_system=0
+    info.external_attr=info.internal_attr=info.volume=info.reserved=0
+    if _is_raw_readable(info):
+        info.create_version=info.extract_version=_DEFAULT_VERSION
+    return info
+
+def _compress(info: ZipInfo, data: bytes, level: int) -> tuple[ZipInfo, bytes]:
+    compressor=zlib.compressobj(level, zlib.DEFLATED, -15)
+    raw=compressor.compress(data)+compressor.flush()
+    info.compress_type=ZIP_DEFLATED
+    info.flag_bits&=~_DEFLATE_OPTION_FLAGS
+    info.file_size=len(data)
+    info.compress_size=len(raw)
+    info.CRC=zlib.crc32(data)
+    return info, raw
+
+def deflate(name: str, data: bytes, level: int=zlib.Z_DEFAULT_COMPRESSION) -> tuple[ZipInfo, bytes]:
+    """
+    Compress a new member the same way `ZipFile.writestr` does, but without writing it.
+
+    Args:
+        name (str): the member name
+        data (bytes): the uncompressed content
+        level (int, optional): the deflate level, from 0 to 9. Defaults to `zlib.Z_DEFAULT_COMPRESSION`.
+
+    Returns:
+        tuple[ZipInfo, bytes]: the member information and its compressed content
+    """
+    return _compress(_new_info(name), data, level)
+
+def _store(info: ZipInfo, data: bytes) -> tuple[ZipInfo, bytes]:
+    info.compress_type=ZIP_STORED
+    info.flag_bits&=~_DEFLATE_OPTION_FLAGS
+    info.file_size=info.compress_size=len(data)
+    info.CRC=zlib.crc32(data)
+    return info, data
+
+def _is_raw_readable(zinfo: ZipInfo) -> bool:
+    return zinfo.compress_type in (ZIP_STORED, ZIP_DEFLATED) and not zinfo.flag_bits & _ENCRYPTED_FLAG
+
+def _head(zin: ZipFile, zinfo: ZipInfo) -> bytes:
+    """
+    Get the first `SNIFF_SIZE` bytes of the content of a member, reading as little as possible.
+    """
+    if not _is_raw_readable(zinfo):
+        with zin.open(zinfo) as fd:
+            return fd.read(SNIFF_SIZE)
+
+    size=SNIFF_SIZE if zinfo.compress_type == ZIP_STORED else 1024
+    zin.fp.seek(_data_offset(zin, zinfo)) # type: ignore
+    raw=zin.fp.read(min(size, zinfo.compress_size)) # type: ignore
+    if zinfo.compress_type == ZIP_STORED:
+        return raw
+
+    try:
+        return zlib.decompressobj(-15).decompress(raw, SNIFF_SIZE)
+    except zlib.error:
+        return b''
+
+_Job=tuple[ZipInfo, bytes, bool, int, int, bool]
+
+def _load(zin: ZipFile, zinfo: ZipInfo, target: tuple[int, int], smallest: bool) -> _Job:
+    """
+    Read a member to compress again. Stored and deflated members are read as raw data, to be inflated by `_recompress`.
+    """
+    info, chunks=_raw_member(zin, zinfo)
+    if _is_raw_readable(zinfo):
+        return info, b''.join(chunks), True, *target, smallest
+
+    return info, zin.read(zinfo), False, *target, False
+
+def _recompress(job: _Job) -> tuple[ZipInfo, bytes]:
+    """
+    Inflate, when it's needed, and store or deflate a member loaded by `_load`. It only calls zlib, which releases the GIL.
+    When `smallest` is set, the raw data is kept if it's smaller than the new one.
+
+    Raises:
+        BadZipFile: throws when the member is corrupted
+    """
+    info, data, compressed, method, level, smallest=job
+    original=(copy(info), data) if smallest else None
+    if compressed:
+        if info.compress_type == ZIP_DEFLATED:
+            try:
+                data=zlib.decompress(data, -15)
+            except zlib.error as e:
+                raise BadZipFile("Bad compressed data of '%s': %s"%(info.filename, e))
+        if zlib.crc32(data) != info.CRC:
+            raise BadZipFile("Bad CRC-32 for file '%s'"%info.filename)
+
+    out=_store(info, data) if method == ZIP_STORED else _compress(info, data, level)
+    if original is not None and len(original[1]) <= len(out[1]):
+        return original
+
+    return out
+
+def _is_large(zinfo: ZipInfo) -> bool:
+    return max(zinfo.file_size, zinfo.compress_size) > STREAM_SIZE
+
+def _inflate_chunks(zin: ZipFile, zinfo: ZipInfo) -> Iterator[bytes]:
+    """
+    Read the content of a member in chunks of at most `CHUNK_SIZE` bytes, checking its CRC at the end.
+
+    Raises:
+        BadZipFile: throws when the member is corrupted
+    """
+    if not _is_raw_readable(zinfo):
+        with zin.open(zinfo) as fd:
+            while chunk := fd.read(CHUNK_SIZE):
+                yield chunk
+        return
+
+    _, chunks=_raw_member(zin, zinfo)
+    inflater=zlib.decompressobj(-15) if zinfo.compress_type == ZIP_DEFLATED else None
+
+    def pieces() -> Iterator[bytes]:
+        for chunk in chunks:
+            if inflater is None:
+                yield chunk
+                continue
+            # the output is bounded, what doesn't fit yet is kept in `unconsumed_tail`
+            yield inflater.decompress(chunk, CHUNK_SIZE)
+            while inflater.unconsumed_tail:
+                yield inflater.decompress(inflater.unconsumed_tail, CHUNK_SIZE)
+        if inflater is not None:
+            yield inflater.flush()
+
+    crc=size=0
+    try:
+        for data in pieces():
+            crc=zlib.crc32(data, crc)
+            size+=len(data)
+            if data: yield data
+    except zlib.error as e:
+        raise BadZipFile("Bad compressed data of '%s': %s"%(zinfo.filename, e))
+
+    if crc != zinfo.CRC or size != zinfo.file_size:
+        raise BadZipFile("Bad CRC-32 for file '%s'"%zinfo.filename)
+
+def _recompress_stream(zin: ZipFile, zinfo: ZipInfo, target: tuple[int, int], smallest: bool) -> tuple[ZipInfo, IO[bytes]] | None:
+    """
+    Store or deflate a member again chunk by chunk, the output is spooled to a temporary file,
+    because the compressed size has to be known before writing the local header.
+    It returns `None` when `smallest` is set and the original data isn't bigger than the new one, so it's copied as raw data.
+
+    Raises:
+        BadZipFile: throws when the member is corrupted
+    """
+    # tempfile is imported on first use, only big members need it
+    from tempfile import TemporaryFile
+    method, level=target
+    deflater=zlib.compressobj(level, zlib.DEFLATED, -15) if method == ZIP_DEFLATED else None
+    spool=TemporaryFile()
+    try:
+        for data in _inflate_chunks(zin, zinfo):
+            spool.write(deflater.compress(data) if deflater is not None else data)
+        if deflater is not None:
+            spool.write(deflater.flush())
+    except BaseException:
+        spool.close()
+        raise
+
+    if smallest and _is_raw_readable(zinfo) and zinfo.compress_size <= spool.tell():
+        spool.close()
+        return None
+
+    info=_copy_info(zinfo)
+    info.compress_type=method
+    info.flag_bits&=~(_DEFLATE_OPTION_FLAGS|_ENCRYPTED_FLAG)
+    info.compress_size=spool.tell()
+    spool.seek(0)
+    return info, spool # type: ignore
+
+def _encode(jobs: Iterator[_Job], workers: int | None) -> Iterator[tuple[ZipInfo, bytes]]:
+    if workers == 1:
+        return (_recompress(it) for it in jobs)
+
+    # the pool is imported on first use, it pulls in concurrent.futures
+    from nometa.pool import imap_ordered
+    return imap_ordered(_recompress, jobs, workers)
+
+def copy_archive(zin: ZipFile, zout: ZipFile, skip: tuple[str, ...]=SHEET_NAMES) -> None:
+    """
+    Copy the comment and all members of `zin` to `zout`, except the ones listed in `skip`.
+
+    Args:
+        zin (ZipFile): the source archive opened for reading
+        zout (ZipFile): the target archive opened for writing
+        skip (tuple[str, ...], optional): names of members that will be written by the caller. Defaults to `SHEET_NAMES`.
+    """
+    zout.comment=zin.comment
+    for it in zin.infolist():
+        if it.filename in skip: continue
+        copy_raw(zin, zout, it)
+
+def write_archive(
+    zin: ZipFile,
+    zout: ZipFile,
+    members: dict[str, bytes],
+    compresslevel: int | None=None,
+    workers: int | None=1,
+    policy: CompressionPolicy | None=None,
+    skip: Iterable[str]=(),
+    deterministic: bool=False
+) -> Iterator[None]:
+    """
+    Write the comment and all members of `zin` into `zout`, except the ones in `skip`, replacing the ones in `members`,
+    which are written at the end.
+
+    It's a generator that suspends after each chunk written, so the caller can forward the output of a non-seekable `zout` progressively.
+
+    By default, the members of `zin` are copied as raw compressed data and the new contents keep the method of members they replace.
+    A `policy` (or `compresslevel`) may store or deflate some members again. Those members are read by the calling thread
+    and compressed by `workers` threads, at most two members per worker in flight, then written in their original order.
+    The members bigger than `STREAM_SIZE` are compressed as a stream by the calling thread instead, so the memory used stays bounded
+    whatever the member size.
+
+    When `deterministic` is set, the output only depends on the names and data of members of `zin`, its comment and `members`:
+    the members are dated `FIXED_DATE_TIME`, their volatile extra fields (timestamps, owners) and file attributes are cleared,
+    and the new members are written sorted by name. So saving the same document with the same changes gives the same bytes.
+
+    Args:
+        zin (ZipFile): the source archive opened for reading
+        zout (ZipFile): the target archive opened for writing, it may be a non-seekable stream
+        members (dict[str, bytes]): member name and its new uncompressed content
+        compresslevel (int | None, optional): the deflate level, from 0 to 9, to compress all members again.
+            It's a shortcut for ``CompressionPolicy(default=compresslevel, store=(), sniff=False)``. Defaults to None.
+        workers (int | None, optional): number of threads compressing the members, `None` means the number of CPUs.
+            Defaults to 1, the members are compressed by the calling thread.
+        policy (CompressionPolicy | None, optional): how each member is compressed, see `nometa.compression`. Defaults to None.
+        skip (Iterable[str], optional): names of members that aren't written. Defaults to ().
+        deterministic (bool, optional): write a reproducible archive. Defaults to False.
+
+    Raises:
+        ValueError: throws when both `compresslevel` and `policy` are given
+
+    Yields:
+        Iterator[None]: nothing, it's suspended after each chunk written
+    """
+    if compresslevel is not None:
+        if policy is not None:
+            raise ValueError("``compresslevel`` and ``policy`` can't be used together")
+        policy=CompressionPolicy(default=compresslevel, store=(), sniff=False)
+
+    zout.comment=zin.comment
+    skip=set(skip)
+    plan: list[tuple[ZipInfo, tuple[int, int] | None]]=[]
+    for it in zin.infolist():
+        if it.filename in members or it.filename in skip: continue
+        target=policy.decide(it, lambda it=it: _head(zin, it)) if policy is not None else None # type: ignore
+        if target is not None and target[0] == ZIP_STORED and it.compress_type == ZIP_STORED:
+            target=None
+        plan.append((it, target))
+
+    news: list[tuple[ZipInfo, bytes, tuple[int, int]]]=[]
+    for name, data in members.items():
+        old=zin.NameToInfo.get(name)
+        info=_new_info(name)
+        target=policy.decide(old or info, lambda data=data: data[:SNIFF_SIZE]) if policy is not None else None # type: ignore
+        if target is None:
+            target=(ZIP_STORED, 0) if old is not None and old.compress_type == ZIP_STORED else (ZIP_DEFLATED, zlib.Z_DEFAULT_COMPRESSION)
+        news.append((info, data, target))
+    if deterministic:
+        news.sort(key=lambda it: it[0].filename)
+    fix=_normalize if deterministic else lambda info: info
+
+    def jobs() -> Iterator[_Job]:
+        for it, target in plan:
+            if target is not None and not _is_large(it):
+                yield _load(zin, it, target, policy.smallest) # type: ignore
+        for info, data, target in news:
+            yield info, data, False, *target, False
+
+    encoded=_encode(jobs(), workers)
+    try:
+        for it, target in plan:
+            if target is None:
+                info, chunks=_raw_member(zin, it)
+                yield from _iter_append(zout, fix(info), chunks)
+            elif _is_large(it):
+                streamed=_recompress_stream(zin, it, target, policy.smallest) # type: ignore
+                if streamed is None:
+                    info, chunks=_raw_member(zin, it)
+                    yield from _iter_append(zout, fix(info), chunks)
+                    continue
+                info, spool=streamed
+                with spool:
+                    yield from _iter_append(zout, fix(info), iter(lambda: spool.read(CHUNK_SIZE), b''))
+            else:
+                info, raw=next(encoded) # type: ignore
+                yield from _iter_append(zout, fix(info), (raw,))
+
+        for info, raw in encoded:
+            yield from _iter_append(zout, fix(info), (raw,))
+    finally:
+        encoded.close() # type: ignore
+
+class _ChunkSink:
+    """
+    A non-seekable output that keeps the written bytes until they are taken by `take`.
+    """
+    def __init__(self) -> None:
+        self._chunks: list[bytes]=[]
+        self._pos=0
+        self.pending=0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._pos+=len(data)
+        self.pending+=len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data=b''.join(self._chunks)
+        self._chunks.clear()
+        self.pending=0
+        return data
+
+def iter_archive(
+    zin: ZipFile,
+    members: dict[str, bytes],
+    compresslevel: int | None=None,
+    workers: int | None=1,
+    policy: CompressionPolicy | None=None,
+    skip: Iterable[str]=(),
+    deterministic: bool=False
+) -> Iterator[bytes]:
+    """
+    Like `write_archive`, but the output archive is yielded as chunks of about `CHUNK_SIZE` bytes.
+
+    Args:
+        zin (ZipFile): the source archive opened for reading
+        members (dict[str, bytes]): member name and its new uncompressed content
+        compresslevel (int | None, optional): see `write_archive`. Defaults to None.
+        workers (int | None, optional): see `write_archive`. Defaults to 1.
+        policy (CompressionPolicy | None, optional): see `write_archive`. Defaults to None.
+        skip (Iterable[str], optional): see `write_archive`. Defaults to ().
+        deterministic (bool, optional): see `write_archive`. Defaults to False.
+
+    Yields:
+        Iterator[bytes]: the output archive in chunks
+    """
+    sink=_ChunkSink()
+    zout=ZipFile(sink, 'w') # type: ignore
+    for _ in write_archive(zin, zout, members, compresslevel, workers, policy, skip, deterministic):
+        if sink.pending >= CHUNK_SIZE:
+            yield sink.take()
+
+    zout.close()
+    yield sink.take()
+
+def _fsync_dir(path: str) -> None:
+    if os.name != "posix": return
+    fd=os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _write_journal(path: str, length: int, regions: list[tuple[int, bytes]]) -> None:
+    body=bytearray(_JOURNAL_HEADER.pack(_JOURNAL_MAGIC, length))
+    for offset, data in regions:
+        body+=_JOURNAL_REGION.pack(offset, len(data))+data
+
+    body+=zlib.crc32(body).to_bytes(4, "little")
+    with open(path+_JOURNAL_SUFFIX, "xb") as fd:
+        fd.write(body)
+        fd.flush()
+        os.fsync(fd.fileno())
+
+    _fsync_dir(path)
+
+def _remove_journal(path: str) -> None:
+    os.remove(path+_JOURNAL_SUFFIX)
+    _fsync_dir(path)
+
+def recover(path: str) -> bool:
+    """
+    Roll back an in-place update of `path` that was interrupted (eg. by a crash or power loss).
+
+    The update journal is removed afterwards. A journal that wasn't completely written means that the document wasn't touched yet.
+
+    Args:
+        path (str): file path of the document
+
+    Returns:
+        bool: `True` if the document has been restored from its journal, otherwise `False`
+    """
+    try:
+        with open(path+_JOURNAL_SUFFIX, "rb") as fd:
+            body=fd.read()
+    except FileNotFoundError:
+        return False
+
+    complete=len(body) >= _JOURNAL_HEADER.size+4 and zlib.crc32(body[:-4]) == int.from_bytes(body[-4:], "little")
+    if complete:
+        magic, length=_JOURNAL_HEADER.unpack_from(body)
+        if magic != _JOURNAL_MAGIC:
+            raise ValueError("'%s' is not a NoMETA journal"%(path+_JOURNAL_SUFFIX))
+
+        with open(path, "r+b") as fd:
+            i=_JOURNAL_HEADER.size
+            while i < len(body)-4:
+                offset, size=_JOURNAL_REGION.unpack_from(body, i)
+                i+=_JOURNAL_REGION.size
+                fd.seek(offset)
+                fd.write(body[i:i+size])
+                i+=size
+            fd.truncate(length)
+            fd.flush()
+            os.fsync(fd.fileno())
+
+    _remove_journal(path)
+    return complete
+
+def update_inplace(path: str, members: dict[str, bytes]) -> bool:
+    """
+    Replace some members of the document at `path` without rewriting the rest of it.
+
+    A new member overwrites the old one if it fits in its place, otherwise it's appended after the last member.
+    Then only the central directory is written again, so it writes O(metadata) bytes instead of O(document).
+    The overwritten bytes are saved into a journal (`<path>.nometa-journal`) before any change, see `recover`.
+
+    Args:
+        path (str): file path of the document
+        members (dict[str, bytes]): member name and its new uncompressed content
+
+    Returns:
+        bool: `False` when the document can't be opened for update or the journal can't be created, then nothing has been written. `True` without opening it when `members` is empty
+    """
+    recover(path)
+    if not members:
+        return True
+
+    try:
+        fd=open(path, "r+b")
+    except OSError:
+        return False
+
+    with fd:
+        if not is_zipfile(fd):
+            raise BadZipFile("'%s' is not a zip file"%path)
+
+        zf=ZipFile(fd, 'a')
+        infos=zf.infolist()
+        ends=sorted(it.header_offset for it in infos)+[zf.start_dir] # type: ignore
+        plan: list[tuple[ZipInfo|None, ZipInfo, bytes, int|None]]=[]
+        for name, data in members.items():
+            old=zf.NameToInfo.get(name)
+            info, raw=deflate(name, data)
+            slot=None
+            if old is not None:
+                end=next(e for e in ends if e > old.header_offset)
+                if len(info.FileHeader(False))+len(raw) <= end-old.header_offset:
+                    slot=old.header_offset
+            plan.append((old, info, raw, slot))
+
+        fd.seek(0, os.SEEK_END)
+        regions: list[tuple[int, bytes]]=[]
+        length=fd.tell()
+        for _, info, raw, slot in plan:
+            if slot is None: continue
+            fd.seek(slot)
+            regions.append((slot, fd.read(len(info.FileHeader(False))+len(raw))))
+        fd.seek(zf.start_dir) # type: ignore
+        regions.append((zf.start_dir, fd.read())) # type: ignore
+
+        try:
+            _write_journal(path, length, regions)
+        except OSError:
+            zf.close()
+            return False
+
+        try:
+            for old, info, raw, slot in plan:
+                if old is not None:
+                    del zf.NameToInfo[old.filename]
+                if slot is None:
+                    if old is not None:
+                        zf.filelist.remove(old)
+                    _append_raw(zf, info, (raw,))
+                    continue
+
+                fd.seek(slot)
+                fd.write(info.FileHeader(False))
+                fd.write(raw)
+                info.header_offset=slot
+                zf.filelist[zf.filelist.index(old)]=info # type: ignore
+                zf.NameToInfo[info.filename]=info
+                zf._didModify=True # type: ignore
+            zf.close()
+            fd.flush()
+            os.fsync(fd.fileno())
+        except BaseException:
+            zf._didModify=False # type: ignore
+            zf.close()
+            fd.close()
+            recover(path)
+            raise
+
+    _remove_journal(path)
+    return True
+
+def _create_temp(path: str) -> tuple[int, str]:
+    """
+    Create a new temporary file in the directory of `path`, with the permissions a new file gets (0o666 less the umask).
+    """
+    directory=os.path.dirname(os.path.abspath(path))
+    while True:
+        tmp=os.path.join(directory, ".nometa-%s.tmp"%secrets.token_hex(8))
+        try:
+            return os.open(tmp, os.O_WRONLY|os.O_CREAT|os.O_EXCL|getattr(os, "O_BINARY", 0), 0o666), tmp
+        except FileExistsError:
+            continue
+
+def replace_atomic(path: str, write: Callable[[IO[bytes]], None], keep_times: bool=False) -> None:
+    """
+    Replace the file at `path` atomically. The new content is written by `write` into a temporary file, in the same directory of `path`,
+    which is flushed to disk and renamed over `path`. So the content is written once, and `path` is either the old or the new file,
+    even if the process is interrupted.
+
+    The new file gets the permissions of the replaced one, its owner is the current user.
+
+    Args:
+        path (str): the file path to replace, it may not exist yet
+        write (Callable[[IO[bytes]], None]): writes the new content into the given file object
+        keep_times (bool, optional): give the new file the access and modification times of the replaced one. Defaults to False.
+    """
+    try:
+        st: os.stat_result | None=os.stat(path)
+    except FileNotFoundError:
+        st=None
+
+    fd, tmp=_create_temp(path)
+    try:
+        with os.fdopen(fd, "wb") as fw:
+            write(fw)
+            fw.flush()
+            if st is not None:
+                os.chmod(tmp, stat.S_IMODE(st.st_mode))
+                if keep_times: os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+            os.fsync(fw.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+    _fsync_dir(path)
+
+
+__all__ = ["SHEET_NAMES", "CHUNK_SIZE", "STREAM_SIZE", "FIXED_DATE_TIME", "copy_raw", "copy_archive", "write_archive", "iter_archive", "deflate", "recover", "update_inplace", "replace_atomic"]
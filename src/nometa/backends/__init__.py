@@ -0,0 +1,176 @@
+"""
+This subpackage deals with the XML libraries used to parse and write the sheets.
+
+A backend parses a sheet into a tree of elements and serializes it back. The elements of every backend have the subset of
+`lxml.etree._Element` API described by `Element`, which is all that `nometa.sheet` and `nometa.properties` use.
+There are two backends: "lxml", the default when lxml is installed, and "expat", which depends only on the standard library.
+A backend is imported only when it's used for the first time.
+"""
+
+import re
+import sys
+from abc import ABC, abstractmethod
+from importlib import import_module
+from importlib.util import find_spec
+from typing import Any, Iterator, Protocol
+
+_MODULES: dict[str, tuple[str, str]]={
+    "lxml": ("nometa.backends.lxml_backend", "lxml.etree"),
+    "expat": ("nometa.backends.expat_backend", "pyexpat"),
+}
+"""Backend name mapped to its module and the module of XML library it wraps"""
+_NOT_XML_CHAR=re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+
+class Element(Protocol):
+    """
+    The element API used by NoMETA, a subset of `lxml.etree._Element`.
+    """
+    tag: Any
+    text: str|None
+    tail: str|None
+
+    @property
+    def prefix(self) -> str|None: ...
+
+    @property
+    def nsmap(self) -> dict[str|None, str]: ...
+
+    def find(self, path: str, namespaces: dict[str|None, str]|None=None) -> "Element|None": ...
+
+    def makeelement(self, tag: str, attrib: dict[str, str]|None=None) -> "Element": ...
+
+    def append(self, element: "Element") -> None: ...
+
+    def __iter__(self) -> Iterator["Element"]: ...
+
+    def __reversed__(self) -> Iterator["Element"]: ...
+
+    def __len__(self) -> int: ...
+
+    def __getitem__(self, index: int) -> "Element": ...
+
+
+class Backend(ABC):
+    """
+    Abstract class of XML backends
+    """
+    name: str=''
+    """the name of backend, eg. "lxml" """
+
+    @abstractmethod
+    def parse(self, raw: bytes) -> Element:
+        """
+        Parse a sheet. The whitespace between elements is dropped and external entities aren't resolved.
+
+        Args:
+            raw (bytes): the sheet as binary
+
+        Returns:
+            Element: the root element
+        """
+        pass
+
+    @abstractmethod
+    def tostring(self, root: Element) -> bytes:
+        """
+        Serialize a tree made by this backend, without XML declaration.
+
+        Args:
+            root (Element): the root element
+
+        Returns:
+            bytes: the tree as binary
+        """
+        pass
+
+    @abstractmethod
+    def is_element(self, obj: Any) -> bool:
+        """
+        Tell whether `obj` is an element (not a comment or processing instruction) of this backend.
+        """
+        pass
+
+
+def escape(text: str, entities: dict[str, str]|None=None) -> str:
+    """
+    Escape '&', '<' and '>' of `text`, and the keys of `entities` with their values.
+    It's like `xml.sax.saxutils.escape`, which would import `urllib` and `http` too.
+    """
+    text=text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    if entities:
+        for key, val in entities.items():
+            text=text.replace(key, val)
+    return text
+
+def check_text(text: str) -> str:
+    """
+    Make sure `text` has only characters allowed in XML, like lxml does when a text is set.
+
+    Raises:
+        ValueError: throws when `text` has NULL bytes, control characters other than tab, newline and carriage return, or surrogates
+
+    Returns:
+        str: `text` itself
+    """
+    if _NOT_XML_CHAR.search(text):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters")
+    return text
+
+
+_backends: dict[str, Backend]={}
+_default: str|None=None
+
+def get_backend(name: str|None=None) -> Backend:
+    """
+    Get a backend, importing it on first use.
+
+    Args:
+        name (str | None, optional): "lxml" or "expat". Defaults to the default backend, see `set_default_backend`.
+
+    Raises:
+        ValueError: throws when the name is unknown
+        ImportError: throws when the XML library of backend isn't installed
+
+    Returns:
+        Backend: the backend
+    """
+    if name is None:
+        name=_default or ("lxml" if find_spec("lxml") is not None else "expat")
+
+    backend=_backends.get(name)
+    if backend is None:
+        if name not in _MODULES:
+            raise ValueError("unknown XML backend '%s'"%name)
+        backend=_backends[name]=import_module(_MODULES[name][0]).BACKEND
+
+    return backend
+
+def set_default_backend(name: str|None) -> None:
+    """
+    Set the backend used by the sheets that don't choose one (see `nometa.sheet.Sheet.BACKEND`).
+
+    Args:
+        name (str | None): "lxml" or "expat". `None` restores the default: "lxml" if it's installed, otherwise "expat".
+
+    Raises:
+        ValueError: throws when the name is unknown
+        ImportError: throws when the XML library of backend isn't installed
+    """
+    global _default
+    if name is not None:
+        get_backend(name)
+    _default=name
+
+def is_element(obj: Any) -> bool:
+    """
+    Tell whether `obj` is an element of any backend. The XML libraries that weren't imported yet can't have made it.
+    """
+    for name, (_, library) in _MODULES.items():
+        if (name in _backends or library in sys.modules) and get_backend(name).is_element(obj):
+            return True
+
+    return False
+
+
+__all__ = ["Element", "Backend", "escape", "check_text", "get_backend", "set_default_backend", "is_element"]
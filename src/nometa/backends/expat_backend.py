@@ -0,0 +1,284 @@
+"""
+The expat backend, it depends only on the standard library.
+
+It builds a light tree of `Element` objects that keeps the namespace declarations and prefixes of the sheet,
+so the sheet is written back with the same prefixes, like lxml does.
+"""
+
+from typing import Any, Iterator
+from xml.parsers import expat
+from nometa.backends import Backend, escape, check_text
+
+
+def Comment(text: str|None=None) -> "Element":
+    """
+    Create a comment, its `tag` is this function (like in lxml).
+    """
+    elem=Element(Comment)
+    elem.text=text
+    return elem
+
+def ProcessingInstruction(target: str, data: str|None=None) -> "Element":
+    """
+    Create a processing instruction, its `tag` is this function (like in lxml) and its `text` is the target and data.
+    """
+    elem=Element(ProcessingInstruction)
+    elem.text=target+' '+data if data else target
+    return elem
+
+
+class Element:
+    """
+    An XML element with the subset of `lxml.etree._Element` API described by `nometa.backends.Element`.
+    """
+    __slots__=("tag", "text", "tail", "attrib", "_prefix", "_nsdecl", "_attr_qnames", "_parent", "_children")
+
+    def __init__(self, tag: Any, attrib: dict[str, str]|None=None) -> None:
+        """
+        Constructor
+
+        Args:
+            tag (Any): the tag name in Clark notation, eg. `{http://purl.org/dc/elements/1.1/}title`
+            attrib (dict[str, str] | None, optional): the attributes, their names in Clark notation. Defaults to None.
+        """
+        self.tag=tag
+        self.text: str|None=None
+        self.tail: str|None=None
+        self.attrib: dict[str, str]=dict(attrib) if attrib else {}
+        self._prefix: str|None=None
+        self._nsdecl: list[tuple[str|None, str]]=[]
+        self._attr_qnames: dict[str, str]={}
+        self._parent: Element|None=None
+        self._children: list[Element]=[]
+
+    def __repr__(self) -> str:
+        return "<Element %s at %#x>"%(self.tag, id(self))
+
+    @property
+    def prefix(self) -> str|None:
+        """The namespace prefix of element as read from the sheet"""
+        return self._prefix
+
+    @property
+    def nsmap(self) -> dict[str|None, str]:
+        """The namespace prefixes in scope of element, `None` is the default namespace"""
+        chain=[]
+        elem: Element|None=self
+        while elem is not None:
+            chain.append(elem)
+            elem=elem._parent
+
+        out: dict[str|None, str]={}
+        for elem in reversed(chain):
+            out.update(elem._nsdecl)
+        return out
+
+    def find(self, path: str, namespaces: dict[str|None, str]|None=None) -> "Element|None":
+        """
+        Find the first child whose tag is `path`, which is `prefix:tag`, `tag` or `{namespace}tag`.
+
+        Raises:
+            SyntaxError: throws when the prefix isn't in `namespaces`
+        """
+        if path.startswith('{'):
+            tag=path
+        else:
+            prefix, _, local=path.rpartition(':')
+            if prefix:
+                if not namespaces or prefix not in namespaces:
+                    raise SyntaxError("prefix '%s' not found in prefix map"%prefix)
+                tag='{%s}%s'%(namespaces[prefix], local)
+            else:
+                uri=namespaces.get(None) if namespaces else None
+                tag='{%s}%s'%(uri, local) if uri else local
+
+        for child in self._children:
+            if child.tag == tag:
+                return child
+        return None
+
+    def makeelement(self, tag: str, attrib: dict[str, str]|None=None) -> "Element":
+        return Element(tag, attrib)
+
+    def append(self, element: "Element") -> None:
+        element._parent=self
+        self._children.append(element)
+
+    def __iter__(self) -> Iterator["Element"]:
+        return iter(self._children)
+
+    def __reversed__(self) -> Iterator["Element"]:
+        return reversed(self._children)
+
+    def __len__(self) -> int:
+        return len(self._children)
+
+    def __getitem__(self, index: int) -> "Element":
+        return self._children[index]
+
+
+def _split(name: str) -> tuple[str, str|None]:
+    """
+    Split a name reported by expat (`namespace}local}prefix`) into Clark notation and prefix.
+    """
+    parts=name.split('}')
+    if len(parts) == 1:
+        return name, None
+    return '{%s}%s'%(parts[0], parts[1]), parts[2] if len(parts) > 2 else None
+
+def _is_blank(text: str|None) -> bool:
+    return text is not None and not text.strip()
+
+def _parse(raw: bytes) -> Element:
+    stack: list[Element]=[]
+    decls: list[tuple[str|None, str]]=[]
+    roots: list[Element]=[]
+
+    def add_text(data: str) -> None:
+        if not stack:
+            return
+        parent=stack[-1]
+        if parent._children:
+            last=parent._children[-1]
+            last.tail=data if last.tail is None else last.tail+data
+        else:
+            parent.text=data if parent.text is None else parent.text+data
+
+    def add_node(node: Element) -> None:
+        if stack:
+            stack[-1].append(node)
+
+    def start_ns(prefix: str|None, uri: str|None) -> None:
+        decls.append((prefix, uri or ''))
+
+    def start(name: str, attrs: list[str]) -> None:
+        tag, prefix=_split(name)
+        elem=Element(tag)
+        elem._prefix=prefix
+        elem._nsdecl=decls[:]
+        decls.clear()
+        for i in range(0, len(attrs), 2):
+            key, aprefix=_split(attrs[i])
+            elem.attrib[key]=attrs[i+1]
+            if aprefix:
+                elem._attr_qnames[key]=aprefix+':'+key.partition('}')[2]
+
+        if stack:
+            stack[-1].append(elem)
+        else:
+            roots.append(elem)
+        stack.append(elem)
+
+    def end(name: str) -> None:
+        elem=stack.pop()
+        if elem._children:
+            if _is_blank(elem.text): elem.text=None
+            for child in elem._children:
+                if _is_blank(child.tail): child.tail=None
+
+    parser=expat.ParserCreate(namespace_separator='}')
+    parser.namespace_prefixes=True
+    parser.ordered_attributes=True
+    parser.buffer_text=True
+    parser.StartNamespaceDeclHandler=start_ns
+    parser.StartElementHandler=start
+    parser.EndElementHandler=end
+    parser.CharacterDataHandler=add_text
+    parser.CommentHandler=lambda data: add_node(Comment(data))
+    parser.ProcessingInstructionHandler=lambda target, data: add_node(ProcessingInstruction(target, data))
+    try:
+        parser.Parse(raw, True)
+    except expat.ExpatError as e:
+        raise SyntaxError(str(e)) from None
+
+    return roots[0]
+
+
+def _escape_text(text: str) -> str:
+    return escape(check_text(text), {"\r": "&#13;"})
+
+def _escape_attr(text: str) -> str:
+    return escape(check_text(text), {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"})
+
+def _qname(tag: str, prefix: str|None, scope: dict[str|None, str], decls: list[tuple[str|None, str]], attribute: bool=False) -> str:
+    """
+    Get the qualified name of `tag` in `scope`, declaring a new prefix when its namespace isn't in scope.
+    """
+    if not tag.startswith('{'):
+        if not attribute and scope.get(None):
+            decls.append((None, ''))
+            scope[None]=''
+        return tag
+
+    uri, _, local=tag[1:].partition('}')
+    if prefix is not None and scope.get(prefix) == uri:
+        return prefix+':'+local
+    if not attribute and prefix is None and scope.get(None) == uri:
+        return local
+
+    found=next((it for it, val in scope.items() if val == uri and it is not None), None)
+    if found is None:
+        if not attribute and None not in scope:
+            decls.append((None, uri))
+            scope[None]=uri
+            return local
+        i=0
+        while "ns%d"%i in scope: i+=1
+        found="ns%d"%i
+        decls.append((found, uri))
+        scope[found]=uri
+    return found+':'+local
+
+def _write(elem: Element, out: list[str], scope: dict[str|None, str]) -> None:
+    if elem.tag is Comment:
+        out.append("<!--%s-->"%(elem.text or ''))
+    elif elem.tag is ProcessingInstruction:
+        out.append("<?%s?>"%(elem.text or ''))
+    else:
+        scope=dict(scope)
+        decls=list(elem._nsdecl)
+        scope.update(decls)
+        name=_qname(elem.tag, elem._prefix, scope, decls)
+        attrs=[(elem._attr_qnames.get(key) or _qname(key, None, scope, decls, True), val) for key, val in elem.attrib.items()]
+        out.append('<'+name)
+        for prefix, uri in decls:
+            out.append(' xmlns%s="%s"'%(':'+prefix if prefix else '', _escape_attr(uri)))
+        for key, val in attrs:
+            out.append(' %s="%s"'%(key, _escape_attr(val)))
+
+        if elem.text is None and not elem._children:
+            out.append("/>")
+        else:
+            out.append('>')
+            if elem.text is not None:
+                out.append(_escape_text(elem.text))
+            for child in elem._children:
+                _write(child, out, scope)
+            out.append("</%s>"%name)
+
+    if elem.tail is not None:
+        out.append(_escape_text(elem.tail))
+
+
+class ExpatBackend(Backend):
+    """
+    Parse the sheets with expat, from the standard library, into a light tree of `Element` objects.
+    """
+    name="expat"
+
+    def parse(self, raw: bytes) -> Element:
+        return _parse(raw)
+
+    def tostring(self, root: Element) -> bytes: # type: ignore[override]
+        out: list[str]=[]
+        _write(root, out, {}) # type: ignore[arg-type]
+        return ''.join(out).encode("ascii", "xmlcharrefreplace")
+
+    def is_element(self, obj: Any) -> bool:
+        return type(obj) == Element and isinstance(obj.tag, str)
+
+
+BACKEND=ExpatBackend()
+
+
+__all__ = ["Element", "Comment", "ProcessingInstruction", "ExpatBackend", "BACKEND"]
@@ -0,0 +1,44 @@
+"""
+The lxml backend.
+"""
+
+from threading import local
+from typing import Any
+from lxml import etree
+from nometa.backends import Backend, Element
+
+_parsers=local()
+
+def _get_parser() -> etree.XMLParser:
+    """
+    Get the XML parser of the current thread. lxml parsers aren't thread-safe, so each thread builds its own once and reuses it for all sheets.
+    """
+    parser=getattr(_parsers, "parser", None)
+    if parser is None:
+        parser=etree.XMLParser(remove_blank_text=True, resolve_entities=False)
+        parser.set_element_class_lookup(etree.ElementNamespaceClassLookup())
+        _parsers.parser=parser
+
+    return parser
+
+
+class LxmlBackend(Backend):
+    """
+    Parse and write the sheets with lxml.
+    """
+    name="lxml"
+
+    def parse(self, raw: bytes) -> Element:
+        return etree.fromstring(raw, _get_parser())
+
+    def tostring(self, root: Element) -> bytes:
+        return etree.tostring(root)
+
+    def is_element(self, obj: Any) -> bool:
+        return type(obj) == etree._Element
+
+
+BACKEND=LxmlBackend()
+
+
+__all__ = ["LxmlBackend", "BACKEND"]
@@ -0,0 +1,195 @@
+"""
+This module edits the metadata of many documents at once, spreading the work over a pool of processes or threads.
+
+The edits are given as a mapping of `<sheet>.<property>` to value, eg. ``{"core.creator": None, "app.company": "Silverlayer"}``.
+A document whose properties already have the requested values isn't written again, it's reported as `UNCHANGED`,
+unless it's compacted (see `nometa.compact`).
+"""
+
+import os
+import shutil
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Type
+from nometa import Document
+from nometa.sheet import App, Core, Field
+from nometa.pool import imap_chunks
+
+SAVED="saved"
+UNCHANGED="unchanged"
+ERROR="error"
+
+
+class Result(NamedTuple):
+    """
+    The outcome of processing one document.
+    """
+    path: str
+    """the input document"""
+    output: str | None
+    """the output document, it's `None` when the input has been updated in place"""
+    status: str
+    """`SAVED`, `UNCHANGED` or `ERROR`"""
+    error: str | None=None
+    """the error message when `status` is `ERROR`"""
+    bytes_saved: int=0
+    """how much smaller the output is than the input, when the document has been compacted"""
+
+
+def _split_edits(edits: dict[str, Any], cls_core: Type[Core], cls_app: Type[App]) -> list[tuple[str, str, Any]]:
+    """
+    Validate the edits and split their keys into sheet and property names.
+
+    Raises:
+        ValueError: throws when a key doesn't name a property of `cls_core` or `cls_app`
+    """
+    out=[]
+    for key, value in edits.items():
+        sheet, _, prop=key.partition('.')
+        cls={"core": cls_core, "app": cls_app}.get(sheet)
+        if cls is None or not isinstance(getattr(cls, prop, None), (property, Field)):
+            raise ValueError("'%s' isn't a property of core or app sheets"%key)
+        out.append((sheet, prop, value))
+
+    return out
+
+def _apply(doc: Document, edits: list[tuple[str, str, Any]]) -> None:
+    for sheet, prop, value in edits:
+        setattr(getattr(doc, sheet), prop, value)
+
+def _rewrite(doc: Document, path: str, outfile: str | None, **options: bool) -> int:
+    """
+    Save a whole document with the `options` of `Document.save`, replacing it atomically when `outfile` is `None`,
+    and tell how many bytes are saved.
+    """
+    size=os.path.getsize(path)
+    doc.save(outfile or path, overwrite=outfile is None, **options)
+
+    return size-os.path.getsize(outfile or path)
+
+def process_file(
+    path: str,
+    edits: dict[str, Any],
+    outfile: str | None=None,
+    cls_core: Type[Core]=Core,
+    cls_app: Type[App]=App,
+    compact: bool=False,
+    drop_thumbnail: bool=False,
+    deterministic: bool=False,
+    keep_times: bool=False
+) -> Result:
+    """
+    Open a document, apply the edits and save it. Errors are reported in the result instead of being raised.
+
+    When the edits don't change any property, only the sheets they touch are read and the document isn't written:
+    it's left as it is when updated in place, or copied byte by byte to `outfile`.
+    A document rewritten in place is replaced atomically, see `Document.save` with `overwrite`.
+    A compacted document is always written, see `Document.save` with `optimize` and `drop_thumbnail`.
+    A changed document is written whole in deterministic mode, even in place, so its bytes only depend on the input and the edits.
+
+    Args:
+        path (str): file path of document
+        edits (dict[str, Any]): mapping of `<sheet>.<property>` to value
+        outfile (str | None, optional): file path of output document. If it's `None`, the document is updated in place. Defaults to None.
+        cls_core (Type[Core], optional): type of `nometa.sheet.Core` class or its subclasses. Defaults to Core.
+        cls_app (Type[App], optional): type of `nometa.sheet.App` class or its subclasses. Defaults to App.
+        compact (bool, optional): compress the XML parts again at the maximum level. Defaults to False.
+        drop_thumbnail (bool, optional): remove the thumbnail of document. Defaults to False.
+        deterministic (bool, optional): write a reproducible document, see `nometa.archive.write_archive`. Defaults to False.
+        keep_times (bool, optional): keep the access and modification times of a document updated in place. Defaults to False.
+
+    Returns:
+        Result: the outcome of processing
+    """
+    try:
+        with Document(path, cls_core, cls_app, lazy=True) as doc:
+            _apply(doc, _split_edits(edits, cls_core, cls_app))
+            if compact or drop_thumbnail or deterministic and doc.dirty:
+                saved=_rewrite(
+                    doc, path, outfile, optimize=compact, drop_thumbnail=drop_thumbnail, deterministic=deterministic, keep_times=keep_times
+                )
+                return Result(path, outfile, SAVED, bytes_saved=saved)
+
+            if not doc.dirty:
+                if outfile is not None:
+                    shutil.copyfile(path, outfile)
+                return Result(path, outfile, UNCHANGED)
+
+            if outfile is None:
+                doc.update(keep_times=keep_times)
+            else:
+                doc.save(outfile)
+    except Exception as e:
+        return Result(path, outfile, ERROR, "%s: %s"%(type(e).__name__, e))
+
+    return Result(path, outfile, SAVED)
+
+def _process_chunk(
+    tasks: list[tuple[str, str | None]],
+    edits: dict[str, Any],
+    cls_core: Type[Core],
+    cls_app: Type[App],
+    compact: bool,
+    drop_thumbnail: bool,
+    deterministic: bool,
+    keep_times: bool
+) -> list[Result]:
+    return [
+        process_file(path, edits, outfile, cls_core, cls_app, compact, drop_thumbnail, deterministic, keep_times) for path, outfile in tasks
+    ]
+
+def _output_resolver(output: str | Callable[[str], str] | None) -> Callable[[str], str | None]:
+    if output is None:
+        return lambda path: None
+
+    if isinstance(output, str):
+        return lambda path: os.path.join(output, os.path.basename(path))
+
+    return output
+
+def run(
+    paths: Iterable[str],
+    edits: dict[str, Any],
+    output: str | Callable[[str], str] | None=None,
+    workers: int | None=None,
+    chunksize: int=16,
+    executor: str="process",
+    cls_core: Type[Core]=Core,
+    cls_app: Type[App]=App,
+    compact: bool=False,
+    drop_thumbnail: bool=False,
+    deterministic: bool=False,
+    keep_times: bool=False
+) -> Iterator[Result]:
+    """
+    Apply the same edits to many documents in parallel.
+
+    The paths are consumed lazily and submitted in chunks of `chunksize` documents, with at most two chunks per worker in flight.
+    So the memory used doesn't depend on how many documents there are. Results are yielded in completion order.
+
+    Args:
+        paths (Iterable[str]): file paths of documents
+        edits (dict[str, Any]): mapping of `<sheet>.<property>` to value, eg. ``{"core.creator": None}``
+        output (str | Callable[[str], str] | None, optional): a directory where the documents will be saved with the same name,
+            or a function that maps the input path to output path. If it's `None`, the documents are updated in place. Defaults to None.
+        workers (int | None, optional): number of workers. Defaults to the number of CPUs.
+        chunksize (int, optional): number of documents per task. Defaults to 16.
+        executor (str, optional): "process" to use a `ProcessPoolExecutor` or "thread" to use a `ThreadPoolExecutor`. Defaults to "process".
+        cls_core (Type[Core], optional): type of `nometa.sheet.Core` class or its subclasses. Defaults to Core.
+        cls_app (Type[App], optional): type of `nometa.sheet.App` class or its subclasses. Defaults to App.
+        compact (bool, optional): compress the XML parts again at the maximum level, see `process_file`. Defaults to False.
+        drop_thumbnail (bool, optional): remove the thumbnail of documents. Defaults to False.
+        deterministic (bool, optional): write reproducible documents, see `process_file`. Defaults to False.
+        keep_times (bool, optional): keep the access and modification times of documents updated in place. Defaults to False.
+
+    Raises:
+        ValueError: throws when an edit or `executor` is invalid
+
+    Returns:
+        Iterator[Result]: the outcome of each document
+    """
+    _split_edits(edits, cls_core, cls_app)
+    resolve=_output_resolver(output)
+    tasks=((path, resolve(path)) for path in paths)
+    return imap_chunks(_process_chunk, tasks, (edits, cls_core, cls_app, compact, drop_thumbnail, deterministic, keep_times), workers, chunksize, executor)
+
+
+__all__ = ["SAVED", "UNCHANGED", "ERROR", "Result", "process_file", "run"]
@@ -0,0 +1,184 @@
+"""
+This module keeps recently opened documents in memory, so reopening an unchanged document costs a `stat` instead of
+opening the archive and parsing its sheets again, see `DocumentCache`.
+
+A document is identified by its absolute path, and its size, modification time and inode tell whether it has changed since it was read:
+a changed file is read again, there's nothing to invalidate by hand.
+"""
+
+import os
+from copy import deepcopy
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple, Type
+from nometa import Document
+from nometa.sheet import App, Core
+
+
+class CacheStats:
+    """
+    What the lookups of a `DocumentCache` have found.
+    """
+    __slots__=("hits", "misses", "invalidations", "evictions")
+
+    def __init__(self) -> None:
+        self.hits=0
+        """lookups served from the cache"""
+        self.misses=0
+        """lookups that have read the document, including the invalidated ones"""
+        self.invalidations=0
+        """entries dropped because their file or their sheets have changed"""
+        self.evictions=0
+        """entries dropped to keep the cache within its budget"""
+
+    @property
+    def hit_rate(self) -> float:
+        """Ratio of lookups served from the cache, 0.0 before the first lookup"""
+        lookups=self.hits+self.misses
+        return self.hits/lookups if lookups else 0.0
+
+    def __repr__(self) -> str:
+        return "CacheStats(hits=%d, misses=%d, invalidations=%d, evictions=%d)"%(self.hits, self.misses, self.invalidations, self.evictions)
+
+
+class _Entry(NamedTuple):
+    signature: tuple[int, int, int]
+    doc: Document
+    nbytes: int
+
+
+def _signature(st: os.stat_result) -> tuple[int, int, int]:
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+def _nbytes(doc: Document) -> int:
+    return sum(len(sheet._raw) for _, sheet in doc._sheets())
+
+
+class DocumentCache:
+    """
+    A thread-safe LRU cache of documents opened by file path, bounded by a number of entries and a number of bytes.
+
+    The bytes of an entry are the size of its XML sheets, the parsed trees take a few times more memory.
+    The cached `Document` isn't handed out: each lookup gets its own copy, with its own parsed sheets, so the changes of a caller
+    are neither seen by the other callers nor kept by the cache.
+    """
+    def __init__(self, max_entries: int=128, max_bytes: int | None=64 << 20, cls_core: Type[Core]=Core, cls_app: Type[App]=App) -> None:
+        """
+        Constructor
+
+        Args:
+            max_entries (int, optional): maximum number of documents kept. Defaults to 128.
+            max_bytes (int | None, optional): maximum size of sheets kept, `None` means no limit. Defaults to 64 MiB.
+            cls_core (Type[Core], optional): type of `nometa.sheet.Core` class or its subclasses. Defaults to Core.
+            cls_app (Type[App], optional): type of `nometa.sheet.App` class or its subclasses. Defaults to App.
+
+        Raises:
+            ValueError: throws when a budget is negative
+        """
+        if max_entries < 0 or (max_bytes is not None and max_bytes < 0):
+            raise ValueError("The budget of cache can't be negative")
+
+        self._entries: OrderedDict[str, _Entry]=OrderedDict()
+        self._lock=Lock()
+        self._nbytes=0
+        self._stats=CacheStats()
+        self._cls_core=cls_core
+        self._cls_app=cls_app
+        self.max_entries=max_entries
+        """maximum number of documents kept"""
+        self.max_bytes=max_bytes
+        """maximum size of sheets kept, `None` means no limit"""
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: str) -> bool:
+        return os.path.abspath(path) in self._entries
+
+    @property
+    def stats(self) -> CacheStats:
+        """What the lookups have found"""
+        return self._stats
+
+    @property
+    def nbytes(self) -> int:
+        """Size of sheets kept"""
+        return self._nbytes
+
+    def get(self, path: str) -> Document:
+        """
+        Get a document, read with both sheets parsed, from the cache or from its file when it isn't cached or has changed.
+
+        Args:
+            path (str): file path of document
+
+        Raises:
+            OSError: throws when the file can't be read, its entry is dropped
+            ValueError: throws when the file isn't a MS Office document
+
+        Returns:
+            Document: a copy of the cached document, closed, that belongs to the caller
+        """
+        key=os.path.abspath(path)
+        try:
+            signature=_signature(os.stat(key))
+        except OSError:
+            self.invalidate(key)
+            raise
+
+        with self._lock:
+            entry=self._entries.get(key)
+            if entry is not None and entry.signature != signature:
+                self._drop(key)
+                self._stats.invalidations+=1
+                entry=None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats.hits+=1
+            else:
+                self._stats.misses+=1
+
+        if entry is not None:
+            # the cached document is never changed, so it's copied outside the lock
+            return deepcopy(entry.doc)
+
+        # the file is read outside the lock, so the lookups of other documents aren't blocked meanwhile
+        doc=Document(key, self._cls_core, self._cls_app)
+        self._put(key, _Entry(signature, doc, _nbytes(doc)))
+        return deepcopy(doc)
+
+    def _put(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if self.max_entries == 0 or (self.max_bytes is not None and entry.nbytes > self.max_bytes):
+                return
+
+            self._entries[key]=entry
+            self._nbytes+=entry.nbytes
+            while len(self._entries) > self.max_entries or (self.max_bytes is not None and self._nbytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self._stats.evictions+=1
+
+    def _drop(self, key: str) -> None:
+        self._nbytes-=self._entries.pop(key).nbytes
+
+    def invalidate(self, path: str) -> None:
+        """
+        Drop the entry of a document, if any. It's only needed when a file is replaced keeping its size, modification time and inode.
+
+        Args:
+            path (str): file path of document
+        """
+        with self._lock:
+            if os.path.abspath(path) in self._entries:
+                self._drop(os.path.abspath(path))
+
+    def clear(self) -> None:
+        """Drop all entries, the stats are kept"""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes=0
+
+
+__all__ = ["CacheStats", "DocumentCache"]
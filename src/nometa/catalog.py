@@ -0,0 +1,224 @@
+"""
+This module keeps the metadata of documents of directory trees in a SQLite catalog keyed by path.
+
+The catalog is incremental: when it's updated again, only the documents whose size or modification time have changed are read,
+along with the ones that couldn't be read last time.
+Each property is stored in its own column, named after the `nometa.scanner` key with '_' instead of '.', eg. `core_creator`.
+Dates are stored as ISO 8601 UTC text, so they can be compared as strings.
+"""
+
+import os
+import errno
+import sqlite3
+from datetime import datetime
+from typing import Any, Iterable, Iterator, NamedTuple
+from nometa.scanner import CORE_FIELDS, APP_FIELDS, SUFFIXES, scan_many
+
+COLUMNS=[key.replace('.', '_') for key, _ in [*CORE_FIELDS.values(), *APP_FIELDS.values()]]
+"""The property columns of `documents` table"""
+
+_SCHEMA="""
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    error TEXT,
+    %s
+)
+"""%",\n    ".join(COLUMNS)
+
+
+class IndexStats(NamedTuple):
+    """
+    What an update of catalog has done.
+    """
+    scanned: int
+    """documents read because they are new or have changed"""
+    unchanged: int
+    """documents skipped because their size and modification time haven't changed"""
+    removed: int
+    """documents removed from catalog because they don't exist anymore"""
+    errors: int
+    """documents that couldn't be read, their error is stored in `error` column and they are read again by the next update"""
+    unlisted: int
+    """directories and documents that couldn't be listed, the rows under them are kept as they are"""
+
+
+def _to_sql(val: Any) -> Any:
+    if isinstance(val, datetime):
+        return val.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if isinstance(val, bool):
+        return int(val)
+    return val
+
+def _top_roots(roots: Iterable[str]) -> list[str]:
+    """
+    Make the roots absolute and drop the duplicated ones and the ones inside another root, so each document is walked once.
+    """
+    top: list[str]=[]
+    for root in sorted({os.path.abspath(it) for it in roots}):
+        if any((root+os.sep).startswith(os.path.join(it, '')) for it in top):
+            continue
+        top.append(root)
+    return top
+
+def _walk(root: str, unlisted: list[str]) -> Iterator[tuple[str, int, int]]:
+    """
+    Yield path, size and modification time of the Office documents in `root` and its subdirectories.
+    The directories and documents that can't be listed are appended to `unlisted`.
+    """
+    stack=[root]
+    while stack:
+        path=stack.pop()
+        try:
+            entries=os.scandir(path)
+        except OSError:
+            unlisted.append(path)
+            continue
+
+        try:
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in SUFFIXES and entry.is_file():
+                            st=entry.stat()
+                            yield entry.path, st.st_size, st.st_mtime_ns
+                    except OSError:
+                        unlisted.append(entry.path)
+        except OSError:
+            # the directory has failed while it was listed
+            unlisted.append(path)
+
+
+class Catalog:
+    """
+    A SQLite catalog of documents metadata. The `documents` table can be queried through `connection`, eg.
+
+    ``catalog.connection.execute("SELECT path FROM documents WHERE core_creator = ?", ("Johnny Test",))``
+    """
+    def __init__(self, path: str) -> None:
+        """
+        Open or create the catalog.
+
+        Args:
+            path (str): file path of SQLite database
+        """
+        self._conn=sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self) -> "Catalog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """The connection to SQLite database"""
+        return self._conn
+
+    def close(self) -> None:
+        """Close the catalog"""
+        self._conn.close()
+
+    def get(self, path: str) -> dict[str, Any] | None:
+        """
+        Get the row of a document.
+
+        Args:
+            path (str): file path of document
+
+        Returns:
+            dict[str, Any] | None: the columns of document, or `None` when it isn't in catalog
+        """
+        cur=self._conn.execute("SELECT * FROM documents WHERE path = ?", (os.path.abspath(path),))
+        row=cur.fetchone()
+        if row is None:
+            return None
+
+        return dict(zip((it[0] for it in cur.description), row))
+
+    def update(self, roots: Iterable[str], workers: int | None=None, chunksize: int=64, executor: str="process", batch_size: int=1000) -> IndexStats:
+        """
+        Walk the directory trees and store the metadata of new and changed documents. Documents that don't exist anymore are removed,
+        the rows under a directory that can't be listed (eg. unreadable or unmounted meanwhile) are kept.
+
+        Args:
+            roots (Iterable[str]): the directories to walk, a directory inside another one is walked once
+            workers (int | None, optional): number of workers reading documents. Defaults to the number of CPUs.
+            chunksize (int, optional): number of documents per task. Defaults to 64.
+            executor (str, optional): "process" or "thread". Defaults to "process".
+            batch_size (int, optional): number of rows per insert transaction. Defaults to 1000.
+
+        Raises:
+            FileNotFoundError: throws when a root isn't a directory, then the catalog is left untouched
+
+        Returns:
+            IndexStats: what has been done
+        """
+        roots=_top_roots(roots)
+        for root in roots:
+            if not os.path.isdir(root):
+                raise FileNotFoundError(errno.ENOENT, "No such directory", root)
+
+        conn=self._conn
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM seen")
+        unchanged=0
+        stats: dict[str, tuple[int, int]]={}
+        seen: list[tuple[str]]=[]
+        unlisted: list[str]=[]
+
+        def changed() -> Iterator[str]:
+            nonlocal unchanged
+            for root in roots:
+                for path, size, mtime in _walk(root, unlisted):
+                    seen.append((path,))
+                    if len(seen) >= batch_size:
+                        conn.executemany("INSERT OR IGNORE INTO seen VALUES (?)", seen)
+                        seen.clear()
+
+                    # a document that couldn't be read is always read again, the error may have been transient
+                    row=conn.execute("SELECT size, mtime_ns, error IS NULL FROM documents WHERE path = ?", (path,)).fetchone()
+                    if row == (size, mtime, 1):
+                        unchanged+=1
+                        continue
+
+                    stats[path]=(size, mtime)
+                    yield path
+
+        sql="INSERT OR REPLACE INTO documents (path, size, mtime_ns, error, %s) VALUES (%s)"%(", ".join(COLUMNS), ", ".join("?"*(len(COLUMNS)+4)))
+        rows: list[tuple]=[]
+        scanned=errors=0
+        for result in scan_many(changed(), workers, chunksize, executor):
+            values=result.values or {}
+            rows.append((result.path, *stats.pop(result.path), result.error, *(_to_sql(values.get(key)) for key, _ in [*CORE_FIELDS.values(), *APP_FIELDS.values()])))
+            scanned+=1
+            errors+=result.error is not None
+            if len(rows) >= batch_size:
+                conn.executemany(sql, rows)
+                conn.commit()
+                rows.clear()
+
+        conn.executemany(sql, rows)
+        conn.executemany("INSERT OR IGNORE INTO seen VALUES (?)", seen)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS unlisted (path TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM unlisted")
+        conn.executemany("INSERT OR IGNORE INTO unlisted VALUES (?)", ((it,) for it in unlisted))
+        removed=0
+        for root in roots:
+            prefix=os.path.join(root, '')
+            removed+=conn.execute(
+                "DELETE FROM documents WHERE substr(path, 1, ?) = ? AND path NOT IN (SELECT path FROM seen) AND NOT EXISTS ("
+                "SELECT 1 FROM unlisted WHERE documents.path = unlisted.path OR substr(documents.path, 1, length(unlisted.path)+1) = unlisted.path || ?)",
+                (len(prefix), prefix, os.sep)
+            ).rowcount
+        conn.commit()
+        return IndexStats(scanned, unchanged, removed, errors, len(unlisted))
+
+
+__all__ = ["COLUMNS", "IndexStats", "Catalog"]
@@ -0,0 +1,75 @@
+"""
+This module shrinks documents for archival, see `Document.save` with `optimize` and `drop_thumbnail`.
+
+The XML parts are deflated again at the maximum level, keeping the original data when it's smaller, and the thumbnail
+(`docProps/thumbnail.*`) can be dropped along with its relationship and content type.
+"""
+
+import re
+from fnmatch import fnmatchcase
+from zipfile import ZipFile
+from nometa.compression import CompressionPolicy, STORE_PATTERNS
+
+COMPACT_LEVELS={"*.xml": 9, "*.rels": 9, "*.vml": 9}
+"""Deflate levels of the XML parts in compact mode"""
+THUMBNAIL_PATTERN="docprops/thumbnail.*"
+"""Glob pattern of thumbnails, matched against lowercase member names"""
+
+_ROOT_RELS="_rels/.rels"
+_CONTENT_TYPES="[Content_Types].xml"
+_ELEMENT="\\s*<(%s)\\b([^>]*?)(?:/>|>\\s*</\\1\\s*>)"
+_ATTRIBUTE=re.compile(rb"""([\w:]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+
+
+def compact_policy() -> CompressionPolicy:
+    """
+    Get the compression policy of compact mode: XML parts at the maximum level, compressed media stored, the rest kept as it is.
+
+    Returns:
+        CompressionPolicy: the policy, it keeps a member as it is when compressing it again doesn't make it smaller
+    """
+    return CompressionPolicy(COMPACT_LEVELS, store=STORE_PATTERNS, smallest=True)
+
+def _attributes(raw: bytes) -> dict[str, str]:
+    return {m[1].decode(): (m[2] if m[2] is not None else m[3]).decode() for m in _ATTRIBUTE.finditer(raw)}
+
+def _remove(xml: bytes, tag: str, drop) -> bytes:
+    """
+    Remove the elements named `tag` for which `drop(attributes)` is true, with the blank before them.
+    """
+    pattern=re.compile(_ELEMENT.encode()%tag.encode())
+    return pattern.sub(lambda m: b'' if drop(_attributes(m[2])) else m[0], xml)
+
+def drop_thumbnail(zin: ZipFile) -> tuple[set[str], dict[str, bytes]]:
+    """
+    Find the thumbnails of a document and rewrite the package relationships and the content types without them.
+
+    Args:
+        zin (ZipFile): the document opened for reading
+
+    Returns:
+        tuple[set[str], dict[str, bytes]]: the names of thumbnails and the rewritten members (`_rels/.rels` and `[Content_Types].xml`),
+            both are empty when there's no thumbnail
+    """
+    names=set(zin.namelist())
+    thumbnails={it for it in names if fnmatchcase(it.lower(), THUMBNAIL_PATTERN)}
+    if not thumbnails:
+        return set(), {}
+
+    dropped={it.lower() for it in thumbnails}
+    members: dict[str, bytes]={}
+    if _ROOT_RELS in names:
+        members[_ROOT_RELS]=_remove(zin.read(_ROOT_RELS), "Relationship",
+            lambda attrs: attrs.get("TargetMode") != "External" and attrs.get("Target", '').lstrip('/').lower() in dropped)
+
+    if _CONTENT_TYPES in names:
+        kept={it.rpartition('.')[2].lower() for it in names-thumbnails if '.' in it.rpartition('/')[2]}
+        members[_CONTENT_TYPES]=_remove(
+            _remove(zin.read(_CONTENT_TYPES), "Override", lambda attrs: attrs.get("PartName", '').lstrip('/').lower() in dropped),
+            "Default", lambda attrs: attrs.get("Extension", '').lower() in {it.rpartition('.')[2] for it in dropped}-kept
+        )
+
+    return thumbnails, members
+
+
+__all__ = ["COMPACT_LEVELS", "THUMBNAIL_PATTERN", "compact_policy", "drop_thumbnail"]
@@ -0,0 +1,129 @@
+"""
+This module decides how each member of a document is compressed on save, see `CompressionPolicy`.
+
+By default a member keeps its compression method and data, it's copied as raw compressed data.
+Media that's already compressed (jpeg, png, mp4, ...) is recognized by its extension or by sniffing its first bytes, and is stored,
+since deflating it again only costs CPU. Deflate levels can be chosen by glob pattern of member names.
+"""
+
+from fnmatch import fnmatchcase
+from typing import Callable, Iterable
+from zipfile import ZipInfo, ZIP_STORED, ZIP_DEFLATED
+
+STORE_PATTERNS=("*.jpeg", "*.jpg", "*.jfif", "*.png", "*.gif", "*.webp", "*.mp4", "*.m4v", "*.m4a", "*.mov", "*.mp3", "*.wma", "*.wmv",
+                "*.ogg", "*.webm", "*.mkv", "*.zip", "*.gz", "*.7z", "*.bz2", "*.xz")
+"""Members that are stored by default, their content is already compressed"""
+
+_SIGNATURES=(
+    (0, b"\xff\xd8\xff"),             # jpeg
+    (0, b"\x89PNG\r\n\x1a\n"),        # png
+    (0, b"GIF8"),                     # gif
+    (4, b"ftyp"),                     # mp4, mov, m4a
+    (0, b"\x1a\x45\xdf\xa3"),         # webm, mkv
+    (0, b"OggS"),                     # ogg
+    (0, b"ID3"),                      # mp3
+    (0, b"PK\x03\x04"),               # zip, embedded Office documents
+    (0, b"\x1f\x8b"),                 # gzip
+    (0, b"7z\xbc\xaf\x27\x1c"),       # 7z
+    (0, b"BZh"),                      # bzip2
+    (0, b"\xfd7zXZ\x00"),             # xz
+)
+SNIFF_SIZE=16
+"""Number of bytes of content needed to sniff it"""
+_POOR_RATIO=0.9
+
+
+def is_compressed(head: bytes) -> bool:
+    """
+    Tell whether a content is in a compressed format, by its first bytes.
+
+    Args:
+        head (bytes): the first `SNIFF_SIZE` bytes (or more) of content
+
+    Returns:
+        bool: `True` if it's a compressed image, audio, video or archive
+    """
+    return any(head[offset:offset+len(magic)] == magic for offset, magic in _SIGNATURES) or head[8:12] == b"WEBP"
+
+
+class CompressionPolicy:
+    """
+    How each member is compressed on save. The rules are tried in this order, names are matched case-insensitively:
+
+    1. the first pattern of `levels` that matches the member name gives its deflate level;
+    2. members matching `store` patterns, or whose content is compressed media when `sniff` is set, are stored;
+    3. the other members are deflated at `default` level or, if it's `None`, keep their method and data.
+
+    A new content of a member (eg. a changed sheet) that keeps its method is deflated at the default zlib level, unless the member was stored.
+    """
+    def __init__(
+        self,
+        levels: dict[str, int] | None=None,
+        default: int | None=None,
+        store: Iterable[str]=STORE_PATTERNS,
+        sniff: bool=True,
+        smallest: bool=False
+    ) -> None:
+        """
+        Constructor
+
+        Args:
+            levels (dict[str, int] | None, optional): glob pattern of member names mapped to deflate level (0 to 9),
+                eg. ``{"*.xml": 9, "ppt/media/*": 1}``. Defaults to None.
+            default (int | None, optional): deflate level of the other members, `None` keeps them as they are. Defaults to None.
+            store (Iterable[str], optional): glob patterns of members to store. Defaults to `STORE_PATTERNS`.
+            sniff (bool, optional): store the members whose first bytes show compressed media. Only the members that are stored,
+                or that deflate poorly, are sniffed, so it reads a few bytes of some members. Defaults to True.
+            smallest (bool, optional): keep a member as it is when compressing it again doesn't make it smaller. Defaults to False.
+
+        Raises:
+            ValueError: throws when a level isn't between 0 and 9
+        """
+        for level in [*(levels or {}).values(), *([] if default is None else [default])]:
+            if not 0 <= level <= 9:
+                raise ValueError("The deflate level must be between 0 and 9, not %d"%level)
+
+        self._levels=[(pattern.lower(), level) for pattern, level in (levels or {}).items()]
+        self._store=tuple(it.lower() for it in store)
+        self.default=default
+        """deflate level of members not matched by any rule, `None` keeps them as they are"""
+        self.sniff=sniff
+        """store the members whose first bytes show compressed media"""
+        self.smallest=smallest
+        """keep a member as it is when compressing it again doesn't make it smaller"""
+
+    def _worth_sniffing(self, info: ZipInfo) -> bool:
+        if info.compress_type == ZIP_STORED:
+            return self.default is not None
+        return info.file_size > 0 and info.compress_size >= info.file_size*_POOR_RATIO
+
+    def decide(self, info: ZipInfo, head: Callable[[], bytes]) -> tuple[int, int] | None:
+        """
+        Decide how a member is written.
+
+        Args:
+            info (ZipInfo): the member information, as found in the source document
+            head (Callable[[], bytes]): gives the first `SNIFF_SIZE` bytes of member content, it's called only when sniffing is needed
+
+        Returns:
+            tuple[int, int] | None: compression method (`ZIP_STORED` or `ZIP_DEFLATED`) and deflate level,
+                or `None` to keep the method and data of member
+        """
+        name=info.filename.lower()
+        for pattern, level in self._levels:
+            if fnmatchcase(name, pattern):
+                return ZIP_DEFLATED, level
+
+        if any(fnmatchcase(name, it) for it in self._store):
+            return ZIP_STORED, 0
+
+        if self.sniff and self._worth_sniffing(info) and is_compressed(head()):
+            return ZIP_STORED, 0
+
+        if self.default is None:
+            return None
+
+        return ZIP_DEFLATED, self.default
+
+
+__all__ = ["STORE_PATTERNS", "SNIFF_SIZE", "is_compressed", "CompressionPolicy"]
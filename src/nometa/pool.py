@@ -0,0 +1,100 @@
+"""
+This module runs work over a pool of processes or threads, submitting it in chunks with bounded memory.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Type, TypeVar
+
+_T=TypeVar("_T")
+
+
+def imap_chunks(
+    func: Callable[..., list[_T]],
+    items: Iterable[Any],
+    args: tuple,
+    workers: int | None,
+    chunksize: int,
+    executor: str
+) -> Iterator[_T]:
+    """
+    Call `func(chunk, *args)` for chunks of `items` in a pool of workers and yield the items of returned lists in completion order.
+
+    The items are consumed lazily, with at most two chunks per worker in flight, so the memory used doesn't depend on how many items there are.
+    With the "process" executor, `func` and `args` must be picklable.
+
+    Args:
+        func (Callable[..., list[_T]]): processes a chunk (list) of items
+        items (Iterable[Any]): the items to process
+        args (tuple): extra arguments of `func`
+        workers (int | None): number of workers, `None` means the number of CPUs
+        chunksize (int): number of items per chunk
+        executor (str): "process" to use a `ProcessPoolExecutor` or "thread" to use a `ThreadPoolExecutor`
+
+    Returns:
+        Iterator[_T]: the items of lists returned by `func`
+
+    Raises:
+        ValueError: throws when `chunksize` or `executor` is invalid
+    """
+    if chunksize < 1:
+        raise ValueError("``chunksize`` must be greater than zero")
+
+    pools: dict[str, Type[Executor]]={"process": ProcessPoolExecutor, "thread": ThreadPoolExecutor}
+    if executor not in pools:
+        raise ValueError("``executor`` must be 'process' or 'thread'")
+
+    workers=workers or os.cpu_count() or 1
+    return _imap(pools[executor](max_workers=workers), workers, func, iter(items), args, chunksize)
+
+def _imap(pool: Executor, workers: int, func: Callable[..., list[_T]], items: Iterator[Any], args: tuple, chunksize: int) -> Iterator[_T]:
+    with pool:
+        pending: set[Future]=set()
+        while True:
+            while len(pending) < 2*workers:
+                chunk=list(islice(items, chunksize))
+                if not chunk: break
+                pending.add(pool.submit(func, chunk, *args))
+
+            if not pending: break
+
+            done, pending=wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield from fut.result()
+
+def imap_ordered(func: Callable[[Any], _T], items: Iterable[Any], workers: int | None) -> Iterator[_T]:
+    """
+    Call `func(item)` for each item in a pool of threads and yield the results in the order of `items`.
+
+    The items are consumed lazily, in the calling thread, with at most two items per worker in flight.
+    So the calling thread can read the items from a file that isn't thread-safe while the workers process the previous ones.
+
+    Args:
+        func (Callable[[Any], _T]): processes an item, it should release the GIL (eg. zlib) to run in parallel
+        items (Iterable[Any]): the items to process
+        workers (int | None): number of threads, `None` means the number of CPUs
+
+    Returns:
+        Iterator[_T]: the results of `func`
+    """
+    workers=workers or os.cpu_count() or 1
+    return _imap_ordered(ThreadPoolExecutor(max_workers=workers), workers, func, iter(items))
+
+def _imap_ordered(pool: Executor, workers: int, func: Callable[[Any], _T], items: Iterator[Any]) -> Iterator[_T]:
+    pending: deque[Future]=deque()
+    try:
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= 2*workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for fut in pending: fut.cancel()
+        pool.shutdown()
+
+
+__all__ = ["imap_chunks", "imap_ordered"]
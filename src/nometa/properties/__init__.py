@@ -4,10 +4,17 @@ It contains classes to handle tags whose data type are: boolean, datetime, numer
 """
 
 from abc import ABC, abstractmethod
-from lxml import etree
+from nometa.backends import Element, is_element
 from typing import Any
 
 
+def _same(a: Any, b: Any) -> bool:
+    """
+    Tell whether assigning `b` over `a` changes nothing, the types must match too (eg. `1` isn't the same as `1.0` or `True`).
+    """
+    return type(a) is type(b) and a == b
+
+
 class Property(ABC):
     """
     Abstract class for dealing with xml nodes/tags
@@ -15,21 +22,74 @@ class Property(ABC):
     def __init__(self) -> None:
         self._tname: str = ''
         self._value: Any = None
+        self._dirty: bool = False
 
     @property
     def tname(self) -> str:
         """Get the official tag name of this property"""
         return self._tname
 
+    @property
+    def dirty(self) -> bool:
+        """Tell whether the value has changed since it was read from the element"""
+        return self._dirty
+
+    def _assign(self, val: Any) -> None:
+        if not _same(self._value, val):
+            self._dirty=True
+        self._value=val
+
+    @staticmethod
+    def from_text(text: str|None) -> Any:
+        """
+        Convert the text of a tag to the value of this property type. Used by `nometa.sheet.Field` too.
+
+        Args:
+            text (str | None): the tag's text
+
+        Returns:
+            Any: the value
+        """
+        return text
+
+    @staticmethod
+    def validate(val: Any) -> Any:
+        """
+        Check (and normalize) a value assigned to this property type. Used by `nometa.sheet.Field` too.
+
+        Args:
+            val (Any): the assigned value
+
+        Raises:
+            TypeError
+
+        Returns:
+            Any: the value to keep
+        """
+        return val
+
+    @staticmethod
+    def to_text(val: Any) -> str|None:
+        """
+        Convert a value of this property type to the text of a tag. Used by `nometa.sheet.Field` too.
+
+        Args:
+            val (Any): the value
+
+        Returns:
+            str | None: the tag's text
+        """
+        return None if val is None else str(val)
+
     @staticmethod
     @abstractmethod
-    def from_element(tname: str, elem: etree._Element) -> "Property":
+    def from_element(tname: str, elem: Element) -> "Property":
         """
-        Read an `_Element` and returns the corresponding property object
+        Read an element and returns the corresponding property object
 
         Args:
             tname (str): the official tag name in XML documents
-            elem (etree._Element): a valid `etree._Element` instance
+            elem (Element): an element of a `nometa.backends` backend
 
         Raises:
             TypeError
@@ -40,26 +100,26 @@ class Property(ABC):
         if type(tname) != str:
             raise TypeError("`tname` must be string")
         
-        if type(elem) != etree._Element:
-            raise TypeError("`elem` must be an instance of `etree._Element`")
+        if not is_element(elem):
+            raise TypeError("`elem` must be an element of a `nometa.backends` backend")
 
     
-    def __append(self, elem: etree._Element) -> None:
+    def __append(self, elem: Element) -> None:
         if ':' in self._tname:
             xmlns, tag=self._tname.split(':')
-            new_node=elem.makeelement(etree.QName(elem.nsmap[xmlns], tag)) # type: ignore
+            new_node=elem.makeelement("{%s}%s"%(elem.nsmap[xmlns], tag))
         else:
             new_node=elem.makeelement(self._tname)  # type: ignore
         
         self._set_node_value(new_node)
         elem.append(new_node)
 
-    def __update(self, elem: etree._Element) -> None:
+    def __update(self, elem: Element) -> None:
         node=self._find_node(elem)
         self._set_node_value(node)
 
-    def _find_node(self, elem: etree._Element) -> etree._Element:
-        node: etree._Element = elem.find(self._tname, namespaces=elem.nsmap)
+    def _find_node(self, elem: Element) -> Element:
+        node: Element = elem.find(self._tname, namespaces=elem.nsmap)
         if node is None:
             try:
                 node=elem.find(self._tname)
@@ -69,27 +129,30 @@ class Property(ABC):
         return node
 
     @abstractmethod
-    def _set_node_value(self, node: etree._Element) -> None:
+    def _set_node_value(self, node: Element) -> None:
         """
         Hook method to set the tag's value
 
         Args:
-            node (etree._Element): the node corresponding this XML tag
+            node (Element): the node corresponding this XML tag
         """
         pass
 
-    def to_element(self, elem: etree._Element) -> None:
+    def to_element(self, elem: Element) -> None:
         """
-        Write the value of this property to `elem` parameter
+        Write the value of this property to `elem` parameter, only if it has changed (see `dirty`)
 
         Args:
-            elem (etree._Element): the target xml tree node
+            elem (Element): the target xml tree node
 
         Raises:
             TypeError
         """
-        if type(elem) != etree._Element:
-            raise TypeError("`elem` must be an instance of `etree._Element`")
+        if not is_element(elem):
+            raise TypeError("`elem` must be an element of a `nometa.backends` backend")
+
+        if not self._dirty:
+            return
         
         node=elem.find(self._tname, namespaces=elem.nsmap)
         if node is not None:
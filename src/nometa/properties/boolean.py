@@ -1,5 +1,5 @@
 from nometa.properties import Property
-from lxml import etree
+from nometa.backends import Element
 
 
 def _to_bool(val: str) -> bool:
@@ -48,21 +48,33 @@ class BooleanProperty(Property):
     
     @value.setter
     def value(self, val: bool|None) -> None:
+        self._assign(BooleanProperty.validate(val))
+
+    @staticmethod
+    def from_text(text: str|None) -> bool:
+        return _to_bool(text) # type: ignore
+
+    @staticmethod
+    def validate(val: bool|None) -> bool|None:
         if val is None: pass
         elif type(val) != bool:
             raise TypeError("`value` must be boolean")
         
-        self._value=val
+        return val
+
+    @staticmethod
+    def to_text(val: bool|None) -> str:
+        return "true" if val else "false"
         
     @staticmethod
-    def from_element(tname: str, elem: etree._Element) -> Property:
+    def from_element(tname: str, elem: Element) -> Property:
         super(BooleanProperty, BooleanProperty).from_element(tname, elem)
         prop=BooleanProperty(tname)
         node=prop._find_node(elem)
-        prop.value=_to_bool(node.text) if node is not None else None
+        prop._value=BooleanProperty.from_text(node.text) if node is not None else None
         return prop
     
-    def _set_node_value(self, node: etree._Element) -> None:
+    def _set_node_value(self, node: Element) -> None:
         super()._set_node_value(node)
-        node.text="true" if self._value else "false" # type: ignore
+        node.text=BooleanProperty.to_text(self._value) # type: ignore
         
\ No newline at end of file
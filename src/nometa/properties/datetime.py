@@ -1,6 +1,6 @@
 from nometa.properties import Property
 from datetime import datetime
-from lxml.etree import _Element
+from nometa.backends import Element
 
 
 
@@ -33,21 +33,33 @@ class DatetimeProperty(Property):
     
     @value.setter
     def value(self, val: datetime|None) -> None:
+        self._assign(DatetimeProperty.validate(val))
+
+    @staticmethod
+    def from_text(text: str|None) -> datetime|None:
+        return datetime.strptime(text,"%Y-%m-%dT%H:%M:%SZ") if text is not None else None
+
+    @staticmethod
+    def validate(val: datetime|None) -> datetime|None:
         if val is None: pass
         elif not isinstance(val, datetime):
             raise TypeError("`value` must be a valid instance of `datetime`")
         
-        self._value=val
+        return val
+
+    @staticmethod
+    def to_text(val: datetime|None) -> str|None:
+        return val.strftime("%Y-%m-%dT%H:%M:%SZ") if val is not None else None
     
     @staticmethod
-    def from_element(tname: str, elem: _Element) -> Property:
+    def from_element(tname: str, elem: Element) -> Property:
         super(DatetimeProperty, DatetimeProperty).from_element(tname, elem)
         prop=DatetimeProperty(tname)
         node=prop._find_node(elem)
-        prop.value=datetime.strptime(node.text,"%Y-%m-%dT%H:%M:%SZ") if (node is not None and node.text is not None) else None
+        prop._value=DatetimeProperty.from_text(node.text) if node is not None else None
         return prop
     
-    def _set_node_value(self, node: _Element) -> None:
+    def _set_node_value(self, node: Element) -> None:
         super()._set_node_value(node)
-        node.text=self._value.strftime("%Y-%m-%dT%H:%M:%SZ") # type: ignore
+        node.text=DatetimeProperty.to_text(self._value) # type: ignore
         
\ No newline at end of file
@@ -1,5 +1,5 @@
 from nometa.properties import Property
-from lxml.etree import _Element
+from nometa.backends import Element
 
 
 class NumericProperty(Property):
@@ -31,33 +31,42 @@ class NumericProperty(Property):
     
     @value.setter
     def value(self, val: int|float|None) -> None:
+        self._assign(NumericProperty.validate(val))
+
+    @staticmethod
+    def from_text(text: str|None) -> int|float|None:
+        try:
+            return int(text) # type: ignore
+        except TypeError:
+            return None
+        except ValueError:
+            try:
+                return float(text) # type: ignore
+            except ValueError:
+                raise ValueError("The tag value isn't numeric")
+
+    @staticmethod
+    def validate(val: int|float|None) -> int|float|None:
         if val is None: pass
         elif type(val) != int and type(val) != float:
             raise TypeError("type of `value` must be int or float")
         
-        self._value=val
+        return val
+
+    @staticmethod
+    def to_text(val: int|float|None) -> str|None:
+        return str(val) if val is not None else None
     
     @staticmethod
-    def from_element(tname: str, elem: _Element) -> Property:
+    def from_element(tname: str, elem: Element) -> Property:
         super(NumericProperty, NumericProperty).from_element(tname, elem)
         prop=NumericProperty(tname)
         node=prop._find_node(elem)
-        try:
-            prop.value=int(node.text)
-        except (TypeError, AttributeError):
-            prop.value=None
-        except ValueError:
-            try:
-                prop.value=float(node.text)
-            except TypeError:
-                prop.value=None
-            except ValueError:
-                raise ValueError("The tag value isn't numeric")
-        
+        prop._value=NumericProperty.from_text(node.text) if node is not None else None
         return prop
     
     
-    def _set_node_value(self, node: _Element) -> None:
+    def _set_node_value(self, node: Element) -> None:
         super()._set_node_value(node)
-        node.text=str(self._value) # type: ignore
+        node.text=NumericProperty.to_text(self._value) # type: ignore
         
\ No newline at end of file
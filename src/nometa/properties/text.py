@@ -1,5 +1,5 @@
 from nometa.properties import Property
-from lxml.etree import _Element
+from nometa.backends import Element
 
 
 
@@ -32,22 +32,33 @@ class TextProperty(Property):
     
     @value.setter
     def value(self, val: str|None) -> None:
+        self._assign(TextProperty.validate(val))
+
+    @staticmethod
+    def from_text(text: str|None) -> str|None:
+        return TextProperty.validate(text)
+
+    @staticmethod
+    def validate(val: str|None) -> str|None:
         if val is None:
-            self._value=val
-            return
+            return val
         elif type(val) != str:
             val=str(val)
         
-        self._value=val.strip()
+        return val.strip()
+
+    @staticmethod
+    def to_text(val: str|None) -> str|None:
+        return val
     
     @staticmethod
-    def from_element(tname: str, elem: _Element) -> Property:
+    def from_element(tname: str, elem: Element) -> Property:
         super(TextProperty, TextProperty).from_element(tname, elem)
         prop=TextProperty(tname)
-        node: _Element=prop._find_node(elem)
-        prop.value=node.text if node is not None else None
+        node: Element=prop._find_node(elem)
+        prop._value=TextProperty.from_text(node.text) if node is not None else None
         return prop
     
-    def _set_node_value(self, node: _Element) -> None:
+    def _set_node_value(self, node: Element) -> None:
         super()._set_node_value(node)
-        node.text=self._value # type: ignore
+        node.text=TextProperty.to_text(self._value) # type: ignore
@@ -0,0 +1,332 @@
+"""
+This module reads members of an OOXML package (zip archive) fetching as few bytes of the file as possible.
+
+It's meant for documents on slow storage (NFS, FUSE-mounted object stores), where every read is a round trip.
+`zipfile.ZipFile` already skips the members that aren't read, but it reads each member through several small reads and seeks.
+`RangeReader` fetches only the end of central directory record, the central directory and the local entries of the members read,
+and counts the I/O it issues, see `ReadStats`.
+
+For local files, `MappedZipFile` memory-maps the document instead, so reading it issues no syscalls and the members are
+uncompressed, or copied by `nometa.archive`, straight from the mapping.
+"""
+
+import mmap
+import zlib
+from struct import Struct
+from typing import IO, NamedTuple
+from zipfile import ZipFile, ZipInfo, BadZipFile, ZIP_STORED, ZIP_DEFLATED
+from nometa.archive import _data_offset
+
+_END_RECORD=Struct("<4s4H2LH")
+_END_SIGNATURE=b"PK\005\006"
+_END64_RECORD=Struct("<4sQ2H2L4Q")
+_END64_SIGNATURE=b"PK\006\006"
+_END64_LOCATOR=Struct("<4sLQL")
+_END64_LOCATOR_SIGNATURE=b"PK\006\007"
+_CENTRAL_HEADER=Struct("<4s4B4HL2L5H2L")
+_CENTRAL_SIGNATURE=b"PK\001\002"
+_LOCAL_HEADER=Struct("<4s2B4HL2L2H")
+_LOCAL_SIGNATURE=b"PK\003\004"
+_MAX_COMMENT=0xFFFF
+_ZIP64_EXTRA_ID=0x0001
+_ENCRYPTED_FLAG=0x01
+_UTF8_FLAG=0x800
+
+
+class ReadStats:
+    """
+    The I/O issued by readers. It can be shared by several `RangeReader`, then it adds up their counters.
+    """
+    __slots__=("bytes_read", "seeks", "reads")
+
+    def __init__(self) -> None:
+        self.bytes_read=0
+        """bytes fetched from the file"""
+        self.seeks=0
+        """seeks issued, a read that continues where the previous one has ended doesn't need a seek"""
+        self.reads=0
+        """reads issued"""
+
+    def __repr__(self) -> str:
+        return "ReadStats(bytes_read=%d, seeks=%d, reads=%d)"%(self.bytes_read, self.seeks, self.reads)
+
+
+class _Entry(NamedTuple):
+    offset: int
+    flags: int
+    method: int
+    compress_size: int
+    file_size: int
+    crc: int
+
+
+def _zip64_values(extra: bytes, values: list[int]) -> None:
+    """
+    Replace the sizes and offset of a central directory header that are saturated (0xFFFFFFFF) by the ones of its zip64 extra field.
+    """
+    i=0
+    while i+4 <= len(extra):
+        xid=int.from_bytes(extra[i:i+2], "little")
+        xlen=int.from_bytes(extra[i+2:i+4], "little")
+        if xid == _ZIP64_EXTRA_ID:
+            pos=i+4
+            for j, val in enumerate(values):
+                if val == 0xFFFFFFFF:
+                    values[j]=int.from_bytes(extra[pos:pos+8], "little")
+                    pos+=8
+            return
+        i+=4+xlen
+
+
+class RangeReader:
+    """
+    A read-only zip archive that fetches only the end of central directory record, the central directory (when opened)
+    and the local entries of the members read (a seek and two reads each, no seek when it follows the previous one).
+    """
+    def __init__(self, file: str | IO[bytes], stats: ReadStats | None=None) -> None:
+        """
+        Open the archive and read its central directory.
+
+        Args:
+            file (str | IO[bytes]): file path of archive OR a binary file object with `seek`, `tell` and `read`,
+                it's left open by `close`
+            stats (ReadStats | None, optional): where the I/O issued is counted. Defaults to a new `ReadStats`.
+
+        Raises:
+            BadZipFile: throws when the file isn't a zip archive
+        """
+        self._stats=stats if stats is not None else ReadStats()
+        self._own=isinstance(file, str)
+        self._fp: IO[bytes] | None=open(file, "rb") if isinstance(file, str) else file
+        try:
+            self._entries=self._read_directory()
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> "RangeReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def stats(self) -> ReadStats:
+        """The I/O issued by the reader"""
+        return self._stats
+
+    def close(self) -> None:
+        """Release the file when it was opened by path"""
+        if self._own and self._fp is not None:
+            self._fp.close()
+        self._fp=None
+
+    def _read_at(self, offset: int, size: int) -> bytes:
+        fp=self._fp
+        if fp is None:
+            raise ValueError("Attempt to read a closed archive")
+
+        if fp.tell() != offset:
+            fp.seek(offset)
+            self._stats.seeks+=1
+        data=fp.read(size)
+        self._stats.reads+=1
+        self._stats.bytes_read+=len(data)
+        return data
+
+    def _find_end(self) -> tuple[int, tuple, bytes]:
+        """
+        Find the end of central directory record and the 20 bytes before it, where a zip64 locator would be.
+        Mostly there's no archive comment, then only the last 42 bytes are read.
+        """
+        fp=self._fp
+        size=_END_RECORD.size
+        tail=size+_END64_LOCATOR.size
+        try:
+            start=fp.seek(-tail, 2) # type: ignore
+        except (OSError, ValueError):
+            start=fp.seek(0) # type: ignore
+        self._stats.seeks+=1
+
+        data=self._read_at(start, tail)
+        end=start+len(data)
+        if data[-size:-size+4] == _END_SIGNATURE and data[-2:] == b"\000\000":
+            return end-size, _END_RECORD.unpack(data[-size:]), data[:-size]
+
+        start=max(end-tail-_MAX_COMMENT, 0)
+        data=self._read_at(start, end-start)
+        pos=data.rfind(_END_SIGNATURE)
+        if pos < 0 or pos+size > len(data):
+            raise BadZipFile("File is not a zip file")
+
+        fields=_END_RECORD.unpack_from(data, pos)
+        if pos+size+fields[7] > len(data):
+            raise BadZipFile("File is not a zip file")
+
+        return start+pos, fields, data[max(pos-_END64_LOCATOR.size, 0):pos]
+
+    def _read_directory(self) -> dict[str, _Entry]:
+        pos, fields, locator=self._find_end()
+        cd_size, cd_offset=fields[5], fields[6]
+        cd_end=pos
+        if len(locator) == _END64_LOCATOR.size and locator[:4] == _END64_LOCATOR_SIGNATURE:
+            cd_end=pos-_END64_LOCATOR.size-_END64_RECORD.size
+            data=self._read_at(cd_end, _END64_RECORD.size) if cd_end >= 0 else b''
+            if len(data) != _END64_RECORD.size or data[:4] != _END64_SIGNATURE:
+                raise BadZipFile("Corrupt zip64 end of central directory record")
+            fields=_END64_RECORD.unpack(data)
+            cd_size, cd_offset=fields[8], fields[9]
+
+        concat=cd_end-cd_size-cd_offset
+        if concat < 0:
+            raise BadZipFile("Bad offset for central directory")
+
+        data=self._read_at(cd_offset+concat, cd_size)
+        if len(data) != cd_size:
+            raise BadZipFile("Truncated central directory")
+
+        entries: dict[str, _Entry]={}
+        i=0
+        while i < cd_size:
+            if i+_CENTRAL_HEADER.size > cd_size or data[i:i+4] != _CENTRAL_SIGNATURE:
+                raise BadZipFile("Bad magic number for central directory")
+
+            header=_CENTRAL_HEADER.unpack_from(data, i)
+            i+=_CENTRAL_HEADER.size
+            raw_name=data[i:i+header[12]]
+            name=raw_name.decode("utf-8" if header[5] & _UTF8_FLAG else "cp437")
+            extra=data[i+header[12]:i+header[12]+header[13]]
+            i+=header[12]+header[13]+header[14]
+            values=[header[11], header[10], header[18]]
+            if 0xFFFFFFFF in values:
+                _zip64_values(extra, values)
+            entries[name]=_Entry(values[2]+concat, header[5], header[6], values[1], values[0], header[9])
+
+        return entries
+
+    def namelist(self) -> list[str]:
+        """
+        Get the member names, in the order of central directory.
+
+        Returns:
+            list[str]: the member names
+        """
+        return list(self._entries)
+
+    def read(self, name: str) -> bytes:
+        """
+        Read a member, fetching only its local entry.
+
+        Args:
+            name (str): the member name
+
+        Raises:
+            KeyError: throws when there's no member named `name`
+            BadZipFile: throws when the local entry is corrupted
+            NotImplementedError: throws when the member is encrypted or compressed by a method other than stored or deflated
+
+        Returns:
+            bytes: the uncompressed content
+        """
+        entry=self._entries.get(name)
+        if entry is None:
+            raise KeyError("There is no item named '%s' in the archive"%name)
+        if entry.flags & _ENCRYPTED_FLAG:
+            raise NotImplementedError("'%s' is encrypted"%name)
+        if entry.method not in (ZIP_STORED, ZIP_DEFLATED):
+            raise NotImplementedError("Compression method %d of '%s' isn't supported"%(entry.method, name))
+
+        header=self._read_at(entry.offset, _LOCAL_HEADER.size)
+        if len(header) != _LOCAL_HEADER.size or header[:4] != _LOCAL_SIGNATURE:
+            raise BadZipFile("Bad local header of '%s'"%name)
+
+        fields=_LOCAL_HEADER.unpack(header)
+        skip=fields[10]+fields[11]
+        data=self._read_at(entry.offset+_LOCAL_HEADER.size, skip+entry.compress_size)[skip:]
+        if len(data) != entry.compress_size:
+            raise BadZipFile("Truncated data of '%s'"%name)
+
+        if entry.method == ZIP_DEFLATED:
+            try:
+                data=zlib.decompress(data, -15)
+            except zlib.error as e:
+                raise BadZipFile("Bad compressed data of '%s': %s"%(name, e))
+        if len(data) != entry.file_size or zlib.crc32(data) != entry.crc:
+            raise BadZipFile("Bad CRC-32 for file '%s'"%name)
+
+        return data
+
+
+class MappedZipFile(ZipFile):
+    """
+    A read-only `ZipFile` over a memory-mapped file. The stored and deflated members are read without copying their compressed data,
+    and `nometa.archive` copies the raw members as memoryviews of the mapping. Closing the archive unmaps the file.
+    """
+    def __init__(self, path: str) -> None:
+        """
+        Map the file and read its central directory.
+
+        Args:
+            path (str): file path of archive
+
+        Raises:
+            BadZipFile: throws when the file isn't a zip archive
+        """
+        self._map: mmap.mmap | None=None
+        with open(path, "rb") as fd:
+            try:
+                self._map=mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise BadZipFile("File is not a zip file")
+
+        try:
+            super().__init__(self._map, 'r') # type: ignore
+        except BaseException:
+            self.close()
+            raise
+
+    def read(self, name: str | ZipInfo, pwd: bytes | None=None) -> bytes:
+        """
+        Read a member, uncompressing it straight from the mapping.
+
+        Args:
+            name (str | ZipInfo): the member name or information
+            pwd (bytes | None, optional): the password of an encrypted member. Defaults to None.
+
+        Raises:
+            KeyError: throws when there's no member named `name`
+            BadZipFile: throws when the member is corrupted
+
+        Returns:
+            bytes: the uncompressed content
+        """
+        info=name if isinstance(name, ZipInfo) else self.getinfo(name)
+        if pwd is not None or info.flag_bits & _ENCRYPTED_FLAG or info.compress_type not in (ZIP_STORED, ZIP_DEFLATED):
+            return super().read(name, pwd)
+
+        offset=_data_offset(self, info)
+        with memoryview(self._map)[offset:offset+info.compress_size] as view: # type: ignore
+            if len(view) != info.compress_size:
+                raise BadZipFile("Truncated data of '%s'"%info.filename)
+            try:
+                data=zlib.decompress(view, -15) if info.compress_type == ZIP_DEFLATED else bytes(view)
+            except zlib.error as e:
+                raise BadZipFile("Bad compressed data of '%s': %s"%(info.filename, e))
+
+        if zlib.crc32(data) != info.CRC:
+            raise BadZipFile("Bad CRC-32 for file '%s'"%info.filename)
+
+        return data
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            try:
+                if self._map is not None: self._map.close()
+            except BufferError:
+                # a memoryview of a member is still alive, the mapping is released along with it
+                pass
+
+
+__all__ = ["ReadStats", "RangeReader", "MappedZipFile"]
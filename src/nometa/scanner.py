@@ -0,0 +1,194 @@
+"""
+This module reads the metadata of documents without building XML trees or property objects.
+
+It's meant for read-only workloads over large corpora. The sheets are parsed by an event parser (expat) that keeps only the text
+of the known properties, and the values are returned in a plain dict whose keys are `<sheet>.<property>`, eg. ``"core.creator"``,
+the same keys used by `nometa.batch`.
+"""
+
+from datetime import datetime
+from typing import IO, Any, Callable, Iterable, Iterator, NamedTuple
+from xml.parsers import expat
+from zipfile import BadZipFile
+from nometa.properties.boolean import _to_bool
+from nometa.pool import imap_chunks
+from nometa.reader import RangeReader
+
+SUFFIXES=frozenset({".docx", ".docm", ".dotx", ".dotm", ".xlsx", ".xlsm", ".xltx", ".xltm", ".pptx", ".pptm", ".potx", ".potm", ".ppsx", ".ppsm",
+                    ".vsdx", ".vsdm", ".vstx", ".vstm", ".accdt"})
+"""File extensions of the Office documents looked for in directories"""
+
+_CP="http://schemas.openxmlformats.org/package/2006/metadata/core-properties"
+_DC="http://purl.org/dc/elements/1.1/"
+_DCTERMS="http://purl.org/dc/terms/"
+_EP="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"
+
+
+def _text(val: str) -> str:
+    return val.strip()
+
+def _numeric(val: str) -> int|float:
+    try:
+        return int(val)
+    except ValueError:
+        try:
+            return float(val)
+        except ValueError:
+            raise ValueError("The tag value isn't numeric")
+
+def _datetime(val: str) -> datetime:
+    return datetime.strptime(val, "%Y-%m-%dT%H:%M:%SZ")
+
+
+CORE_FIELDS: dict[str, tuple[str, Callable[[str], Any]]]={
+    _DC+" title": ("core.title", _text),
+    _DC+" subject": ("core.subject", _text),
+    _CP+" keywords": ("core.keywords", _text),
+    _DC+" creator": ("core.creator", _text),
+    _DC+" description": ("core.description", _text),
+    _CP+" lastModifiedBy": ("core.last_modified_by", _text),
+    _CP+" category": ("core.category", _text),
+    _CP+" revision": ("core.revision", _numeric),
+    _DCTERMS+" created": ("core.created", _datetime),
+    _DCTERMS+" modified": ("core.modified", _datetime),
+    _CP+" contentStatus": ("core.content_status", _text),
+    _CP+" version": ("core.version", _text),
+    _DC+" identifier": ("core.identifier", _text),
+    _CP+" lastPrinted": ("core.last_printed", _datetime),
+}
+"""Expanded tag name (`<namespace> <tag>`) of `docProps/core.xml` properties mapped to key and value converter"""
+
+APP_FIELDS: dict[str, tuple[str, Callable[[str], Any]]]={
+    _EP+" Template": ("app.template", _text),
+    _EP+" TotalTime": ("app.total_time", _numeric),
+    _EP+" Application": ("app.application", _text),
+    _EP+" ScaleCrop": ("app.scale_crop", _to_bool),
+    _EP+" Manager": ("app.manager", _text),
+    _EP+" Company": ("app.company", _text),
+    _EP+" AppVersion": ("app.app_version", _text),
+}
+"""Expanded tag name (`<namespace> <tag>`) of `docProps/app.xml` properties mapped to key and value converter"""
+
+
+class ScanResult(NamedTuple):
+    """
+    The outcome of scanning one document.
+    """
+    path: str
+    """the scanned document"""
+    values: dict[str, Any] | None
+    """the metadata, it's `None` when scanning failed"""
+    error: str | None=None
+    """the error message when scanning failed"""
+
+
+def parse_sheet(raw: bytes, fields: dict[str, tuple[str, Callable[[str], Any]]], out: dict[str, Any]) -> None:
+    """
+    Parse a sheet and put the values of `fields` found among the children of root element into `out`.
+
+    Empty elements give `None`, like in `nometa.sheet`; except boolean ones, which give `False`.
+
+    Args:
+        raw (bytes): the sheet as binary
+        fields (dict[str, tuple[str, Callable[[str], Any]]]): expanded tag name mapped to key and value converter
+        out (dict[str, Any]): where the values are put
+    """
+    depth=0
+    current: tuple[str, Callable[[str], Any]] | None=None
+    collect=False
+    text: list[str]=[]
+
+    def start(name: str, attrs: dict) -> None:
+        nonlocal depth, current, collect
+        depth+=1
+        if depth == 2:
+            current=fields.get(name)
+            collect=current is not None
+            text.clear()
+        else:
+            collect=False
+
+    def end(name: str) -> None:
+        nonlocal depth, current, collect
+        if depth == 2 and current is not None:
+            key, conv=current
+            val=''.join(text)
+            out[key]=conv(val) if val or conv is _to_bool else None
+            current=None
+        collect=False
+        depth-=1
+
+    def chars(data: str) -> None:
+        if collect:
+            text.append(data)
+
+    parser=expat.ParserCreate(namespace_separator=' ')
+    parser.StartElementHandler=start
+    parser.EndElementHandler=end
+    parser.CharacterDataHandler=chars
+    parser.Parse(raw, True)
+
+def scan(file: str | IO[bytes]) -> dict[str, Any]:
+    """
+    Read the metadata of a document. Only the central directory and the two sheets are read from the file, see `nometa.reader`.
+
+    Args:
+        file (str | IO[bytes]): file path of document as string OR an in-memory buffer (`io.BytesIO`)
+
+    Raises:
+        ValueError: throws when the file isn't a MS Office document
+
+    Returns:
+        dict[str, Any]: the values of `core` properties and, if the document has an *app.xml* sheet, of `app` properties
+    """
+    try:
+        zf=RangeReader(file)
+    except (BadZipFile, OSError):
+        raise ValueError("'%s' is not a MS Office document"%file)
+
+    with zf:
+        try:
+            core=zf.read("docProps/core.xml")
+        except KeyError:
+            raise ValueError("'%s' is not a MS Office document"%file)
+
+        try:
+            app=zf.read("docProps/app.xml")
+        except KeyError:
+            app=None
+
+    out: dict[str, Any]=dict.fromkeys(key for key, _ in CORE_FIELDS.values())
+    parse_sheet(core, CORE_FIELDS, out)
+    if app is not None:
+        out.update(dict.fromkeys(key for key, _ in APP_FIELDS.values()))
+        parse_sheet(app, APP_FIELDS, out)
+
+    return out
+
+def _scan_chunk(paths: list[str]) -> list[ScanResult]:
+    out=[]
+    for path in paths:
+        try:
+            out.append(ScanResult(path, scan(path)))
+        except Exception as e:
+            out.append(ScanResult(path, None, "%s: %s"%(type(e).__name__, e)))
+
+    return out
+
+def scan_many(paths: Iterable[str], workers: int | None=None, chunksize: int=64, executor: str="process") -> Iterator[ScanResult]:
+    """
+    Read the metadata of many documents in parallel, see `nometa.pool.imap_chunks` about the pool, chunks and ordering.
+
+    Args:
+        paths (Iterable[str]): file paths of documents
+        workers (int | None, optional): number of workers. Defaults to the number of CPUs.
+        chunksize (int, optional): number of documents per task. Defaults to 64.
+        executor (str, optional): "process" or "thread". Defaults to "process".
+
+    Returns:
+        Iterator[ScanResult]: the outcome of each document
+    """
+    return imap_chunks(_scan_chunk, paths, (), workers, chunksize, executor)
+
+
+__all__ = ["SUFFIXES", "CORE_FIELDS", "APP_FIELDS", "ScanResult", "parse_sheet", "scan", "scan_many"]
@@ -1,319 +1,360 @@
 """
 This module contains the main XML sheets of metadata.
 You can extend the App and Core classes in order to add new properties.
+
+The properties of a sheet are declared once, at class level, by `Field` descriptors. Their values are kept in a slotted list,
+so a sheet instance holds only its XML tree and one value per field.
 """
 
-from lxml import etree
-from typing import cast
-from abc import ABC, abstractmethod
-from datetime import datetime
+import re
+from typing import Any, Callable, Type
+from abc import ABC
+from nometa.backends import Backend, Element, escape, check_text, get_backend
+from nometa.properties import Property, _same
 from nometa.properties.text import TextProperty
 from nometa.properties.boolean import BooleanProperty
 from nometa.properties.numeric import NumericProperty
 from nometa.properties.datetime import DatetimeProperty
 
 
-class Sheet(ABC):
+_START_TAG=re.compile(rb"""<[^\s/>]+(?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|'[^']*'))*\s*(/?)>""")
+_ENCODING=re.compile(rb"""<\?xml[^>]*?encoding\s*=\s*["']([^"']+)""")
 
-    def __init__(self, raw: bytes) -> None:
-        parser = etree.XMLParser(remove_blank_text=True, resolve_entities=False)
-        parser.set_element_class_lookup(etree.ElementNamespaceClassLookup())
-        self._xml_root=etree.fromstring(raw, parser)
+def _spliceable(raw: bytes) -> bool:
+    """
+    Tell whether the elements of `raw` can be found by their tag names: it must be UTF-8 and have no comments, CDATA sections,
+    DOCTYPE or processing instructions (other than the XML declaration).
+    """
+    if raw.startswith((b"\xff\xfe", b"\xfe\xff")) or b"<!" in raw or raw.find(b"<?", 1) >= 0:
+        return False
+    decl=_ENCODING.match(raw)
+    return decl is None or decl.group(1).lower() in (b"utf-8", b"utf8")
 
-    def pack(self) -> bytes:
-        """
-        Create the binary representation of `etree._Element`
+def _text_span(raw: bytes, qname: bytes) -> tuple[int, int, bool]|None:
+    """
+    Find where the text of the only element named `qname` is in `raw`.
 
-        Returns:
-            bytes: `etree._Element` as bytes
-        """
-        return etree.tostring(self._xml_root)
-    
-    @abstractmethod
-    def to_element(self) -> None:
-        """
-        persist changes in this instance to the `etree._Element`
-        """
-        pass
+    Returns:
+        tuple[int, int, bool]|None: the byte range of text and whether the element is empty (`<tag/>`, the range is the whole tag then),
+            or `None` when there isn't exactly one element with this name or it has child nodes
+    """
+    tag=b"<"+qname
+    found=-1
+    pos=raw.find(tag)
+    while pos >= 0:
+        if raw[pos+len(tag):pos+len(tag)+1] in (b" ", b"\t", b"\r", b"\n", b"/", b">"):
+            if found >= 0:
+                return None
+            found=pos
+        pos=raw.find(tag, pos+1)
 
+    m=_START_TAG.match(raw, found) if found >= 0 else None
+    if m is None:
+        return None
+    if m.group(1):
+        return found, m.end(), True
 
-class App(Sheet):
+    end=raw.find(b"</"+qname, m.end())
+    if end < 0 or raw.find(b"<", m.end(), end) >= 0:
+        return None
+    return m.end(), end, False
 
-    def __init__(self, raw: bytes) -> None:
+
+def _int_only(val: Any) -> Any:
+    if val is not None and type(val) != int:
+        raise TypeError("``val`` must be integer")
+
+    return val
+
+
+class Field:
+    """
+    Declare a property of a sheet, eg. ``title=Field("dc:title", TextProperty, "The title")``.
+
+    The tag name is resolved to Clark notation (``{namespace}tag``) once, when the sheet class is created, using the
+    `NAMESPACES` of the sheet class. The conversions from/to text and the validation of values are done by `kind`.
+    """
+    def __init__(self, tname: str, kind: Type[Property], doc: str|None=None, readonly: bool=False, validate: Callable[[Any], Any]|None=None) -> None:
         """
-        Create an instance of `App` representing the `docProps/app.xml` sheet.
+        Constructor
 
         Args:
-            raw (bytes): the `app.xml` sheet as binary
+            tname (str): tag name in the XML file. Eg: dc:title
+            kind (Type[Property]): the property type of tag, eg. `TextProperty`
+            doc (str | None, optional): the docstring of property. Defaults to None.
+            readonly (bool, optional): if True, the value can't be set. Defaults to False.
+            validate (Callable[[Any], Any] | None, optional): an extra check of the assigned values, run before `kind.validate`. Defaults to None.
+
+        Raises:
+            TypeError
         """
-        super().__init__(raw)
-        node=self._xml_root
-        self._template: TextProperty = cast(TextProperty, TextProperty.from_element("Template", node))
-        self._total_time: NumericProperty = cast(NumericProperty, NumericProperty.from_element("TotalTime", node))
-        self._application: TextProperty = cast(TextProperty, TextProperty.from_element("Application", node))
-        self._scale_crop: BooleanProperty = cast(BooleanProperty, BooleanProperty.from_element("ScaleCrop", node))
-        self._manager: TextProperty = cast(TextProperty, TextProperty.from_element("Manager", node))
-        self._company: TextProperty = cast(TextProperty, TextProperty.from_element("Company", node))
-        self._app_version: TextProperty = cast(TextProperty, TextProperty.from_element("AppVersion", node))
+        if type(tname) != str:
+            raise TypeError("`tname` must be string")
+
+        self.tname=tname
+        self.kind=kind
+        self.readonly=readonly
+        self.__doc__=doc
+        self._validate=validate
+        self.name=''
+        self.clark=tname
+        self.namespace: str|None=None
+        self.localname=tname
+        self.index=-1
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name=name
+
+    def _resolve(self, owner: type) -> None:
+        nsmap: dict[str|None, str]=getattr(owner, "NAMESPACES", {})
+        prefix, _, tag=self.tname.rpartition(':')
+        if self.tname.startswith('{'):
+            self.clark=self.tname
+        elif prefix:
+            if prefix not in nsmap:
+                raise ValueError("the prefix of '%s' isn't in %s.NAMESPACES"%(self.tname, owner.__name__))
+            self.clark="{%s}%s"%(nsmap[prefix], tag)
+        else:
+            self.clark="{%s}%s"%(nsmap[None], tag) if None in nsmap else tag
+        if self.clark.startswith('{'):
+            self.namespace, _, self.localname=self.clark[1:].partition('}')
+        else:
+            self.namespace, self.localname=None, self.clark
+
+    def __get__(self, obj: "Sheet|None", owner: type|None=None) -> Any:
+        if obj is None:
+            return self
+        return obj._values[self.index]
+
+    def __set__(self, obj: "Sheet", val: Any) -> None:
+        if self.readonly:
+            raise AttributeError("property '%s' of '%s' object has no setter"%(self.name, type(obj).__name__))
+        if self._validate is not None:
+            val=self._validate(val)
+        val=self.kind.validate(val)
+        if not _same(obj._values[self.index], val):
+            obj._values[self.index]=val
+            obj._dirty|=1 << self.index
+
+
+class Sheet(ABC):
+    """
+    Base class of XML sheets. Subclasses declare their properties as `Field` class attributes.
+    """
+    __slots__=("_xml_root", "_values", "_dirty", "_raw", "_backend")
+
+    NAMESPACES: dict[str|None, str]={}
+    """Prefixes of the tag names of `Field` declarations mapped to namespaces, `None` is the default namespace"""
+
+    BACKEND: str|None=None
+    """The name of XML backend that parses and writes the sheet (see `nometa.backends`), `None` is the default backend"""
+
+    _fields: tuple[Field, ...]=()
+    _tags: dict[str, Field]={}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        fields=list(cls._fields)
+        for val in vars(cls).values():
+            if not isinstance(val, Field):
+                continue
+            val._resolve(cls)
+            old=next((it for it in fields if it.name == val.name), None)
+            if old is not None:
+                val.index=old.index
+                fields[old.index]=val
+            else:
+                val.index=len(fields)
+                fields.append(val)
+
+        cls._fields=tuple(fields)
+        tags: dict[str, Field]={}
+        for it in fields:
+            if it.clark != it.tname and ':' not in it.tname:
+                tags[it.tname]=it
+        for it in fields:
+            tags[it.clark]=it
+        cls._tags=tags
+
+    def __init__(self, raw: bytes) -> None:
+        self._backend: Backend=get_backend(self.BACKEND)
+        self._xml_root=self._backend.parse(raw)
+        self._raw=raw
+        self._values=[field.kind.from_text(node.text) if node is not None else None for field, node in zip(self._fields, self._nodes())]
+        self._dirty=0
 
-    def to_element(self) -> None:
-        node=self._xml_root
-        self._template.to_element(node)
-        self._total_time.to_element(node)
-        self._application.to_element(node)
-        self._scale_crop.to_element(node)
-        self._manager.to_element(node)
-        self._company.to_element(node)
-        self._app_version.to_element(node)
-
-        return node
-    
     @property
-    def template(self) -> str|None:
+    def dirty(self) -> bool:
         """
-        The document's template. It's a read-only property.
+        Tell whether a property has changed since the sheet was read. The `Property` objects kept by subclasses are checked too.
         """
-        return self._template.value
-    
-    @property
-    def total_time(self) -> int|None:
-        """The work time (measured in minutes)."""
-        return cast(int, self._total_time.value)
-    
-    @total_time.setter
-    def total_time(self, val: int) -> None:
-        if type(val) != int:
-            raise TypeError("``val`` must be an integer")
-        
-        self._total_time.value=val
-    
-    @property
-    def application(self) -> str|None:
-        """The description name of application"""
-        return self._application.value
-    
-    @application.setter
-    def application(self, val: str) -> None:
-        self._application.value=val
-    
-    @property
-    def scale_crop(self) -> bool|None:
+        if self._dirty:
+            return True
+
+        return any(isinstance(it, Property) and it.dirty for it in getattr(self, "__dict__", {}).values())
+
+    def _clean(self, raw: bytes|None=None) -> None:
         """
-        Scale crop.
-        
-        This element indicates the display mode of the document thumbnail.
-        Set this element to TRUE to enable scaling of the document thumbnail to the display. 
-        Set this element to FALSE to enable cropping of the document thumbnail to show only sections that fits the display.
+        Forget the changes, after they have been written into the document read. `raw` is the sheet written, if any.
+        The changes are written to the tree first, it may be behind when they have been spliced.
         """
-        return self._scale_crop.value
-    
-    @scale_crop.setter
-    def scale_crop(self, val: bool) -> None:
-        self._scale_crop.value=val
-    
-    @property
-    def manager(self) -> str|None:
-        """Manager name"""
-        return self._manager.value
-    
-    @manager.setter
-    def manager(self, val: str) -> None:
-        self._manager.value=val
-    
-    @property
-    def company(self) -> str|None:
-        """Company name"""
-        return self._company.value
-    
-    @company.setter
-    def company(self, val: str) -> None:
-        self._company.value=val
-    
-    @property
-    def app_version(self) -> str|None:
-        """The application version. eg. 14.0000"""
-        return self._app_version.value
-    
-    @app_version.setter
-    def app_version(self, val: str) -> None:
-        self._app_version.value=val
+        if raw is not None:
+            self._raw=raw
+        self.to_element()
+        self._dirty=0
+        for it in getattr(self, "__dict__", {}).values():
+            if isinstance(it, Property):
+                it._dirty=False
+
+    def _nodes(self) -> list[Element|None]:
+        """
+        Find the first node of each field among the children of root element.
+        """
+        nodes: list[Element|None]=[None]*len(self._fields)
+        tags=self._tags
+        for child in reversed(self._xml_root):
+            field=tags.get(child.tag)
+            if field is not None:
+                nodes[field.index]=child
 
+        return nodes
 
-class Core(Sheet):
+    def pack(self) -> bytes:
+        """
+        Create the binary representation of the XML tree
 
-    def __init__(self, raw: bytes) -> None:
+        Returns:
+            bytes: the tree as bytes
         """
-        Create an instance of `Core` representing the `docProps/core.xml` sheet.
+        return self._backend.tostring(self._xml_root)
 
-        Args:
-            raw (bytes): the `core.xml` sheet as binary
+    def splice(self) -> bytes|None:
         """
-        super().__init__(raw)
-        node=self._xml_root
-        self._title: TextProperty = cast(TextProperty, TextProperty.from_element("dc:title", node))
-        self._subject: TextProperty = cast(TextProperty, TextProperty.from_element("dc:subject", node))
-        self._keyword: TextProperty = cast(TextProperty, TextProperty.from_element("cp:keywords", node))
-        self._creator: TextProperty = cast(TextProperty, TextProperty.from_element("dc:creator", node))
-        self._description: TextProperty = cast(TextProperty, TextProperty.from_element("dc:description", node))
-        self._lastmdod: TextProperty = cast(TextProperty, TextProperty.from_element("cp:lastModifiedBy", node))
-        self._category: TextProperty = cast(TextProperty, TextProperty.from_element("cp:category",node))
-        self._revision: NumericProperty = cast(NumericProperty, NumericProperty.from_element("cp:revision",node))
-        self._created: DatetimeProperty = cast(DatetimeProperty, DatetimeProperty.from_element("dcterms:created",node))
-        self._modified: DatetimeProperty = cast(DatetimeProperty, DatetimeProperty.from_element("dcterms:modified",node))
-        self._contentstat: TextProperty = cast(TextProperty, TextProperty.from_element("cp:contentStatus",node))
-        self._version: TextProperty = cast(TextProperty, TextProperty.from_element("cp:version", node))
-        self._identifier: TextProperty = cast(TextProperty, TextProperty.from_element("dc:identifier", node))
-        self._last_printed: DatetimeProperty = cast(DatetimeProperty, DatetimeProperty.from_element("cp:lastPrinted", node))
-        
-    def to_element(self) -> None:
-        node=self._xml_root
-        self._title.to_element(node)
-        self._subject.to_element(node)
-        self._keyword.to_element(node)
-        self._creator.to_element(node)
-        self._description.to_element(node)
-        self._lastmdod.to_element(node)
-        self._category.to_element(node)
-        self._revision.to_element(node)
-        self._created.to_element(node)
-        self._modified.to_element(node)
-        self._contentstat.to_element(node)
-        self._version.to_element(node)
-        self._identifier.to_element(node)
-        self._last_printed.to_element(node)
+        Write the changed properties into the original bytes of sheet, the other bytes stay identical (unlike `pack`,
+        which serializes the whole tree again and drops the blank text and the XML declaration).
 
-    @property
-    def title(self) -> str|None:
-        """The title"""
-        return self._title.value
-    
-    @title.setter
-    def title(self, val: str) -> None:
-        self._title.value=val
-    
-    @property
-    def subject(self) -> str|None:
-        """The subject"""
-        return self._subject.value
-    
-    @subject.setter
-    def subject(self, val: str) -> None:
-        self._subject.value=val
-    
-    @property
-    def keywords(self) -> str|None:
+        The text of changed elements is replaced in place. It can't be done when a changed property has no element yet, or its element
+        has child nodes or isn't the only one with its tag name, or the sheet isn't a plain UTF-8 document (see `_spliceable`),
+        or a subclass keeps its own `Property` objects with changes; then `None` is returned and `to_element` and `pack` must be used.
+
+        Raises:
+            ValueError: throws when a changed value has characters that XML doesn't allow, like `to_element` does
+
+        Returns:
+            bytes|None: the sheet as binary, or `None` when the changes can't be spliced
         """
-        The keywords.
-        
-        It is not compliance with CT_Keywords complex type specification.
-        It's a simplified implementation that doesn't support multiple languages.
+        dirty=self._dirty
+        if any(isinstance(it, Property) and it.dirty for it in getattr(self, "__dict__", {}).values()):
+            return None
+        if not dirty:
+            return self._raw
+
+        raw=self._raw
+        if not _spliceable(raw):
+            return None
+
+        prefixes={uri: prefix for prefix, uri in self._xml_root.nsmap.items()}
+        edits: list[tuple[int, int, bytes]]=[]
+        for field in self._fields:
+            if not dirty >> field.index & 1:
+                continue
+            prefix=prefixes.get(field.namespace) if field.namespace else None
+            qname=(prefix+':'+field.localname if prefix else field.localname).encode("utf-8")
+            span=_text_span(raw, qname)
+            if span is None:
+                return None
+            begin, end, empty=span
+            data=escape(check_text(field.kind.to_text(self._values[field.index]) or ''), {"\r": "&#13;"}).encode("utf-8")
+            if empty:
+                if not data: continue
+                data=raw[begin:end-2].rstrip()+b">"+data+b"</"+qname+b">"
+            edits.append((begin, end, data))
+
+        out=bytearray()
+        pos=0
+        for begin, end, data in sorted(edits):
+            out+=raw[pos:begin]
+            out+=data
+            pos=end
+        out+=raw[pos:]
+        return bytes(out)
+
+    def to_element(self) -> None:
+        """
+        persist changes in this instance to the XML tree. Only the changed properties are written, see `dirty`.
         """
-        return self._keyword.value
-    
-    @keywords.setter
-    def keywords(self, val: str) -> None:
-        self._keyword.value=val
+        dirty=self._dirty
+        if not dirty:
+            return
 
-    @property
-    def creator(self) -> str|None:
-        """The creator/author"""
-        return self._creator.value
-    
-    @creator.setter
-    def creator(self, val: str) -> None:
-        self._creator.value=val
+        root=self._xml_root
+        values=self._values
+        for field, node in zip(self._fields, self._nodes()):
+            if not dirty >> field.index & 1:
+                continue
+            val=values[field.index]
+            if node is None:
+                if val is None:
+                    continue
+                node=root.makeelement(field.clark)
+                root.append(node)
+            node.text=field.kind.to_text(val)
 
-    @property
-    def description(self) -> str|None:
-        """The description"""
-        return self._description.value
-    
-    @description.setter
-    def description(self, val: str) -> None:
-        self._description.value=val
 
-    @property
-    def last_modified_by(self) -> str|None:
-        """The last person that modified the document"""
-        return self._lastmdod.value
-    
-    @last_modified_by.setter
-    def last_modified_by(self, val: str) -> None:
-        self._lastmdod.value=val
+class App(Sheet):
+    """
+    The `docProps/app.xml` sheet, see `Sheet.__init__`.
+    """
+    __slots__=()
 
-    @property
-    def category(self) -> str|None:
-        """The category"""
-        return self._category.value
-    
-    @category.setter
-    def category(self, val: str) -> None:
-        self._category.value=val
+    NAMESPACES={None: "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"}
 
-    @property
-    def revision(self) -> int|None:
-        """The revision"""
-        return cast(int, self._revision.value)
-    
-    @revision.setter
-    def revision(self, val: int) -> None:
-        if type(val) != int:
-            raise TypeError("``val`` must be integer")
-        
-        self._revision.value=val
+    template=Field("Template", TextProperty, "The document's template. It's a read-only property.", readonly=True)
+    total_time=Field("TotalTime", NumericProperty, "The work time (measured in minutes).", validate=_int_only)
+    application=Field("Application", TextProperty, "The description name of application")
+    scale_crop=Field("ScaleCrop", BooleanProperty, """
+        Scale crop.
 
-    @property
-    def created(self) -> datetime|None:
-        """When the document was created"""
-        return self._created.value
-    
-    @created.setter
-    def created(self, val: datetime) -> None:
-        self._created.value=val
+        This element indicates the display mode of the document thumbnail.
+        Set this element to TRUE to enable scaling of the document thumbnail to the display.
+        Set this element to FALSE to enable cropping of the document thumbnail to show only sections that fits the display.
+        """)
+    manager=Field("Manager", TextProperty, "Manager name")
+    company=Field("Company", TextProperty, "Company name")
+    app_version=Field("AppVersion", TextProperty, "The application version. eg. 14.0000")
 
-    @property
-    def modified(self) -> datetime|None:
-        """When the document was modified"""
-        return self._modified.value
-    
-    @modified.setter
-    def modified(self, val: datetime) -> None:
-        self._modified.value=val
 
-    @property
-    def content_status(self) -> str|None:
-        """
-        The content status, its value should be 'Draft', 'Reviewed' or 'Final'.
-        """
-        return self._contentstat.value
-    
-    @content_status.setter
-    def content_status(self, val: str) -> None:
-        self._contentstat.value=val
+class Core(Sheet):
+    """
+    The `docProps/core.xml` sheet, see `Sheet.__init__`.
+    """
+    __slots__=()
 
-    @property
-    def version(self) -> str|None:
-        """The version"""
-        return self._version.value
-    
-    @version.setter
-    def version(self, val: str) -> None:
-        self._version.value=val
-    
-    @property
-    def identifier(self) -> str|None:
-        """The document's identifier. Only some documents apply it"""
-        return self._identifier.value
-    
-    @identifier.setter
-    def identifier(self, val: str) -> None:
-        self._identifier.value=val
+    NAMESPACES={
+        "cp": "http://schemas.openxmlformats.org/package/2006/metadata/core-properties",
+        "dc": "http://purl.org/dc/elements/1.1/",
+        "dcterms": "http://purl.org/dc/terms/",
+    }
 
-    @property
-    def last_printed(self) -> datetime|None:
-        """When the document was printed"""
-        return self._last_printed.value
-    
-    @last_printed.setter
-    def last_printed(self, val: datetime) -> None:
-        self._last_printed.value=val
\ No newline at end of file
+    title=Field("dc:title", TextProperty, "The title")
+    subject=Field("dc:subject", TextProperty, "The subject")
+    keywords=Field("cp:keywords", TextProperty, """
+        The keywords.
+
+        It is not compliance with CT_Keywords complex type specification.
+        It's a simplified implementation that doesn't support multiple languages.
+        """)
+    creator=Field("dc:creator", TextProperty, "The creator/author")
+    description=Field("dc:description", TextProperty, "The description")
+    last_modified_by=Field("cp:lastModifiedBy", TextProperty, "The last person that modified the document")
+    category=Field("cp:category", TextProperty, "The category")
+    revision=Field("cp:revision", NumericProperty, "The revision", validate=_int_only)
+    created=Field("dcterms:created", DatetimeProperty, "When the document was created")
+    modified=Field("dcterms:modified", DatetimeProperty, "When the document was modified")
+    content_status=Field("cp:contentStatus", TextProperty, "The content status, its value should be 'Draft', 'Reviewed' or 'Final'.")
+    version=Field("cp:version", TextProperty, "The version")
+    identifier=Field("dc:identifier", TextProperty, "The document's identifier. Only some documents apply it")
+    last_printed=Field("cp:lastPrinted", DatetimeProperty, "When the document was printed")
+
+
+__all__ = ["Field", "Sheet", "App", "Core"]
@@ -0,0 +1,8 @@
+from nometa.backends import get_backend, set_default_backend
+from pytest import fixture
+
+@fixture(params=["lxml","expat"])
+def backend(request):
+    set_default_backend(request.param)
+    yield get_backend(request.param)
+    set_default_backend(None)
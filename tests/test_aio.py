@@ -0,0 +1,105 @@
+from nometa import Document
+from nometa.sheet import App, Core
+from nometa.aio import AsyncDocument
+from pytest import raises
+from unittest import mock
+import asyncio
+import inspect
+import io
+
+RESOURCE_PATH="tests/resource/"
+
+async def chunks(path, size=1024):
+    with open(path, "rb") as fd:
+        while chunk := fd.read(size):
+            await asyncio.sleep(0)
+            yield chunk
+
+class Response:
+    def __init__(self) -> None:
+        self.body=bytearray()
+
+    async def write(self, data: bytes) -> None:
+        await asyncio.sleep(0)
+        self.body+=data
+
+def test_open_and_save_path(tmp_path):
+    async def job():
+        async with await AsyncDocument.open(RESOURCE_PATH+"test.docx",Core,App) as doc:
+            doc.core.creator="Johnny Test"
+            await doc.save(str(tmp_path/"test2.docx"))
+
+    asyncio.run(job())
+    assert Document(str(tmp_path/"test2.docx"),Core,App).core.creator == "Johnny Test"
+
+def test_stream_in_stream_out():
+    resp=Response()
+    async def job():
+        async with await AsyncDocument.open(chunks(RESOURCE_PATH+"test.pptx"),Core,App) as doc:
+            doc.app.company="Silverlayer"
+            await doc.save(resp)
+
+    asyncio.run(job())
+    assert Document(io.BytesIO(resp.body),Core,App).app.company == "Silverlayer"
+
+def test_stream_save_options():
+    resp=Response()
+    async def job():
+        async with await AsyncDocument.open(RESOURCE_PATH+"test.pptx",Core,App) as doc:
+            doc.app.company="Silverlayer"
+            await doc.save(resp, optimize=True, deterministic=True)
+            return b''.join(doc.document.iter_bytes(optimize=True, deterministic=True))
+
+    assert asyncio.run(job()) == resp.body
+    with io.BytesIO() as buff:
+        doc=Document(RESOURCE_PATH+"test.pptx",Core,App)
+        doc.app.company="Silverlayer"
+        doc.save(buff)
+        assert len(resp.body) < len(buff.getvalue())
+
+def test_failed_stream_closes_chunks():
+    class Broken:
+        async def write(self, data: bytes) -> None:
+            raise ConnectionResetError
+
+    async def job():
+        async with await AsyncDocument.open(RESOURCE_PATH+"test.docx",Core,App) as doc:
+            gens=[]
+            iter_bytes=doc.document.iter_bytes
+            with mock.patch.object(doc.document, "iter_bytes", lambda *args: gens.append(iter_bytes(*args)) or gens[-1]):
+                with raises(ConnectionResetError):
+                    await doc.save(Broken())
+            return gens
+
+    gens=asyncio.run(job())
+    assert len(gens) == 1 and inspect.getgeneratorstate(gens[0]) == inspect.GEN_CLOSED
+
+def test_save_buffer():
+    buff=io.BytesIO()
+    async def job():
+        async with await AsyncDocument.open(RESOURCE_PATH+"test.xlsx",Core,App) as doc:
+            doc.core.revision=9
+            await doc.save(buff, compresslevel=9, workers=2)
+
+    asyncio.run(job())
+    assert Document(buff,Core,App).core.revision == 9
+
+def test_bounded_concurrency():
+    files=["test.docx","test.xlsx","test.pptx","test.vsdx","test.accdt"]
+    async def job():
+        sem=asyncio.Semaphore(2)
+        docs=await asyncio.gather(*(AsyncDocument.open(RESOURCE_PATH+it,Core,App,semaphore=sem) for it in files))
+        for doc in docs:
+            await doc.close()
+        return [doc.core.creator for doc in docs]
+
+    assert asyncio.run(job()) == [Document(RESOURCE_PATH+it,Core,App).core.creator for it in files]
+
+def test_open_invalid_stream():
+    async def job():
+        async def garbage():
+            yield b"not a document"
+        await AsyncDocument.open(garbage(),Core,App)
+
+    with raises(ValueError):
+        asyncio.run(job())
@@ -1,9 +1,11 @@
 from nometa.properties.text import TextProperty
 from nometa.properties.numeric import NumericProperty
 from nometa.properties.boolean import BooleanProperty
-from lxml import etree
+from nometa.backends import Element
 from pytest import fixture, mark, raises
 
+pytestmark=mark.usefixtures("backend")
+
 XML=bytes("""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"
     xmlns:vt="http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes">
@@ -43,10 +45,8 @@ XML=bytes("""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 ""","utf8")
 
 @fixture
-def xml_root() -> etree._Element:
-    parser = etree.XMLParser(remove_blank_text=True, resolve_entities=False)
-    parser.set_element_class_lookup(etree.ElementNamespaceClassLookup())
-    return etree.fromstring(XML, parser)
+def xml_root(backend) -> Element:
+    return backend.parse(XML)
 
 
 @mark.parametrize("tname,expected",[
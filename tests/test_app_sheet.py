@@ -1,6 +1,8 @@
 from nometa.sheet import App
 from pytest import fixture, raises, mark
 
+pytestmark=mark.usefixtures("backend")
+
 @fixture
 def bxml() -> bytes:
     return bytes("""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
@@ -0,0 +1,319 @@
+from nometa import Document
+from nometa.sheet import App, Core
+from nometa.archive import copy_archive, recover, replace_atomic, SHEET_NAMES, CHUNK_SIZE, STREAM_SIZE, FIXED_DATE_TIME
+from nometa.compact import compact_policy
+from nometa.batch import process_file
+from zipfile import ZipFile, ZipInfo, BadZipFile, ZIP_STORED, ZIP_DEFLATED
+from pytest import mark, raises
+from unittest import mock
+import shutil
+import tracemalloc
+import io
+import os
+
+RESOURCE_PATH="tests/resource/"
+
+@mark.parametrize("file",["test.docx","test.xlsx","test.pptx","test.vsdx","test.accdt"])
+def test_untouched_members_are_raw_copies(file):
+    buff=io.BytesIO()
+    doc=Document(RESOURCE_PATH+file,Core,App)
+    doc.core.creator="Johnny Test"
+    doc.save(buff)
+
+    with ZipFile(RESOURCE_PATH+file) as zin, ZipFile(buff) as zout:
+        assert zout.testzip() is None
+        for it in zin.infolist():
+            if it.filename in SHEET_NAMES: continue
+            ot=zout.getinfo(it.filename)
+            assert (ot.CRC, ot.compress_size, ot.file_size, ot.compress_type) == (it.CRC, it.compress_size, it.file_size, it.compress_type)
+            assert zout.read(ot) == zin.read(it)
+
+def test_copy_keeps_stored_members():
+    src=io.BytesIO()
+    with ZipFile(src, 'w') as zw:
+        zw.writestr("media/image.png", b"\x89PNG"+bytes(range(256))*4, compress_type=ZIP_STORED)
+        zw.comment=b"nometa"
+
+    dst=io.BytesIO()
+    with ZipFile(src) as zin, ZipFile(dst, 'w') as zout:
+        copy_archive(zin, zout)
+
+    with ZipFile(dst) as zr:
+        it=zr.getinfo("media/image.png")
+        assert it.compress_type == ZIP_STORED and zr.comment == b"nometa" and zr.testzip() is None
+
+def test_save_memory_is_bounded(tmp_path):
+    path=str(tmp_path/"big.docx")
+    shutil.copy(RESOURCE_PATH+"test.docx", path)
+    with ZipFile(path, 'a') as zw:
+        with zw.open(ZipInfo("word/media/video.mp4"), 'w') as dst:
+            for _ in range(32):
+                dst.write(os.urandom(CHUNK_SIZE))
+
+    doc=Document(path,Core,App)
+    doc.core.creator="Johnny Test"
+    tracemalloc.start()
+    try:
+        doc.save(str(tmp_path/"big2.docx"))
+        _, peak=tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < 3*CHUNK_SIZE
+    with ZipFile(tmp_path/"big2.docx") as zr:
+        assert zr.getinfo("word/media/video.mp4").file_size == 32*CHUNK_SIZE
+
+@mark.parametrize("workers",[1,4,None])
+def test_save_recompresses_in_order(workers):
+    buff=io.BytesIO()
+    doc=Document(RESOURCE_PATH+"test.pptx",Core,App)
+    doc.core.creator="Johnny Test"
+    doc.save(buff, compresslevel=9, workers=workers)
+
+    with ZipFile(RESOURCE_PATH+"test.pptx") as zin, ZipFile(buff) as zout:
+        assert zout.testzip() is None
+        names=[it.filename for it in zin.infolist() if it.filename not in SHEET_NAMES]
+        assert [it.filename for it in zout.infolist()] == names+list(SHEET_NAMES)
+        for name in names:
+            it, ot=zin.getinfo(name), zout.getinfo(name)
+            assert ot.compress_type == ZIP_DEFLATED and ot.date_time == it.date_time and zout.read(ot) == zin.read(it)
+    assert Document(buff,Core,App).core.creator == "Johnny Test"
+
+def test_recompression_level():
+    sizes=[]
+    for level in (0, 9):
+        buff=io.BytesIO()
+        Document(RESOURCE_PATH+"test.docx",Core,App).save(buff, compresslevel=level, workers=2)
+        with ZipFile(buff) as zr:
+            sizes.append(zr.getinfo("word/document.xml").compress_size)
+    assert sizes[0] > sizes[1]
+
+@mark.parametrize("method,options",[(ZIP_STORED, {"compresslevel": 1, "workers": 2}), (ZIP_DEFLATED, {"policy": compact_policy()})])
+def test_recompression_memory_is_bounded(tmp_path, method, options):
+    path=str(tmp_path/"big.docx")
+    shutil.copy(RESOURCE_PATH+"test.docx", path)
+    info=ZipInfo("word/media/video.mp4")
+    info.compress_type=method
+    with ZipFile(path, 'a') as zw:
+        with zw.open(info, 'w') as dst:
+            for _ in range(STREAM_SIZE//CHUNK_SIZE+4):
+                dst.write(os.urandom(CHUNK_SIZE))
+
+    doc=Document(path,Core,App)
+    doc.core.creator="Johnny Test"
+    tracemalloc.start()
+    try:
+        doc.save(str(tmp_path/"big2.docx"), **options)
+        _, peak=tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < 5*CHUNK_SIZE
+    with ZipFile(path) as zin, ZipFile(tmp_path/"big2.docx") as zout:
+        assert zout.testzip() is None
+        assert zout.getinfo("word/media/video.mp4").file_size == (STREAM_SIZE//CHUNK_SIZE+4)*CHUNK_SIZE
+        assert zout.read("word/media/video.mp4") == zin.read("word/media/video.mp4")
+
+@mark.parametrize("file",["test.docx","test.pptx"])
+def test_streamed_recompression_matches(file):
+    outputs=[]
+    for size in (STREAM_SIZE, 0):
+        buff=io.BytesIO()
+        with mock.patch("nometa.archive.STREAM_SIZE", size):
+            Document(RESOURCE_PATH+file,Core,App).save(buff, policy=compact_policy(), deterministic=True)
+        outputs.append(buff.getvalue())
+    assert outputs[0] == outputs[1]
+
+def test_recompression_detects_corruption():
+    src=io.BytesIO()
+    with ZipFile(src, 'w', compression=ZIP_DEFLATED) as zw:
+        zw.writestr("docProps/core.xml", Document(RESOURCE_PATH+"test.docx",Core,App).core.pack())
+        zw.writestr("word/document.xml", b"<w:document/>"*100)
+    raw=bytearray(src.getvalue())
+    raw[raw.index(b"word/document.xml")+len("word/document.xml")+2]^=0xFF
+
+    doc=Document(io.BytesIO(bytes(raw)),Core,App)
+    with raises(BadZipFile):
+        doc.save(io.BytesIO(), compresslevel=6, workers=2)
+    with raises(BadZipFile), mock.patch("nometa.archive.STREAM_SIZE", 0):
+        doc.save(io.BytesIO(), compresslevel=6)
+
+@mark.parametrize("file",["test.docx","test.pptx","test.accdt"])
+def test_update_inplace(tmp_path, file):
+    path=str(tmp_path/file)
+    shutil.copy(RESOURCE_PATH+file, path)
+    size=os.path.getsize(path)
+    doc=Document(path,Core,App)
+    doc.core.creator="Johnny Test"
+    doc.update()
+
+    new_doc=Document(path,Core,App)
+    assert new_doc.core.creator == "Johnny Test" and not os.path.exists(path+".nometa-journal")
+    with ZipFile(RESOURCE_PATH+file) as zin, ZipFile(path) as zout:
+        assert zout.testzip() is None and sorted(zout.namelist()) == sorted(zin.namelist())
+    assert os.path.getsize(path) < size+4096
+
+def test_update_inplace_overwrites_member_that_fits(tmp_path):
+    path=str(tmp_path/"test.docx")
+    shutil.copy(RESOURCE_PATH+"test.docx", path)
+    offset=ZipFile(path).getinfo("docProps/core.xml").header_offset
+    doc=Document(path,Core,App)
+    doc.core.creator=None
+    doc.update()
+
+    assert ZipFile(path).getinfo("docProps/core.xml").header_offset == offset
+
+def test_recover_interrupted_update(tmp_path):
+    path=str(tmp_path/"test.xlsx")
+    shutil.copy(RESOURCE_PATH+"test.xlsx", path)
+    with open(path, "rb") as fd:
+        original=fd.read()
+
+    def crash(*args):
+        raise KeyboardInterrupt()
+
+    doc=Document(path,Core,App)
+    doc.core.creator="x"*4096
+    with mock.patch("nometa.archive._append_raw", crash), raises(KeyboardInterrupt):
+        doc.update()
+
+    with open(path, "rb") as fd:
+        assert fd.read() == original
+    assert not os.path.exists(path+".nometa-journal")
+
+def test_recover_after_crash(tmp_path):
+    path=str(tmp_path/"test.xlsx")
+    shutil.copy(RESOURCE_PATH+"test.xlsx", path)
+    with open(path, "rb") as fd:
+        original=fd.read()
+
+    def crash(path):
+        raise SystemExit()
+
+    doc=Document(path,Core,App)
+    doc.core.creator="Jane Roe"
+    with mock.patch("nometa.archive._remove_journal", crash), raises(SystemExit):
+        doc.update()
+
+    assert recover(path) and not os.path.exists(path+".nometa-journal")
+    with open(path, "rb") as fd:
+        assert fd.read() == original
+
+def test_update_fallback(tmp_path):
+    path=str(tmp_path/"test.docx")
+    shutil.copy(RESOURCE_PATH+"test.docx", path)
+    doc=Document(path,Core,App)
+    doc.app.company="Silverlayer"
+    with mock.patch("nometa.update_inplace", return_value=False):
+        with raises(IOError):
+            doc.update(fallback=False)
+        doc.update()
+
+    assert Document(path,Core,App).app.company == "Silverlayer" and os.listdir(tmp_path) == ["test.docx"]
+
+def test_update_buffer():
+    with open(RESOURCE_PATH+"test.docx", "rb") as fd:
+        doc=Document(fd,Core,App)
+        with raises(IOError):
+            doc.update()
+
+@mark.parametrize("file",["test.docx","test.xlsx"])
+def test_unchanged_sheets_are_raw_copies(file):
+    buff=io.BytesIO()
+    doc=Document(RESOURCE_PATH+file,Core,App)
+    doc.core.creator=doc.core.creator
+    doc.app.company="Dirty Company"
+    doc.save(buff)
+
+    with ZipFile(RESOURCE_PATH+file) as zin, ZipFile(buff) as zout:
+        it, ot=zin.getinfo("docProps/core.xml"), zout.getinfo("docProps/core.xml")
+        assert (ot.CRC, ot.compress_size) == (it.CRC, it.compress_size)
+        assert zout.getinfo("docProps/app.xml").CRC != zin.getinfo("docProps/app.xml").CRC
+
+def test_update_without_changes_writes_nothing(tmp_path):
+    path=str(tmp_path/"test.docx")
+    shutil.copy(RESOURCE_PATH+"test.docx", path)
+    os.utime(path, ns=(0, 0))
+    doc=Document(path,Core,App)
+    doc.core.title=doc.core.title
+    with mock.patch("nometa.archive.ZipFile", side_effect=AssertionError):
+        doc.update()
+
+    assert os.stat(path).st_mtime_ns == 0
+
+def test_update_forgets_written_changes(tmp_path):
+    path=str(tmp_path/"test.docx")
+    shutil.copy(RESOURCE_PATH+"test.docx", path)
+    doc=Document(path,Core,App)
+    doc.core.creator="Jane Roe"
+    doc.update()
+    assert not doc.core.dirty and doc.core.creator == "Jane Roe"
+
+def edited(file: str | io.BytesIO, now: float, **kw) -> bytes:
+    buff=io.BytesIO()
+    doc=Document(file if isinstance(file, io.BytesIO) else RESOURCE_PATH+file,Core,App)
+    doc.core.creator="Jane Test"
+    with mock.patch("time.time", return_value=now):
+        doc.save(buff, **kw)
+    return buff.getvalue()
+
+@mark.parametrize("file",["test.docx","test.xlsx","test.pptx","test.vsdx","test.accdt"])
+def test_deterministic_save(file):
+    assert edited(file, 1e9) != edited(file, 2e9)
+    raw=edited(file, 1e9, deterministic=True)
+    assert raw == edited(file, 2e9, deterministic=True, workers=3)
+    with ZipFile(io.BytesIO(raw)) as zf:
+        assert zf.testzip() is None
+        for it in zf.infolist():
+            assert it.date_time == FIXED_DATE_TIME and (it.create_system, it.external_attr) == (0, 0)
+    assert Document(io.BytesIO(raw),Core,App).core.creator == "Jane Test"
+
+def test_deterministic_save_normalizes_headers():
+    def source(date_time: tuple, extra: bytes, attr: int) -> io.BytesIO:
+        buff=io.BytesIO()
+        with ZipFile(RESOURCE_PATH+"test.docx") as zin, ZipFile(buff, 'w', compression=ZIP_DEFLATED) as zout:
+            for it in zin.infolist():
+                info=ZipInfo(it.filename, date_time)
+                info.extra=extra
+                info.external_attr=attr
+                zout.writestr(info, zin.read(it), compress_type=ZIP_DEFLATED)
+        return buff
+
+    ut=lambda mtime: b"UT\x05\x00\x01"+mtime.to_bytes(4, "little")
+    first=source((2020, 1, 2, 3, 4, 6), ut(1577934246), 0o644 << 16)
+    second=source((2024, 5, 6, 7, 8, 10), ut(1714979290), 0o600 << 16)
+    assert edited(first, 1e9) != edited(second, 1e9)
+    assert edited(first, 1e9, deterministic=True) == edited(second, 2e9, deterministic=True)
+
+def test_deterministic_iter_bytes():
+    doc=Document(RESOURCE_PATH+"test.pptx",Core,App)
+    doc.core.creator="Jane Test"
+    assert b''.join(doc.iter_bytes(deterministic=True)) == edited("test.pptx", 1e9, deterministic=True)
+
+def test_deterministic_in_place(tmp_path):
+    outputs=[]
+    for name in ("a.docx", "b.docx"):
+        shutil.copy(RESOURCE_PATH+"test.docx", tmp_path/name)
+        with mock.patch("time.time", return_value=1e9 if name == "a.docx" else 2e9):
+            assert process_file(str(tmp_path/name), {"core.creator": "Jane Test"}, deterministic=True).status == "saved"
+        outputs.append((tmp_path/name).read_bytes())
+    assert outputs[0] == outputs[1]
+
+def test_replace_atomic_permissions(tmp_path):
+    umask=os.umask(0o022)
+    try:
+        replace_atomic(str(tmp_path/"new.bin"), lambda fw: fw.write(b"new"))
+    finally:
+        os.umask(umask)
+    assert (tmp_path/"new.bin").read_bytes() == b"new" and os.stat(tmp_path/"new.bin").st_mode & 0o777 == 0o644
+
+    def fail(fw):
+        fw.write(b"partial")
+        raise ValueError()
+
+    os.chmod(tmp_path/"new.bin", 0o600)
+    with raises(ValueError):
+        replace_atomic(str(tmp_path/"new.bin"), fail)
+    assert os.listdir(tmp_path) == ["new.bin"] and (tmp_path/"new.bin").read_bytes() == b"new"
+    replace_atomic(str(tmp_path/"new.bin"), lambda fw: fw.write(b"newer"))
+    assert os.stat(tmp_path/"new.bin").st_mode & 0o777 == 0o600
@@ -0,0 +1,79 @@
+from nometa.backends import get_backend, set_default_backend, is_element
+from nometa.backends.expat_backend import Comment
+from nometa.sheet import App, Core
+from zipfile import ZipFile
+from pytest import mark, raises
+
+RESOURCE_PATH="tests/resource/"
+
+@mark.parametrize("file",["test.docx","test.xlsx","test.pptx","test.vsdx","test.accdt"])
+def test_backends_write_the_same(file):
+    lxml, expat=get_backend("lxml"), get_backend("expat")
+    with ZipFile(RESOURCE_PATH+file) as zf:
+        for name in ["docProps/core.xml", "docProps/app.xml"]:
+            if name not in zf.namelist(): continue
+            raw=zf.read(name)
+            assert expat.tostring(expat.parse(raw)) == lxml.tostring(lxml.parse(raw))
+
+def test_sheet_backend():
+    class ExpatCore(Core):
+        BACKEND="expat"
+
+    with ZipFile(RESOURCE_PATH+"test.docx") as zf:
+        raw=zf.read("docProps/core.xml")
+    sheet=ExpatCore(raw)
+    sheet.identifier="ID-1"
+    sheet.to_element()
+    assert get_backend("expat").is_element(sheet._xml_root) and Core(sheet.pack()).identifier == "ID-1"
+    assert b"<dc:identifier>ID-1</dc:identifier>" in sheet.pack()
+
+def test_keeps_comments_and_prefixes(backend):
+    raw=b"""<r:root xmlns:r="urn:r" xmlns="urn:d"><!-- note --><a x="1&quot;"> t </a><r:b/><c xmlns=""/></r:root>"""
+    root=backend.parse(raw)
+    root.append(root.makeelement("{urn:new}n"))
+    out=backend.tostring(root)
+    assert out.startswith(b"""<r:root xmlns:r="urn:r" xmlns="urn:d"><!-- note --><a x="1&quot;"> t </a><r:b/><c xmlns=""/><""")
+    assert b'urn:new' in out and len(root) == 5
+
+def test_default_backend():
+    set_default_backend("expat")
+    try:
+        assert type(Core(b"<cp:coreProperties xmlns:cp='urn:cp'/>")._xml_root).__module__ == "nometa.backends.expat_backend"
+    finally:
+        set_default_backend(None)
+    assert get_backend().name == "lxml"
+
+def test_unknown_backend():
+    with raises(ValueError):
+        get_backend("sax")
+    with raises(ValueError):
+        set_default_backend("sax")
+
+def test_is_element():
+    expat=get_backend("expat")
+    root=expat.parse(b"<a><!--x--></a>")
+    assert is_element(root) and not is_element(root[0]) and not is_element(Comment("x")) and not is_element("a")
+
+def test_invalid_xml(backend):
+    with raises(SyntaxError):
+        backend.parse(b"<a><b></a>")
+
+def test_rejects_control_chars(backend):
+    class BackendCore(Core):
+        BACKEND=None
+
+    el=backend.parse(b'<a b="c"/>')
+    with raises(ValueError):
+        el.text="x\x01y"
+        backend.tostring(el)
+    el=backend.parse(b'<a b="c"/>')
+    with raises(ValueError):
+        el.attrib["b"]="\x00"
+        backend.tostring(el)
+
+    with ZipFile(RESOURCE_PATH+"test.docx") as zf:
+        sheet=BackendCore(zf.read("docProps/core.xml"))
+    with raises(ValueError):
+        sheet.title="a\x01b"
+        sheet.to_element()
+        sheet.pack()
@@ -0,0 +1,71 @@
+from nometa import Document
+from nometa.sheet import App, Core
+from nometa.batch import run, process_file, SAVED, UNCHANGED, ERROR
+from pytest import fixture, mark, raises
+import shutil
+import os
+
+RESOURCE_PATH="tests/resource/"
+FILES=["test.docx","test.xlsx","test.pptx","test.vsdx","test.accdt"]
+
+@fixture
+def docs(tmp_path):
+    src=tmp_path/"src"
+    src.mkdir()
+    for file in FILES:
+        shutil.copy(RESOURCE_PATH+file, src/file)
+    return src
+
+@mark.parametrize("executor",["process","thread"])
+def test_run_to_output_dir(docs, tmp_path, executor):
+    out=tmp_path/"out"
+    out.mkdir()
+    paths=[str(docs/file) for file in FILES]
+    results=list(run(paths, {"core.creator": "Johnny Test", "core.revision": 3}, str(out), workers=2, chunksize=2, executor=executor))
+
+    assert sorted(r.path for r in results) == sorted(paths) and all(r.status == SAVED for r in results)
+    for file in FILES:
+        doc=Document(str(out/file),Core,App)
+        assert doc.core.creator == "Johnny Test" and doc.core.revision == 3
+
+def test_run_inplace(docs):
+    paths=[str(docs/file) for file in FILES]
+    results=list(run(paths, {"core.last_modified_by": None}, workers=2, executor="thread"))
+
+    assert all(r.status == SAVED and r.output is None for r in results)
+    assert all(Document(path,Core,App).core.last_modified_by is None for path in paths)
+
+def test_run_reports_errors(docs, tmp_path):
+    paths=[str(docs/"test.accdt"), str(docs/"missing.docx"), str(docs/"test.docx")]
+    results={r.path: r for r in run(paths, {"app.company": "Dirty Company"}, str(tmp_path), workers=1, chunksize=1)}
+
+    assert results[paths[0]].status == ERROR and "NotImplementedError" in results[paths[0]].error
+    assert results[paths[1]].status == ERROR and results[paths[2]].status == SAVED
+
+@mark.parametrize("edits",[{"creator": "x"}, {"core.company": "x"}, {"app.to_element": "x"}])
+def test_invalid_edits(docs, edits):
+    with raises(ValueError):
+        run([str(docs/"test.docx")], edits)
+
+def test_process_file_type_error(docs, tmp_path):
+    result=process_file(str(docs/"test.docx"), {"core.revision": "one"}, str(tmp_path/"out.docx"))
+    assert result.status == ERROR and result.error.startswith("TypeError") and not os.path.exists(tmp_path/"out.docx")
+
+def test_run_skips_unchanged(docs):
+    paths=[str(docs/file) for file in FILES]
+    for path in paths:
+        os.utime(path, ns=(0, 0))
+    results=list(run(paths, {"core.revision": Document(paths[0],Core,App).core.revision}, workers=1, executor="thread"))
+
+    assert {r.path: r.status for r in results}[paths[0]] == UNCHANGED and os.stat(paths[0]).st_mtime_ns == 0
+    assert all(os.stat(r.path).st_mtime_ns == 0 for r in results if r.status == UNCHANGED)
+    assert all(os.stat(r.path).st_mtime_ns != 0 for r in results if r.status == SAVED)
+
+def test_unchanged_is_copied(docs, tmp_path):
+    path=str(docs/"test.docx")
+    creator=Document(path,Core,App).core.creator
+    result=process_file(path, {"core.creator": creator}, str(tmp_path/"out.docx"))
+
+    assert result.status == UNCHANGED
+    with open(path, "rb") as src, open(tmp_path/"out.docx", "rb") as dst:
+        assert src.read() == dst.read()
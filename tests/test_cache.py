@@ -0,0 +1,135 @@
+from nometa import Document
+from nometa.sheet import App, Core
+from nometa.cache import DocumentCache
+from unittest import mock
+from pytest import raises
+from concurrent.futures import ThreadPoolExecutor
+import shutil
+import io
+import os
+
+RESOURCE_PATH="tests/resource/"
+FILES=["test.docx","test.xlsx","test.pptx","test.vsdx","test.accdt"]
+
+def copy(tmp_path, file: str=FILES[0]) -> str:
+    path=str(tmp_path/file)
+    shutil.copy(RESOURCE_PATH+file, path)
+    return path
+
+def size(path: str) -> int:
+    cache=DocumentCache()
+    cache.get(path)
+    return cache.nbytes
+
+def test_hit(tmp_path):
+    cache=DocumentCache()
+    path=copy(tmp_path)
+    with mock.patch("nometa.cache.Document", wraps=Document) as opened:
+        doc=cache.get(path)
+        assert cache.get(path).core.creator == cache.get(os.path.relpath(path)).core.creator == doc.core.creator
+        assert opened.call_count == 1
+    assert doc.core.creator == Document(path,Core,App).core.creator
+    stats=cache.stats
+    assert (stats.hits, stats.misses, stats.invalidations, stats.evictions) == (2, 1, 0, 0) and stats.hit_rate == 2/3
+    assert path in cache and len(cache) == 1 and cache.nbytes > 0
+
+def test_changed_file_is_read_again(tmp_path):
+    cache=DocumentCache()
+    path=copy(tmp_path)
+    doc=cache.get(path)
+    other=Document(path,Core,App)
+    other.core.creator="Changed Creator"
+    other.update()
+
+    new_doc=cache.get(path)
+    assert new_doc is not doc and new_doc.core.creator == "Changed Creator"
+    assert cache.stats.invalidations == 1 and cache.stats.misses == 2
+
+def test_replaced_file_is_read_again(tmp_path):
+    cache=DocumentCache()
+    path=copy(tmp_path)
+    with open(path, "ab") as fd:
+        fd.write(bytes(1024))
+    doc=cache.get(path)
+    other=Document(path,Core,App)
+    other.core.creator="Replaced Creator"
+    tmp=str(tmp_path/"tmp.docx")
+    other.save(tmp)
+    st=os.stat(path)
+    with open(tmp, "r+b") as fd:
+        fd.truncate(st.st_size)
+    os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp, path)
+
+    assert cache.get(path).core.creator == "Replaced Creator" and doc.core.creator != "Replaced Creator"
+    assert cache.stats.invalidations == 1
+
+def test_lookups_dont_share_documents(tmp_path, backend):
+    cache=DocumentCache()
+    path=copy(tmp_path)
+    a, b=cache.get(path), cache.get(path)
+    assert a is not b and a.core is not b.core and a.app is not b.app
+    a.core.creator="Not Saved"
+    a.app.company="Not Saved"
+    assert b.core.creator != "Not Saved" and b.app.company != "Not Saved"
+    assert not b.dirty and not cache.get(path).dirty and cache.stats.invalidations == 0
+
+    buff=io.BytesIO()
+    a.save(buff)
+    assert Document(buff,Core,App).core.creator == "Not Saved" and cache.get(path).core.creator != "Not Saved"
+
+def test_missing_file(tmp_path):
+    cache=DocumentCache()
+    path=copy(tmp_path)
+    cache.get(path)
+    os.remove(path)
+    with raises(OSError):
+        cache.get(path)
+    assert len(cache) == 0 and cache.nbytes == 0
+
+def test_lru_entries(tmp_path):
+    cache=DocumentCache(max_entries=2)
+    paths=[copy(tmp_path, file) for file in FILES[:3]]
+    cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0])
+    cache.get(paths[2])
+    assert paths[0] in cache and paths[1] not in cache and paths[2] in cache
+    assert cache.stats.evictions == 1
+
+def test_lru_bytes(tmp_path):
+    paths=[copy(tmp_path, file) for file in FILES]
+    sizes=[size(it) for it in paths]
+    cache=DocumentCache(max_bytes=sizes[-1]+sizes[-2])
+    for path in paths:
+        cache.get(path)
+    assert [it in cache for it in paths] == [False, False, False, True, True]
+    assert cache.nbytes == sizes[-1]+sizes[-2] and cache.stats.evictions == 3
+
+    small=DocumentCache(max_bytes=1)
+    small.get(paths[0])
+    assert len(small) == 0 and small.nbytes == 0
+
+def test_invalidate_and_clear(tmp_path):
+    cache=DocumentCache()
+    paths=[copy(tmp_path, file) for file in FILES[:2]]
+    for path in paths:
+        cache.get(path)
+    cache.invalidate(paths[0])
+    assert paths[0] not in cache and len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0 and cache.stats.misses == 2
+
+def test_invalid_budget():
+    with raises(ValueError):
+        DocumentCache(max_entries=-1)
+    with raises(ValueError):
+        DocumentCache(max_bytes=-1)
+
+def test_threads(tmp_path):
+    cache=DocumentCache(max_entries=3)
+    paths=[copy(tmp_path, file) for file in FILES]
+    with ThreadPoolExecutor(4) as pool:
+        creators=list(pool.map(lambda path: cache.get(path).core.creator, paths*20))
+    assert creators == [Document(path,Core,App).core.creator for path in paths]*20
+    assert len(cache) == 3 and cache.stats.hits+cache.stats.misses == 100
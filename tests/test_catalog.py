@@ -0,0 +1,119 @@
+from nometa import Document, scan
+from nometa.sheet import App, Core
+from nometa.catalog import Catalog
+from nometa.__main__ import main
+from pytest import fixture, raises
+from unittest import mock
+import shutil
+import sys
+import os
+
+RESOURCE_PATH="tests/resource/"
+
+@fixture
+def share(tmp_path):
+    root=tmp_path/"share"
+    (root/"sub").mkdir(parents=True)
+    shutil.copy(RESOURCE_PATH+"test.docx", root/"a.docx")
+    shutil.copy(RESOURCE_PATH+"test.xlsx", root/"sub"/"b.xlsx")
+    shutil.copy(RESOURCE_PATH+"test.accdt", root/"sub"/"c.accdt")
+    (root/"sub"/"broken.pptx").write_bytes(b"not a document")
+    (root/"notes.txt").write_text("not a document")
+    return root
+
+def test_index_and_query(share, tmp_path):
+    with Catalog(str(tmp_path/"cat.db")) as catalog:
+        stats=catalog.update([str(share)], workers=2, executor="thread")
+        assert (stats.scanned, stats.unchanged, stats.removed, stats.errors) == (4, 0, 0, 1)
+
+        row=catalog.get(str(share/"a.docx"))
+        values=scan(str(share/"a.docx"))
+        assert row["core_creator"] == values["core.creator"] and row["core_modified"] == values["core.modified"].strftime("%Y-%m-%dT%H:%M:%SZ")
+        assert catalog.get(str(share/"sub"/"c.accdt"))["app_company"] is None
+        assert catalog.get(str(share/"sub"/"broken.pptx"))["error"].startswith("ValueError")
+
+        paths=catalog.connection.execute("SELECT path FROM documents WHERE core_modified < ?", ("2100-01-01T00:00:00Z",)).fetchall()
+        assert len(paths) == 2
+
+def test_incremental_update(share, tmp_path):
+    with Catalog(str(tmp_path/"cat.db")) as catalog:
+        catalog.update([str(share)], workers=1, executor="thread")
+
+        doc=Document(str(share/"a.docx"),Core,App)
+        doc.core.creator="Johnny Test"
+        doc.update()
+        os.utime(share/"a.docx", ns=(0, 10**18))
+        os.remove(share/"sub"/"b.xlsx")
+        stats=catalog.update([str(share)], workers=1, executor="thread")
+
+        assert (stats.scanned, stats.unchanged, stats.removed, stats.errors) == (2, 1, 1, 1)
+        assert catalog.get(str(share/"a.docx"))["core_creator"] == "Johnny Test" and catalog.get(str(share/"sub"/"b.xlsx")) is None
+
+def test_overlapping_roots(share, tmp_path):
+    with Catalog(str(tmp_path/"cat.db")) as catalog:
+        stats=catalog.update([str(share), str(share/"sub"), os.path.relpath(share)], workers=1, executor="thread")
+        assert (stats.scanned, stats.unchanged, stats.removed, stats.errors) == (4, 0, 0, 1)
+
+        doc=Document(str(share/"sub"/"b.xlsx"),Core,App)
+        doc.core.creator="Johnny Test"
+        doc.update()
+        os.utime(share/"sub"/"b.xlsx", ns=(0, 10**18))
+        stats=catalog.update([str(share/"sub"), str(share)], workers=1, executor="thread")
+        assert (stats.scanned, stats.unchanged, stats.removed, stats.errors) == (2, 2, 0, 1)
+        assert catalog.get(str(share/"sub"/"b.xlsx"))["core_creator"] == "Johnny Test"
+
+def test_missing_root(share, tmp_path, monkeypatch, capsys):
+    with Catalog(str(tmp_path/"cat.db")) as catalog:
+        catalog.update([str(share)], workers=1, executor="thread")
+        os.rename(share, tmp_path/"moved")
+        with raises(FileNotFoundError):
+            catalog.update([str(share)], workers=1, executor="thread")
+        assert catalog.get(str(share/"a.docx")) is not None
+
+    monkeypatch.setattr(sys, "argv", ["nometa", "index", "--db", str(tmp_path/"cat.db"), str(share)])
+    assert main() == 1
+    assert "directory not found" in capsys.readouterr().err
+    with Catalog(str(tmp_path/"cat.db")) as catalog:
+        assert catalog.connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 4
+
+def test_unlisted_directory_keeps_rows(share, tmp_path):
+    scandir=os.scandir
+    def failing(path):
+        if os.path.basename(path) == "sub":
+            raise PermissionError(13, "Permission denied", path)
+        return scandir(path)
+
+    with Catalog(str(tmp_path/"cat.db")) as catalog:
+        catalog.update([str(share)], workers=1, executor="thread")
+        os.remove(share/"a.docx")
+        with mock.patch("nometa.catalog.os.scandir", failing):
+            stats=catalog.update([str(share)], workers=1, executor="thread")
+
+        assert (stats.scanned, stats.unchanged, stats.removed, stats.unlisted) == (0, 0, 1, 1)
+        assert catalog.get(str(share/"a.docx")) is None and catalog.get(str(share/"sub"/"b.xlsx")) is not None
+        assert catalog.connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 3
+
+def test_errors_are_retried(share, tmp_path):
+    broken=share/"sub"/"broken.pptx"
+    st=os.stat(broken)
+    with Catalog(str(tmp_path/"cat.db")) as catalog:
+        catalog.update([str(share)], workers=1, executor="thread")
+        assert catalog.get(str(broken))["error"] is not None
+
+        # the document becomes readable keeping its size and modification time, eg. a transient I/O error
+        with catalog.connection:
+            catalog.connection.execute("UPDATE documents SET size = ?, mtime_ns = ? WHERE path = ?", (os.path.getsize(RESOURCE_PATH+"test.pptx"), st.st_mtime_ns, str(broken)))
+        shutil.copy(RESOURCE_PATH+"test.pptx", broken)
+        os.utime(broken, ns=(st.st_atime_ns, st.st_mtime_ns))
+        stats=catalog.update([str(share)], workers=1, executor="thread")
+
+        assert (stats.scanned, stats.unchanged, stats.errors) == (1, 3, 0)
+        row=catalog.get(str(broken))
+        assert row["error"] is None and row["core_creator"] == scan(str(broken))["core.creator"]
+
+def test_index_command(share, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["nometa", "index", "--db", str(tmp_path/"cat.db"), "-j", "2", str(share)])
+    assert main() == 0
+    assert "scanned: 4" in capsys.readouterr().out
+    with Catalog(str(tmp_path/"cat.db")) as catalog:
+        assert catalog.get(str(share/"a.docx")) is not None
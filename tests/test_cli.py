@@ -0,0 +1,127 @@
+from nometa import Document, __version__
+from nometa.sheet import App, Core
+from nometa.__main__ import main
+from pytest import fixture, raises
+import subprocess
+import shutil
+import sys
+import os
+
+RESOURCE_PATH=os.path.abspath("tests/resource")+"/"
+
+@fixture
+def share(tmp_path):
+    root=tmp_path/"share"
+    (root/"sub").mkdir(parents=True)
+    shutil.copy(RESOURCE_PATH+"test.docx", root/"a.docx")
+    shutil.copy(RESOURCE_PATH+"test.xlsx", root/"sub"/"b.xlsx")
+    (root/"notes.txt").write_text("not a document")
+    return root
+
+def nometa(monkeypatch, *args) -> int:
+    monkeypatch.setattr(sys, "argv", ["nometa", *args])
+    return main()
+
+def test_single_file_copy(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    assert nometa(monkeypatch, "--creator", "", RESOURCE_PATH+"test.docx") == 0
+    assert Document(str(tmp_path/"test_copy.docx"),Core,App).core.creator is None
+
+def test_directory_without_recursion(monkeypatch, share, tmp_path):
+    assert nometa(monkeypatch, "--company", "Silverlayer", "-o", str(tmp_path/"out"), str(share)) == 0
+    assert os.listdir(tmp_path/"out") == ["a.docx"]
+
+def test_recursive_parallel(monkeypatch, share, tmp_path):
+    out=tmp_path/"out"
+    assert nometa(monkeypatch, "--manager", "Josh Kool", "-r", "-j", "2", "-o", str(out), str(share)) == 0
+    assert Document(str(out/"a.docx"),Core,App).app.manager == "Josh Kool"
+    assert Document(str(out/"sub"/"b.xlsx"),Core,App).app.manager == "Josh Kool"
+
+def test_glob(monkeypatch, share, tmp_path):
+    assert nometa(monkeypatch, "--creator", "Johnny", "-o", str(tmp_path/"out"), str(share)+"/**/*.xlsx") == 0
+    assert Document(str(tmp_path/"out"/"sub"/"b.xlsx"),Core,App).core.creator == "Johnny"
+
+def test_errors_are_collected(monkeypatch, share, tmp_path, capsys):
+    rc=nometa(monkeypatch, "--creator", "", "-o", str(tmp_path/"out"), str(share/"notes.txt"), str(share/"missing.docx"), str(share/"a.docx"))
+    err=capsys.readouterr().err
+    assert rc == 1 and "notes.txt" in err and "missing.docx" in err
+    assert os.path.exists(tmp_path/"out"/"a.docx")
+
+def test_invalid_jobs(monkeypatch, share):
+    with raises(SystemExit):
+        nometa(monkeypatch, "-j", "0", str(share))
+
+def test_rerun_reports_unchanged(monkeypatch, share, tmp_path, capsys):
+    assert nometa(monkeypatch, "--company", "Dirty Company", "-r", "-o", str(tmp_path/"out"), str(share)) == 0
+    assert "saved: 2, unchanged: 0, errors: 0" in capsys.readouterr().out
+    assert nometa(monkeypatch, "--company", "Dirty Company", "-r", "-o", str(tmp_path/"out2"), str(tmp_path/"out")) == 0
+    assert "saved: 0, unchanged: 2, errors: 0" in capsys.readouterr().out
+    assert (tmp_path/"out"/"a.docx").read_bytes() == (tmp_path/"out2"/"a.docx").read_bytes()
+
+def _python(*args) -> "subprocess.CompletedProcess[str]":
+    env=dict(os.environ, PYTHONPATH=os.path.abspath("src"))
+    return subprocess.run([sys.executable, *args], env=env, capture_output=True, text=True)
+
+HEAVY=["lxml", "sqlite3", "asyncio", "concurrent.futures", "urllib.request", "nometa.scanner", "nometa.batch", "nometa.catalog"]
+
+def test_version():
+    res=_python("-m", "nometa", "--version")
+    assert res.returncode == 0
+    assert res.stdout.strip() == "nometa "+__version__
+
+def test_help_and_version_skip_heavy_imports():
+    code="import sys; from nometa.__main__ import main; sys.argv=['nometa', %r]\ntry: main()\nexcept SystemExit: pass\nprint(' '.join(sys.modules))"
+    for arg in ("--version", "--help"):
+        res=_python("-c", code%arg)
+        assert res.returncode == 0, res.stderr
+        loaded=set(res.stdout.split())
+        assert [it for it in HEAVY if it in loaded] == []
+
+def test_import_skips_heavy_modules():
+    res=_python("-c", "import sys, nometa.__main__; print(' '.join(sys.modules))")
+    assert res.returncode == 0, res.stderr
+    loaded=set(res.stdout.split())
+    assert [it for it in HEAVY if it in loaded] == []
+
+def test_compact(monkeypatch, share, tmp_path, capsys):
+    shutil.copy(RESOURCE_PATH+"test.pptx", share/"c.pptx")
+    assert nometa(monkeypatch, "--compact", "--drop-thumbnail", "-o", str(tmp_path/"out"), str(share)) == 0
+    out=capsys.readouterr().out
+    saved=os.path.getsize(share/"c.pptx")-os.path.getsize(tmp_path/"out"/"c.pptx")
+    assert "c.pptx: %d bytes saved"%saved in out and "saved: 2, unchanged: 0, errors: 0, bytes saved: " in out
+
+def test_deterministic(monkeypatch, share, tmp_path):
+    for out in ("out1", "out2"):
+        assert nometa(monkeypatch, "--creator", "Jane", "--deterministic", "-r", "-o", str(tmp_path/out), str(share)) == 0
+    assert (tmp_path/"out1"/"a.docx").read_bytes() == (tmp_path/"out2"/"a.docx").read_bytes()
+    assert (tmp_path/"out1"/"sub"/"b.xlsx").read_bytes() == (tmp_path/"out2"/"sub"/"b.xlsx").read_bytes()
+
+def test_in_place(monkeypatch, share, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    os.utime(share/"a.docx", (1e9, 1e9))
+    assert nometa(monkeypatch, "--creator", "Jane", "-i", "--keep-times", "-r", str(share)) == 0
+    assert Document(str(share/"a.docx"),Core,App).core.creator == "Jane" and os.stat(share/"a.docx").st_mtime == 1e9
+    assert Document(str(share/"sub"/"b.xlsx"),Core,App).core.creator == "Jane"
+    assert sorted(os.listdir(tmp_path)) == ["share"] and sorted(os.listdir(share)) == ["a.docx", "notes.txt", "sub"]
+
+def test_in_place_compact(monkeypatch, share):
+    shutil.copy(RESOURCE_PATH+"test.pptx", share/"c.pptx")
+    assert nometa(monkeypatch, "--compact", "-i", str(share/"c.pptx")) == 0
+    assert os.path.getsize(share/"c.pptx") < os.path.getsize(RESOURCE_PATH+"test.pptx")
+
+def test_in_place_and_output_dir(monkeypatch, share, tmp_path):
+    with raises(SystemExit):
+        nometa(monkeypatch, "-i", "-o", str(tmp_path/"out"), str(share))
+
+def test_same_basename(monkeypatch, share, tmp_path, capsys):
+    (share/"x").mkdir()
+    shutil.copy(RESOURCE_PATH+"test.docx", share/"x"/"a.docx")
+    monkeypatch.chdir(tmp_path)
+    for args in ([], ["-o", str(tmp_path/"flat")]):
+        assert nometa(monkeypatch, "--creator", "Jane", *args, str(share/"a.docx"), str(share/"x"/"a.docx")) == 1
+        assert "would be written by" in capsys.readouterr().err
+    assert sorted(os.listdir(tmp_path)) == ["share"]
+
+    assert nometa(monkeypatch, "--creator", "Jane", "-j", "2", "-o", str(tmp_path/"out"), str(share)+"/**/a.docx") == 0
+    assert Document(str(tmp_path/"out"/"a.docx"),Core,App).core.creator == "Jane"
+    assert Document(str(tmp_path/"out"/"x"/"a.docx"),Core,App).core.creator == "Jane"
@@ -0,0 +1,87 @@
+from nometa import Document
+from nometa.sheet import App, Core
+from nometa.batch import process_file, SAVED
+from nometa.compact import compact_policy, drop_thumbnail
+from zipfile import ZipFile, ZIP_DEFLATED
+from pytest import mark, raises
+import shutil
+import zlib
+import io
+import os
+
+RESOURCE_PATH="tests/resource/"
+
+def save(file: str, **kw) -> io.BytesIO:
+    buff=io.BytesIO()
+    Document(RESOURCE_PATH+file,Core,App).save(buff, **kw)
+    return buff
+
+@mark.parametrize("file",["test.docx","test.xlsx","test.pptx","test.vsdx","test.accdt"])
+def test_optimize(file):
+    buff=save(file, optimize=True)
+    assert len(buff.getvalue()) <= os.path.getsize(RESOURCE_PATH+file)
+    with ZipFile(buff) as zout, ZipFile(RESOURCE_PATH+file) as zin:
+        assert zout.testzip() is None and zout.namelist() == zin.namelist()
+        for info in zout.infolist():
+            assert zout.read(info) == zin.read(info.filename)
+            assert info.compress_size <= zin.getinfo(info.filename).compress_size
+    Document(buff,Core,App)
+
+def test_optimize_xml_at_max_level():
+    with ZipFile(save("test.pptx", optimize=True)) as zout:
+        info=zout.getinfo("ppt/presentation.xml")
+        data=zout.read(info)
+        max_level=zlib.compressobj(9, zlib.DEFLATED, -15)
+        assert info.compress_type == ZIP_DEFLATED
+        assert info.compress_size == min(len(max_level.compress(data)+max_level.flush()), info.compress_size)
+
+def test_optimize_keeps_edits():
+    buff=io.BytesIO()
+    doc=Document(RESOURCE_PATH+"test.docx",Core,App)
+    doc.core.creator="Johnny Test"
+    doc.save(buff, optimize=True, drop_thumbnail=True)
+    assert Document(buff,Core,App).core.creator == "Johnny Test"
+
+@mark.parametrize("file,thumbnail",[("test.pptx","docProps/thumbnail.jpeg"),("test.vsdx","docProps/thumbnail.emf")])
+def test_drop_thumbnail(file, thumbnail):
+    buff=save(file, drop_thumbnail=True)
+    assert len(buff.getvalue()) < os.path.getsize(RESOURCE_PATH+file)
+    with ZipFile(buff) as zout, ZipFile(RESOURCE_PATH+file) as zin:
+        assert zout.testzip() is None
+        assert set(zout.namelist()) == set(zin.namelist())-{thumbnail}
+        assert b"thumbnail" not in zout.read("_rels/.rels") and b"thumbnail" not in zout.read("[Content_Types].xml")
+        extension=thumbnail.rpartition('.')[2].encode()
+        assert b'Extension="%s"'%extension not in zout.read("[Content_Types].xml")
+        assert b"docProps/core.xml" in zout.read("_rels/.rels")
+    Document(buff,Core,App)
+
+def test_drop_thumbnail_keeps_used_default():
+    buff=io.BytesIO()
+    with ZipFile(RESOURCE_PATH+"test.pptx") as zin, ZipFile(buff, 'w') as zout:
+        for info in zin.infolist():
+            zout.writestr(info, zin.read(info))
+        zout.writestr("ppt/media/image9.jpeg", zin.read("docProps/thumbnail.jpeg"))
+    with ZipFile(buff) as zf:
+        names, members=drop_thumbnail(zf)
+    assert names == {"docProps/thumbnail.jpeg"} and b'Extension="jpeg"' in members["[Content_Types].xml"]
+
+def test_no_thumbnail():
+    with ZipFile(RESOURCE_PATH+"test.docx") as zf:
+        assert drop_thumbnail(zf) == (set(), {})
+
+def test_optimize_and_policy():
+    with raises(ValueError):
+        save("test.docx", optimize=True, compresslevel=9)
+    with raises(ValueError):
+        save("test.docx", optimize=True, policy=compact_policy())
+
+@mark.parametrize("inplace",[False,True])
+def test_process_file_reports_bytes_saved(tmp_path, inplace):
+    path=str(tmp_path/"test.pptx")
+    shutil.copy(RESOURCE_PATH+"test.pptx", path)
+    outfile=None if inplace else str(tmp_path/"out.pptx")
+    result=process_file(path, {}, outfile, compact=True, drop_thumbnail=True)
+    assert result.status == SAVED
+    assert result.bytes_saved == os.path.getsize(RESOURCE_PATH+"test.pptx")-os.path.getsize(outfile or path) > 0
+    with ZipFile(outfile or path) as zf:
+        assert zf.testzip() is None and "docProps/thumbnail.jpeg" not in zf.namelist()
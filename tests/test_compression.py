@@ -0,0 +1,92 @@
+from nometa import Document
+from nometa.sheet import App, Core
+from nometa.compression import CompressionPolicy, is_compressed
+from zipfile import ZipFile, ZipInfo, ZIP_STORED, ZIP_DEFLATED
+from pytest import mark, raises
+import io
+import os
+
+RESOURCE_PATH="tests/resource/"
+PNG=b"\x89PNG\r\n\x1a\n"+os.urandom(4096)
+
+def save(file: str | io.BytesIO, **kw) -> ZipFile:
+    buff=io.BytesIO()
+    doc=Document(file if isinstance(file, io.BytesIO) else RESOURCE_PATH+file,Core,App)
+    doc.core.creator="Johnny Test"
+    doc.save(buff, **kw)
+    return ZipFile(buff)
+
+def source(members: dict[str, tuple[bytes, int]]) -> io.BytesIO:
+    buff=io.BytesIO()
+    with ZipFile(RESOURCE_PATH+"test.docx") as zin, ZipFile(buff, 'w') as zout:
+        for it in zin.infolist():
+            zout.writestr(it, zin.read(it), compress_type=it.compress_type)
+        for name, (data, method) in members.items():
+            zout.writestr(name, data, compress_type=method)
+    return buff
+
+def test_is_compressed():
+    with ZipFile(RESOURCE_PATH+"test.pptx") as zf:
+        assert is_compressed(zf.read("docProps/thumbnail.jpeg"))
+        assert not is_compressed(zf.read("ppt/presentation.xml"))
+    assert is_compressed(PNG) and is_compressed(b"\0\0\0\x18ftypmp42")
+
+def test_decide_order():
+    policy=CompressionPolicy({"word/media/*": 1, "*.XML": 9}, default=6)
+    head=lambda: b''
+    assert policy.decide(ZipInfo("word/media/image1.png"), head) == (ZIP_DEFLATED, 1)
+    assert policy.decide(ZipInfo("word/document.xml"), head) == (ZIP_DEFLATED, 9)
+    assert policy.decide(ZipInfo("ppt/media/image1.PNG"), head) == (ZIP_STORED, 0)
+    assert policy.decide(ZipInfo("word/_rels/document.xml.rels"), head) == (ZIP_DEFLATED, 6)
+    assert CompressionPolicy().decide(ZipInfo("word/document.xml"), head) is None
+
+def test_invalid_level():
+    with raises(ValueError):
+        CompressionPolicy({"*.xml": 10})
+    with raises(ValueError):
+        CompressionPolicy(default=-1)
+
+def test_default_policy_stores_media():
+    with save("test.pptx", policy=CompressionPolicy()) as zout, ZipFile(RESOURCE_PATH+"test.pptx") as zin:
+        assert zout.testzip() is None
+        thumb=zout.getinfo("docProps/thumbnail.jpeg")
+        assert thumb.compress_type == ZIP_STORED and zout.read(thumb) == zin.read("docProps/thumbnail.jpeg")
+        xml=zout.getinfo("ppt/presentation.xml"), zin.getinfo("ppt/presentation.xml")
+        assert (xml[0].compress_type, xml[0].compress_size) == (xml[1].compress_type, xml[1].compress_size)
+
+def test_levels_per_pattern():
+    with save("test.docx", policy=CompressionPolicy({"word/*.xml": 0})) as zout, ZipFile(RESOURCE_PATH+"test.docx") as zin:
+        doc=zout.getinfo("word/document.xml")
+        assert doc.compress_type == ZIP_DEFLATED and doc.compress_size > zin.getinfo("word/document.xml").compress_size
+        assert zout.getinfo("[Content_Types].xml").compress_size == zin.getinfo("[Content_Types].xml").compress_size
+
+def test_sniffed_media_is_stored():
+    buff=source({"word/media/image1.bin": (PNG, ZIP_DEFLATED), "word/media/random.bin": (os.urandom(4096), ZIP_DEFLATED)})
+    with save(buff, policy=CompressionPolicy()) as zout:
+        assert zout.getinfo("word/media/image1.bin").compress_type == ZIP_STORED and zout.read("word/media/image1.bin") == PNG
+        assert zout.getinfo("word/media/random.bin").compress_type == ZIP_DEFLATED
+
+def test_stored_members_stay_stored():
+    buff=source({"word/media/image1.bin": (PNG, ZIP_STORED), "customXml/item1.xml": (b"<a/>"*100, ZIP_STORED)})
+    with save(buff, policy=CompressionPolicy(default=6)) as zout:
+        assert zout.getinfo("word/media/image1.bin").compress_type == ZIP_STORED
+        assert zout.getinfo("customXml/item1.xml").compress_type == ZIP_DEFLATED
+
+def test_stored_sheet_stays_stored():
+    buff=io.BytesIO()
+    with ZipFile(RESOURCE_PATH+"test.docx") as zin, ZipFile(buff, 'w') as zout:
+        for it in zin.infolist():
+            zout.writestr(it.filename, zin.read(it), compress_type=ZIP_STORED if it.filename == "docProps/core.xml" else ZIP_DEFLATED)
+    with save(buff) as zout:
+        assert zout.getinfo("docProps/core.xml").compress_type == ZIP_STORED
+        assert Core(zout.read("docProps/core.xml")).creator == "Johnny Test"
+
+@mark.parametrize("workers",[1,3])
+def test_policy_with_workers(workers):
+    with save("test.pptx", policy=CompressionPolicy({"*.xml": 9}), workers=workers) as zout:
+        assert zout.testzip() is None
+        assert zout.getinfo("docProps/thumbnail.jpeg").compress_type == ZIP_STORED
+
+def test_compresslevel_and_policy():
+    with raises(ValueError):
+        save("test.docx", compresslevel=6, policy=CompressionPolicy())
@@ -3,9 +3,11 @@ from nometa.properties.numeric import NumericProperty
 from nometa.properties.datetime import DatetimeProperty
 from nometa.properties.boolean import BooleanProperty
 from datetime import datetime
-from lxml import etree
+from nometa.backends import Element
 from pytest import fixture, mark, raises
 
+pytestmark=mark.usefixtures("backend")
+
 XML="""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <cp:coreProperties
     xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties"
@@ -24,11 +26,9 @@ XML="""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 </cp:coreProperties>"""
 
 @fixture
-def xml_root() -> etree._Element:
+def xml_root(backend) -> Element:
     bxml=bytes(XML,"utf8")
-    parser = etree.XMLParser(remove_blank_text=True, resolve_entities=False)
-    parser.set_element_class_lookup(etree.ElementNamespaceClassLookup())
-    return etree.fromstring(bxml, parser)
+    return backend.parse(bxml)
 
 
 def test_wrong_initialization():
@@ -2,6 +2,8 @@ from nometa.sheet import Core
 from datetime import datetime
 from pytest import fixture, raises, mark
 
+pytestmark=mark.usefixtures("backend")
+
 @fixture
 def bxml() -> bytes:
     return bytes(
@@ -74,4 +76,96 @@ def test_change_props(bxml):
 
     assert new_sheet.title == osheet.title and new_sheet.subject == osheet.subject and new_sheet.last_printed == osheet.last_printed \
     and new_sheet.creator == osheet.creator and new_sheet.description == osheet.description and new_sheet.revision == osheet.revision \
-    and new_sheet.last_modified_by == osheet.last_modified_by and new_sheet.category == osheet.category and new_sheet.created == osheet.created
\ No newline at end of file
+    and new_sheet.last_modified_by == osheet.last_modified_by and new_sheet.category == osheet.category and new_sheet.created == osheet.created
+
+def test_parser_is_reused(bxml):
+    from nometa.backends.lxml_backend import _get_parser
+    from concurrent.futures import ThreadPoolExecutor
+    parser=_get_parser()
+    Core(bxml)
+    assert _get_parser() is parser and ThreadPoolExecutor(1).submit(_get_parser).result() is not parser
+
+def test_entities_are_not_resolved():
+    raw=b"""<?xml version="1.0"?>
+    <!DOCTYPE foo [<!ENTITY xxe SYSTEM "file:///etc/passwd">]>
+    <cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties"
+        xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/"><dc:title>&xxe;</dc:title></cp:coreProperties>"""
+    assert not Core(raw).title
+
+def test_sheet_has_no_instance_dict(bxml):
+    osheet=Core(bxml)
+    assert not hasattr(osheet, "__dict__") and len(osheet._values) == len(Core._fields) == 14
+
+def test_append_missing_props():
+    raw=b"""<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties"
+        xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/"><cp:revision>3</cp:revision></cp:coreProperties>"""
+    osheet=Core(raw)
+    osheet.title="Added"
+    osheet.revision=None
+    osheet.to_element()
+    new_sheet=Core(osheet.pack())
+    assert new_sheet.title == "Added" and new_sheet.revision is None and new_sheet.creator is None
+
+def test_dirty_tracking(bxml):
+    osheet=Core(bxml)
+    osheet.revision=2
+    osheet.creator=" Silverlayer Employee "
+    assert not osheet.dirty and osheet.pack() == Core(bxml).pack()
+    osheet.category="Controle 2"
+    assert osheet.dirty and osheet._dirty == 1 << Core.category.index
+
+def test_unchanged_props_are_not_written(bxml):
+    osheet=Core(bxml)
+    osheet._xml_root[0].text="Changed behind"
+    osheet.subject="Another subject"
+    osheet.to_element()
+    new_sheet=Core(osheet.pack())
+    assert new_sheet.title == "Changed behind" and new_sheet.subject == "Another subject"
+
+def test_splice_keeps_other_bytes(bxml):
+    osheet=Core(bxml)
+    osheet.title="Fish & Chips <2>"
+    osheet.revision=3
+    raw=osheet.splice()
+    assert raw == bxml.replace(b">Insumos<", b">Fish &amp; Chips &lt;2&gt;<").replace(b">2</cp:revision>", b">3</cp:revision>")
+    assert Core(raw).title == "Fish & Chips <2>"
+
+def test_splice_empty_element():
+    raw=b"""<?xml version="1.0" encoding="UTF-8"?>
+<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties"
+    xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:title  /><dc:subject>old</dc:subject>
+</cp:coreProperties>"""
+    osheet=Core(raw)
+    osheet.title="new"
+    osheet.subject=None
+    new=osheet.splice()
+    assert new == raw.replace(b"<dc:title  />", b"<dc:title>new</dc:title>").replace(b">old<", b"><")
+    assert Core(new).title == "new" and Core(new).subject is None
+
+@mark.parametrize("raw",[
+    b"""<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties"
+        xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:subject>x</dc:subject></cp:coreProperties>""",
+    b"""<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties"
+        xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>x<!-- note --></dc:title></cp:coreProperties>""",
+    '''<?xml version="1.0" encoding="UTF-16"?><cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties"
+        xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>x</dc:title></cp:coreProperties>'''.encode("utf-16"),
+])
+def test_splice_falls_back(raw):
+    osheet=Core(raw)
+    osheet.title="new"
+    assert osheet.splice() is None
+    osheet.to_element()
+    assert Core(osheet.pack()).title == "new"
+
+def test_splice_rejects_control_chars(bxml):
+    osheet=Core(bxml)
+    osheet.title="a\x01b"
+    with raises(ValueError):
+        osheet.splice()
+
+def test_splice_keeps_carriage_return(bxml):
+    osheet=Core(bxml)
+    osheet.title="line 1\r\nline 2"
+    raw=osheet.splice()
+    assert b">line 1&#13;\nline 2<" in raw and Core(raw).title == "line 1\r\nline 2"
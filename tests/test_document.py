@@ -1,7 +1,14 @@
 from nometa import Document
 from nometa.sheet import App, Core
 from pytest import mark, raises
+from unittest import mock
+from zipfile import ZipFile
+from concurrent.futures import ThreadPoolExecutor
+import shutil
 import io
+import os
+
+pytestmark=mark.usefixtures("backend")
 
 RESOURCE_PATH="tests/resource/"
 
@@ -29,7 +36,7 @@ def test_save_inplace_doc():
     ("test.vsdx","test2.vsdx"),
     ("test.accdt","test2.accdt")
 ])
-def test_save_doc(src, dst):
+def test_save_doc(src, dst, tmp_path):
     doc=Document(RESOURCE_PATH+src,Core,App)
     try:
         doc.app.total_time=127
@@ -37,7 +44,7 @@ def test_save_doc(src, dst):
         doc.app.manager=None
     except NotImplementedError: pass
     doc.core.creator = doc.core.last_modified_by = "Johnny Test"
-    doc.save(RESOURCE_PATH+dst)
+    doc.save(str(tmp_path/dst))
 
 def test_doc_asbytes():
     buff=io.BytesIO()
@@ -65,3 +72,177 @@ def test_filepath_to_bytes():
     
     new_doc=Document(buff,Core,App)
     assert doc.app.total_time == new_doc.app.total_time and doc.core.creator == new_doc.core.creator
+
+def test_not_office_document():
+    with raises(ValueError):
+        Document(io.BytesIO(b"not a zip file"),Core,App)
+    with raises(ValueError):
+        Document(RESOURCE_PATH+"nothing.docx",Core,App)
+
+@mark.parametrize("options",[{}, {"ranged": True}, {"mapped": True}])
+def test_invalid_sheet_closes_archive(tmp_path, options):
+    path=str(tmp_path/"broken.docx")
+    with ZipFile(RESOURCE_PATH+"test.docx") as zin, ZipFile(path, 'w') as zout:
+        for it in zin.infolist():
+            zout.writestr(it, b"<cp:coreProperties" if it.filename == "docProps/core.xml" else zin.read(it))
+
+    readers=[]
+    open_archive=Document._open
+    with mock.patch.object(Document, "_open", lambda self, *args: readers.append(open_archive(self, *args)) or readers[-1]):
+        with raises(SyntaxError):
+            Document(path,Core,App,**options)
+    assert len(readers) == 1 and getattr(readers[0], "fp", getattr(readers[0], "_fp", None)) is None
+
+@mark.parametrize("file",["test.docx","test.xlsx","test.pptx","test.vsdx"])
+def test_lazy_doc(file):
+    with Document(RESOURCE_PATH+file,Core,App,lazy=True) as doc:
+        assert doc._core is None and doc._app is None
+        assert doc.core.modified.year == 2024 and doc._app is None
+        assert float(doc.app.app_version)>=14.0
+
+def test_lazy_doc_opens_archive_once():
+    with mock.patch("nometa.ZipFile", wraps=ZipFile) as zf:
+        with Document(RESOURCE_PATH+"test.docx",Core,App,lazy=True) as doc:
+            doc.core.creator
+            doc.app.company
+    assert zf.call_count == 1
+
+def test_lazy_doc_without_app_sheet():
+    with Document(RESOURCE_PATH+"test.accdt",Core,App,lazy=True) as doc:
+        with raises(NotImplementedError):
+            doc.app
+
+def test_lazy_doc_after_close():
+    doc=Document(RESOURCE_PATH+"test.docx",Core,App,lazy=True)
+    doc.close()
+    assert doc.core.creator == Document(RESOURCE_PATH+"test.docx",Core,App).core.creator
+
+def test_save_lazy_doc():
+    buff=io.BytesIO()
+    with Document(RESOURCE_PATH+"test.pptx",Core,App,lazy=True) as doc:
+        doc.core.creator="Johnny Test"
+        doc.save(buff)
+
+    new_doc=Document(buff,Core,App)
+    assert new_doc.core.creator == "Johnny Test" and new_doc.app.app_version == doc.app.app_version
+
+class Unseekable:
+    def __init__(self) -> None:
+        self.data=bytearray()
+
+    def write(self, data: bytes) -> int:
+        self.data+=data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+@mark.parametrize("file",["test.docx","test.pptx","test.accdt"])
+def test_save_to_unseekable(file):
+    out=Unseekable()
+    doc=Document(RESOURCE_PATH+file,Core,App)
+    doc.core.creator="Johnny Test"
+    doc.save(out)
+
+    with ZipFile(io.BytesIO(out.data)) as zr:
+        assert zr.testzip() is None
+    assert Document(io.BytesIO(out.data),Core,App).core.creator == "Johnny Test"
+
+def test_save_to_pipe():
+    rfd, wfd=os.pipe()
+    with open(rfd, "rb") as fr, open(wfd, "wb") as fw:
+        doc=Document(RESOURCE_PATH+"test.xlsx",Core,App)
+        doc.core.title="Piped"
+        reader=ThreadPoolExecutor(1).submit(fr.read)
+        doc.save(fw)
+        fw.close()
+        data=reader.result()
+
+    assert Document(io.BytesIO(data),Core,App).core.title == "Piped"
+
+def test_iter_bytes():
+    doc=Document(RESOURCE_PATH+"test.vsdx",Core,App)
+    doc.app.company="Silverlayer"
+    chunks=list(doc.iter_bytes())
+    buff=io.BytesIO(b''.join(chunks))
+
+    assert Document(buff,Core,App).app.company == "Silverlayer"
+    with ZipFile(buff) as zr, ZipFile(RESOURCE_PATH+"test.vsdx") as zo:
+        assert zr.testzip() is None and zr.namelist() == [it for it in zo.namelist() if it not in ("docProps/core.xml","docProps/app.xml")]+["docProps/core.xml","docProps/app.xml"]
+
+def test_save_splices_sheets():
+    buff=io.BytesIO()
+    doc=Document(RESOURCE_PATH+"test.docx",Core,App)
+    old=doc.core.creator
+    doc.core.creator="Splice Test"
+    doc.save(buff)
+
+    with ZipFile(RESOURCE_PATH+"test.docx") as zin, ZipFile(buff) as zout:
+        before, after=zin.read("docProps/core.xml"), zout.read("docProps/core.xml")
+    assert after == before.replace((">%s<"%old).encode(), b">Splice Test<", 1)
+
+def test_update_after_splice(tmp_path):
+    path=str(tmp_path/"test.docx")
+    with open(RESOURCE_PATH+"test.docx", "rb") as src, open(path, "wb") as dst:
+        dst.write(src.read())
+    doc=Document(path,Core,App)
+    doc.core.creator="First"
+    doc.update()
+    doc.core.identifier="Second"
+    doc.update()
+
+    new_doc=Document(path,Core,App)
+    assert new_doc.core.creator == "First" and new_doc.core.identifier == "Second"
+
+def test_save_overwrite_same_path(tmp_path):
+    path=str(tmp_path/"test.pptx")
+    shutil.copy(RESOURCE_PATH+"test.pptx", path)
+    os.chmod(path, 0o640)
+    os.utime(path, (1e9, 1e9))
+    doc=Document(path,Core,App,lazy=True)
+    doc.core.creator="Overwrite Test"
+    with raises(IOError):
+        doc.save(os.path.join(str(tmp_path), ".", "test.pptx"))
+
+    doc.save(path, compresslevel=9, overwrite=True, keep_times=True)
+    assert not doc.dirty and doc.core.creator == "Overwrite Test"
+    assert os.listdir(tmp_path) == ["test.pptx"]
+    st=os.stat(path)
+    assert (st.st_mode & 0o777, st.st_mtime) == (0o640, 1e9)
+    with ZipFile(path) as zf:
+        assert zf.testzip() is None
+    assert Document(path,Core,App).core.creator == "Overwrite Test"
+
+    doc.app.company="Silverlayer"
+    doc.save(path, overwrite=True)
+    assert os.stat(path).st_mtime > 1e9 and Document(path,Core,App).app.company == "Silverlayer"
+
+def test_save_overwrite_other_path(tmp_path):
+    path=str(tmp_path/"out.docx")
+    with open(path, "wb") as fd:
+        fd.write(b"old content")
+    Document(RESOURCE_PATH+"test.docx",Core,App).save(path, overwrite=True)
+    assert Document(path,Core,App).core.creator == Document(RESOURCE_PATH+"test.docx",Core,App).core.creator
+
+def test_save_overwrite_same_buffer():
+    buff=io.BytesIO(open(RESOURCE_PATH+"test.docx", "rb").read())
+    doc=Document(buff,Core,App)
+    doc.core.creator="Overwrite Test"
+    with raises(IOError):
+        doc.save(buff, overwrite=True)
+
+def test_update_keep_times(tmp_path):
+    path=str(tmp_path/"test.docx")
+    shutil.copy(RESOURCE_PATH+"test.docx", path)
+    os.utime(path, (1e9, 1e9))
+    doc=Document(path,Core,App)
+    doc.core.creator="Keep Times"
+    doc.update(keep_times=True)
+    assert os.stat(path).st_mtime == 1e9 and Document(path,Core,App).core.creator == "Keep Times"
+
+def test_save_rejects_control_chars():
+    buff=io.BytesIO()
+    doc=Document(RESOURCE_PATH+"test.docx",Core,App)
+    doc.core.title="a\x01b"
+    with raises(ValueError):
+        doc.save(buff)
@@ -1,7 +1,10 @@
 from nometa.properties.text import TextProperty
 from typing import cast
-from pytest import fixture
+from pytest import fixture, raises, mark
 from nometa import *
+from nometa.sheet import Field
+
+pytestmark=mark.usefixtures("backend")
 
 @fixture
 def bxml() -> bytes:
@@ -53,8 +56,35 @@ def test_open_document_with_unreal_class() -> None:
     ucore=cast(UnrealCore, doc.core)
     assert ucore.unreal is None and ucore.modified.year == 2024
 
-def test_save_doc_with_unreal_prop() -> None:
+def test_save_doc_with_unreal_prop(tmp_path) -> None:
     doc=Document("tests/resource/test.xlsx",UnrealCore,App)
     ucore=cast(UnrealCore, doc.core)
     ucore.unreal="paradise"
-    doc.save("tests/resource/test20.xlsx")
\ No newline at end of file
+    doc.save(str(tmp_path/"test20.xlsx"))
+
+class DeclaredCore(Core):
+    unreal=Field("dc:unreal", TextProperty, "A property out of the standard")
+    revision=Field("cp:revision", TextProperty, "The revision as text")
+
+def test_declared_field(bxml) -> None:
+    prop=DeclaredCore(bxml)
+    assert prop.unreal == "Anything" and prop.revision == "2" and prop.category == "Controle"
+    assert len(DeclaredCore._fields) == len(Core._fields)+1
+
+def test_save_declared_field(bxml) -> None:
+    prop=DeclaredCore(bxml)
+    prop.unreal=" paradise "
+    prop.to_element()
+    assert DeclaredCore(prop.pack()).unreal == "paradise" and Core(prop.pack()).revision == 2
+
+def test_field_with_unknown_prefix() -> None:
+    with raises(ValueError):
+        class WrongCore(Core):
+            unreal=Field("xx:unreal", TextProperty)
+
+def test_extended_sheet_dirty(bxml) -> None:
+    prop=UnrealCore(bxml)
+    prop.unreal="Anything"
+    assert not prop.dirty
+    prop.unreal="paradise"
+    assert prop.dirty
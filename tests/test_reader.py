@@ -0,0 +1,207 @@
+from nometa import Document
+from nometa.sheet import App, Core
+from nometa.reader import RangeReader, ReadStats, MappedZipFile
+from nometa.archive import _raw_member
+from zipfile import ZipFile, BadZipFile, ZIP_DEFLATED
+from pytest import mark, raises
+import zipfile
+import io
+import os
+
+RESOURCE_PATH="tests/resource/"
+FILES=["test.docx","test.xlsx","test.pptx","test.vsdx","test.accdt"]
+
+class CountingFile:
+    """A file object over bytes that counts the I/O it serves"""
+    def __init__(self, raw: bytes) -> None:
+        self._buff=io.BytesIO(raw)
+        self.bytes_read=self.seeks=self.reads=0
+
+    def seek(self, offset: int, whence: int=0) -> int:
+        self.seeks+=1
+        return self._buff.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._buff.tell()
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int=-1) -> bytes:
+        data=self._buff.read(size)
+        self.reads+=1
+        self.bytes_read+=len(data)
+        return data
+
+def read(file: str) -> bytes:
+    with open(RESOURCE_PATH+file, "rb") as fd:
+        return fd.read()
+
+def local_entry_size(raw: bytes, offset: int, compress_size: int) -> int:
+    return 30+int.from_bytes(raw[offset+26:offset+28], "little")+int.from_bytes(raw[offset+28:offset+30], "little")+compress_size
+
+@mark.parametrize("file",FILES)
+def test_reads_like_zipfile(file):
+    with ZipFile(RESOURCE_PATH+file) as zf, RangeReader(RESOURCE_PATH+file) as rr:
+        assert rr.namelist() == zf.namelist()
+        for name in zf.namelist():
+            assert rr.read(name) == zf.read(name)
+
+@mark.parametrize("file",FILES)
+def test_ranged_doc_reads_minimal_bytes(file):
+    raw=read(file)
+    fp=CountingFile(raw)
+    doc=Document(fp,Core,App,ranged=True)
+    assert doc.core.creator == Document(RESOURCE_PATH+file,Core,App).core.creator
+
+    with ZipFile(io.BytesIO(raw)) as zf:
+        sheets=[zf.getinfo(name) for name in ("docProps/core.xml", "docProps/app.xml") if name in zf.namelist()]
+        expected=42+len(raw)-22-zf.start_dir+sum(local_entry_size(raw, it.header_offset, it.compress_size) for it in sheets)
+
+    stats=doc.read_stats
+    assert (stats.bytes_read, stats.seeks, stats.reads) == (fp.bytes_read, fp.seeks, fp.reads)
+    assert stats.bytes_read == expected
+    assert stats.reads == 2+2*len(sheets) and stats.seeks <= 2+len(sheets)
+
+def test_ranged_doc_reads_less_than_zipfile():
+    raw=read("test.pptx")
+    fp=CountingFile(raw)
+    Document(fp,Core,App)
+    ranged=Document(CountingFile(raw),Core,App,ranged=True).read_stats
+    assert ranged.bytes_read <= fp.bytes_read and ranged.seeks < fp.seeks and ranged.reads < fp.reads
+
+def test_lazy_ranged_doc_reads_only_accessed_sheet():
+    raw=read("test.docx")
+    with Document(CountingFile(raw),Core,App,lazy=True,ranged=True) as doc:
+        before=doc.read_stats.bytes_read
+        doc.core.creator
+        assert doc.read_stats.reads == 4 and doc.read_stats.bytes_read > before
+        doc.app.company
+        assert doc.read_stats.reads == 6
+
+def test_ranged_doc_counts_reopening():
+    doc=Document(RESOURCE_PATH+"test.docx",Core,App,lazy=True,ranged=True)
+    doc.close()
+    doc.core.creator
+    assert doc.read_stats.reads == 6
+
+def test_not_ranged_doc_has_no_stats():
+    assert Document(RESOURCE_PATH+"test.docx",Core,App).read_stats is None
+
+def test_save_and_update_ranged_doc(tmp_path):
+    buff=io.BytesIO()
+    with Document(RESOURCE_PATH+"test.xlsx",Core,App,lazy=True,ranged=True) as doc:
+        doc.core.creator="Johnny Test"
+        doc.save(buff)
+    assert Document(buff,Core,App).core.creator == "Johnny Test"
+
+    path=str(tmp_path/"test.xlsx")
+    with open(path, "wb") as fd:
+        fd.write(read("test.xlsx"))
+    doc=Document(path,Core,App,ranged=True)
+    doc.app.company="Silverlayer"
+    doc.update()
+    assert Document(path,Core,App,ranged=True).app.company == "Silverlayer"
+
+def make_zip(**kw) -> bytes:
+    buff=io.BytesIO()
+    with ZipFile(buff, 'w', compression=ZIP_DEFLATED) as zf:
+        zf.comment=kw.get("comment", b'')
+        zf.writestr("a.txt", b"alpha"*100)
+        zf.writestr("b.txt", "beta")
+    return kw.get("prefix", b'')+buff.getvalue()
+
+def test_archive_comment():
+    raw=make_zip(comment=b"hello"*10)
+    rr=RangeReader(io.BytesIO(raw))
+    assert rr.read("a.txt") == b"alpha"*100 and rr.read("b.txt") == b"beta"
+
+def test_prepended_data():
+    rr=RangeReader(io.BytesIO(make_zip(prefix=b"#!/bin/sh\n"*5)))
+    assert rr.read("b.txt") == b"beta"
+
+def test_zip64(monkeypatch):
+    monkeypatch.setattr(zipfile, "ZIP64_LIMIT", 10)
+    monkeypatch.setattr(zipfile, "ZIP_FILECOUNT_LIMIT", 1)
+    raw=make_zip()
+    assert b"PK\006\006" in raw
+    monkeypatch.undo()
+    rr=RangeReader(io.BytesIO(raw))
+    assert rr.namelist() == ["a.txt", "b.txt"] and rr.read("b.txt") == b"beta"
+
+def test_shared_stats():
+    stats=ReadStats()
+    RangeReader(io.BytesIO(make_zip()), stats).read("a.txt")
+    RangeReader(io.BytesIO(make_zip()), stats)
+    assert stats.reads == 2+2+2
+
+def test_invalid_archives():
+    for raw in [b'', b"not a zip", b"PK\005\006"+b"\xff"*18]:
+        with raises(BadZipFile):
+            RangeReader(io.BytesIO(raw))
+
+def test_corrupted_member():
+    raw=bytearray(make_zip())
+    raw[raw.index(b"a.txt")+5]^=0xFF
+    rr=RangeReader(io.BytesIO(bytes(raw)))
+    with raises(BadZipFile):
+        rr.read("a.txt")
+    with raises(KeyError):
+        rr.read("c.txt")
+
+def test_closed_reader():
+    rr=RangeReader(RESOURCE_PATH+"test.docx")
+    rr.close()
+    with raises(ValueError):
+        rr.read("docProps/core.xml")
+
+def test_missing_file():
+    with raises(OSError):
+        RangeReader(os.path.join(RESOURCE_PATH, "missing.docx"))
+
+@mark.parametrize("file",FILES)
+def test_mapped_reads_like_zipfile(file):
+    with ZipFile(RESOURCE_PATH+file) as zf, MappedZipFile(RESOURCE_PATH+file) as mf:
+        for info in zf.infolist():
+            assert mf.read(info.filename) == zf.read(info)
+
+def test_mapped_raw_members_are_views():
+    with MappedZipFile(RESOURCE_PATH+"test.pptx") as mf:
+        info, chunks=_raw_member(mf, mf.getinfo("ppt/presentation.xml"))
+        chunks=list(chunks)
+        assert all(type(it) is memoryview for it in chunks) and sum(len(it) for it in chunks) == info.compress_size
+        del chunks
+
+def test_mapped_doc(tmp_path):
+    with Document(RESOURCE_PATH+"test.pptx",Core,App,lazy=True,mapped=True) as doc:
+        assert isinstance(doc._zip, MappedZipFile)
+        assert doc.app.company == Document(RESOURCE_PATH+"test.pptx",Core,App).app.company
+        doc.core.creator="Johnny Test"
+        doc.save(str(tmp_path/"out.pptx"))
+
+    with ZipFile(RESOURCE_PATH+"test.pptx") as zin, ZipFile(tmp_path/"out.pptx") as zout:
+        assert zout.testzip() is None
+        for info in zin.infolist():
+            if info.filename != "docProps/core.xml":
+                assert zout.read(info.filename) == zin.read(info)
+    assert Document(str(tmp_path/"out.pptx"),Core,App).core.creator == "Johnny Test"
+
+def test_update_mapped_doc(tmp_path):
+    path=str(tmp_path/"test.docx")
+    with open(path, "wb") as fd:
+        fd.write(read("test.docx"))
+    doc=Document(path,Core,App,mapped=True)
+    doc.core.creator="Johnny Test"
+    doc.update(fallback=False)
+    assert Document(path,Core,App,mapped=True).core.creator == "Johnny Test"
+
+def test_mapped_doc_ignores_buffers():
+    doc=Document(io.BytesIO(read("test.docx")),Core,App,lazy=True,mapped=True)
+    assert not isinstance(doc._zip, MappedZipFile)
+
+def test_mapped_invalid(tmp_path):
+    (tmp_path/"empty.docx").write_bytes(b'')
+    with raises(ValueError):
+        Document(str(tmp_path/"empty.docx"),Core,App,mapped=True)
+    with raises(ValueError):
+        Document(RESOURCE_PATH+"test.docx",Core,App,ranged=True,mapped=True)
@@ -0,0 +1,53 @@
+from nometa import Document, scan, scan_many
+from nometa.sheet import App, Core
+from nometa.scanner import CORE_FIELDS, APP_FIELDS, parse_sheet
+from pytest import mark, raises
+import io
+
+RESOURCE_PATH="tests/resource/"
+FILES=["test.docx","test.xlsx","test.pptx","test.vsdx","test.accdt"]
+
+def expected(file: str) -> dict:
+    doc=Document(RESOURCE_PATH+file,Core,App)
+    out={key: getattr(doc.core, key[5:]) for key, _ in CORE_FIELDS.values()}
+    try:
+        out.update({key: getattr(doc.app, key[4:]) for key, _ in APP_FIELDS.values()})
+    except NotImplementedError: pass
+    return out
+
+@mark.parametrize("file",FILES)
+def test_scan_matches_document(file):
+    assert scan(RESOURCE_PATH+file) == expected(file)
+
+def test_scan_without_app_sheet():
+    values=scan(RESOURCE_PATH+"test.accdt")
+    assert "app.company" not in values and values["core.title"] == "Northwind 2007"
+
+def test_scan_buffer():
+    with open(RESOURCE_PATH+"test.docx", "rb") as fd:
+        assert scan(io.BytesIO(fd.read())) == expected("test.docx")
+
+def test_scan_invalid():
+    with raises(ValueError):
+        scan(io.BytesIO(b"garbage"))
+
+@mark.parametrize("executor",["process","thread"])
+def test_scan_many(executor):
+    paths=[RESOURCE_PATH+it for it in FILES]+[RESOURCE_PATH+"missing.docx"]
+    results={r.path: r for r in scan_many(paths, workers=2, chunksize=2, executor=executor)}
+
+    assert results[RESOURCE_PATH+"missing.docx"].values is None and results[RESOURCE_PATH+"missing.docx"].error.startswith("ValueError")
+    assert all(results[RESOURCE_PATH+it].values == expected(it) for it in FILES)
+
+def test_parse_sheet_skips_nested_elements():
+    raw=b"""<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"
+        xmlns:vt="http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes">
+        <HeadingPairs><vt:vector size="1" baseType="lpstr"><vt:lpstr>Company</vt:lpstr></vt:vector></HeadingPairs>
+        <Company> Silverlayer <vt:lpstr>ignored</vt:lpstr> tail</Company>
+        <ScaleCrop/>
+        <TotalTime>93</TotalTime>
+    </Properties>"""
+    out={}
+    parse_sheet(raw, APP_FIELDS, out)
+    osheet=App(raw)
+    assert out == {"app.company": osheet.company, "app.scale_crop": osheet.scale_crop, "app.total_time": osheet.total_time}